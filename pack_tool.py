@@ -10,6 +10,24 @@ from datetime import datetime
 import webbrowser
 import queue
 import time
+import argparse
+import ast
+import hashlib
+import platform
+import re
+import tempfile
+import asyncio
+import mmap
+import struct
+import marshal
+import fnmatch
+import importlib.metadata
+import socket
+import sqlite3
+import zipfile
+import statistics
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 class UniversalPyToExe:
     def __init__(self):
@@ -20,18 +38,40 @@ class UniversalPyToExe:
         # 设置窗口最小尺寸
         self.root.minsize(800, 600)
         
-        # 打包状态
+        # 打包状态：队列中正在运行的任务，时间线显示最近启动的任务
         self.packing = False
-        self.process = None
+        self.job = None
+        self.running_jobs = {}
+        self.closing = False
         self.output_queue = queue.Queue()
         
+        # 持久化的任务队列（上次退出时未完成的任务保留在队列中，需手动继续）
+        self.job_queue = JobQueue()
+        self.queue_paused = self.job_queue.counts()['queued'] > 0
+        
+        # 监视模式：源码变化后自动加入的最近一个构建任务
+        self.watcher = None
+        self.watch_job_id = None
+        
+        # 最近一次依赖扫描的结果
+        self.import_graph = None
+        
+        # 完整日志文件（界面中只保留最近的日志）
+        self.log_file = None
+        self.log_file_path = None
+        
         # 配置文件
         self.config_file = os.path.join(os.path.expanduser('~'), '.pytoexe_config.json')
         
         # 加载上次设置
         self.last_config = self.load_config()
         
+        # 设置窗口中的选项（Python路径、超时、资源限制、缓存上限）
+        self.settings = {key: self.last_config.get(key, default)
+                         for key, default in SETTINGS_DEFAULTS.items()}
+        
         self.setup_ui()
+        self.check_compress_support()
         
     def load_config(self):
         """加载上次的配置"""
@@ -47,10 +87,27 @@ class UniversalPyToExe:
         """保存当前配置"""
         config = {
             'output_dir': self.output_dir.get(),
+            'backend': self.backend.get(),
+            'variants': self.selected_variants(),
             'single_file': self.single_file.get(),
             'no_console': self.no_console.get(),
             'clean_build': self.clean_build.get(),
-            'icon_path': self.icon_path.get()
+            'icon_path': self.icon_path.get(),
+            'use_cache': self.use_cache.get(),
+            'incremental': self.incremental.get(),
+            'use_daemon': self.use_daemon.get(),
+            'preflight': self.preflight.get(),
+            'optimize': self.optimize.get(),
+            'compress_level': self.compress_level.get(),
+            'hidden_imports': self.hidden_imports.get(),
+            'benchmark': self.benchmark.get(),
+            'bench_runs': self.bench_runs.get(),
+            'bench_args': self.bench_args.get(),
+            'upx_dir': self.upx_dir.get(),
+            'upx_exclude': self.upx_exclude.get(),
+            'history_limit': self.history_limit.get(),
+            'budgets': self.save_project_budget(),
+            **self.settings
         }
         try:
             with open(self.config_file, 'w', encoding='utf-8') as f:
@@ -58,6 +115,20 @@ class UniversalPyToExe:
         except:
             pass
     
+    def project_budget(self, py_file):
+        """读取某个主程序的体积与启动预算"""
+        budgets = self.last_config.get('budgets', {})
+        budget = budgets.get(os.path.abspath(py_file), {}) if py_file else {}
+        return {key: budget.get(key, DEFAULT_OPTIONS[key]) for key in BUDGET_OPTIONS}
+    
+    def save_project_budget(self):
+        """把界面上的预算记到当前主程序名下，返回所有程序的预算"""
+        budgets = self.last_config.setdefault('budgets', {})
+        py_file = self.py_file_path.get()
+        if py_file:
+            budgets[os.path.abspath(py_file)] = {key: getattr(self, key).get() for key in BUDGET_OPTIONS}
+        return budgets
+    
     def setup_ui(self):
         # === 主框架 ===
         main_frame = tk.Frame(self.root)
@@ -132,6 +203,31 @@ class UniversalPyToExe:
         notebook.add(advanced_frame, text="高级设置")
         self.setup_advanced_tab(advanced_frame)
         
+        # 启动分析标签页
+        startup_frame = tk.Frame(notebook)
+        notebook.add(startup_frame, text="启动分析")
+        self.setup_startup_tab(startup_frame)
+        
+        # 构建时间线标签页
+        timeline_frame = tk.Frame(notebook)
+        notebook.add(timeline_frame, text="构建时间线")
+        self.setup_timeline_tab(timeline_frame)
+        
+        # 体积分析标签页
+        size_frame = tk.Frame(notebook)
+        notebook.add(size_frame, text="体积分析")
+        self.setup_size_tab(size_frame)
+        
+        # 任务队列标签页
+        queue_frame = tk.Frame(notebook)
+        notebook.add(queue_frame, text="任务队列")
+        self.setup_queue_tab(queue_frame)
+        
+        # 构建历史标签页
+        history_frame = tk.Frame(notebook)
+        notebook.add(history_frame, text="构建历史")
+        self.setup_history_tab(history_frame)
+        
         # 日志标签页
         log_frame = tk.Frame(notebook)
         notebook.add(log_frame, text="打包日志")
@@ -178,6 +274,10 @@ class UniversalPyToExe:
         
         # 开始检查输出队列
         self.check_output_queue()
+        self.tick_queue()
+        if self.queue_paused:
+            self.log(f"📋 队列中有 {self.job_queue.counts()['queued']} 个未完成的任务，"
+                     f"可在任务队列中点击继续")
     
     def setup_basic_tab(self, parent):
         content = tk.Frame(parent)
@@ -246,6 +346,19 @@ class UniversalPyToExe:
         mode_frame = ttk.LabelFrame(content, text="3. 打包模式", padding=15)
         mode_frame.pack(fill="x", pady=(0, 15))
         
+        # 打包后端
+        self.backend = tk.StringVar(value=self.last_config.get('backend', 'pyinstaller'))
+        backend_frame = tk.Frame(mode_frame)
+        backend_frame.pack(anchor="w", pady=5)
+        
+        ttk.Radiobutton(backend_frame, text="PyInstaller(完整打包)", value="pyinstaller",
+                       variable=self.backend).pack(side="left")
+        ttk.Radiobutton(backend_frame, text="zipapp开发构建", value="zipapp",
+                       variable=self.backend).pack(side="left", padx=(15, 0))
+        
+        tk.Label(backend_frame, text="(几秒完成，需要本机Python环境运行)",
+                font=("微软雅黑", 9), fg="gray").pack(side="left", padx=10)
+        
         # 单文件选项
         self.single_file = tk.BooleanVar(value=self.last_config.get('single_file', True))
         single_file_frame = tk.Frame(mode_frame)
@@ -268,6 +381,21 @@ class UniversalPyToExe:
         tk.Label(console_frame, text="(适合GUI程序)",
                 font=("微软雅黑", 9), fg="gray").pack(side="left", padx=10)
         
+        # 多变体构建
+        variant_frame = tk.Frame(mode_frame)
+        variant_frame.pack(anchor="w", pady=5)
+        
+        ttk.Label(variant_frame, text="多变体:").pack(side="left")
+        saved_variants = self.last_config.get('variants', [])
+        self.variant_vars = {}
+        for key, (label, _) in BUILD_VARIANTS.items():
+            self.variant_vars[key] = tk.BooleanVar(value=key in saved_variants)
+            ttk.Checkbutton(variant_frame, text=label,
+                           variable=self.variant_vars[key]).pack(side="left", padx=(5, 0))
+        
+        tk.Label(mode_frame, text="(勾选后忽略上面的单文件/控制台选项，各变体共用一次模块分析并行打包)",
+                font=("微软雅黑", 9), fg="gray").pack(anchor="w")
+        
         # === 优化选项 ===
         opt_frame = ttk.LabelFrame(content, text="4. 优化选项", padding=15)
         opt_frame.pack(fill="x", pady=(0, 15))
@@ -277,6 +405,26 @@ class UniversalPyToExe:
         ttk.Checkbutton(opt_frame, text="打包后清理临时文件", 
                        variable=self.clean_build).pack(anchor="w", pady=2)
         
+        # 构建缓存
+        self.use_cache = tk.BooleanVar(value=self.last_config.get('use_cache', True))
+        ttk.Checkbutton(opt_frame, text="启用构建缓存(源码和选项未变时直接复用上次结果)", 
+                       variable=self.use_cache).pack(anchor="w", pady=2)
+        
+        # 增量构建
+        self.incremental = tk.BooleanVar(value=self.last_config.get('incremental', False))
+        ttk.Checkbutton(opt_frame, text="增量构建(保留工作目录，只重新处理变化的部分)", 
+                       variable=self.incremental).pack(anchor="w", pady=2)
+        
+        # 常驻构建进程
+        self.use_daemon = tk.BooleanVar(value=self.last_config.get('use_daemon', False))
+        ttk.Checkbutton(opt_frame, text="使用常驻构建进程(预先加载PyInstaller，减少每次打包的启动时间)", 
+                       variable=self.use_daemon).pack(anchor="w", pady=2)
+        
+        # 导入预检
+        self.preflight = tk.BooleanVar(value=self.last_config.get('preflight', True))
+        ttk.Checkbutton(opt_frame, text="打包前检查所有导入能否解析(有缺失的模块时不开始打包)", 
+                       variable=self.preflight).pack(anchor="w", pady=2)
+        
         # UPX压缩
         self.use_upx = tk.BooleanVar(value=False)
         ttk.Checkbutton(opt_frame, text="使用UPX压缩(减小体积，但可能被误报)", 
@@ -286,6 +434,15 @@ class UniversalPyToExe:
         self.debug_mode = tk.BooleanVar(value=False)
         ttk.Checkbutton(opt_frame, text="包含调试信息(方便排错)", 
                        variable=self.debug_mode).pack(anchor="w", pady=2)
+        
+        # 字节码优化级别
+        optimize_frame = tk.Frame(opt_frame)
+        optimize_frame.pack(anchor="w", pady=2)
+        ttk.Label(optimize_frame, text="字节码优化:").pack(side="left")
+        self.optimize = tk.IntVar(value=self.last_config.get('optimize', 0))
+        for level, text in OPTIMIZE_LEVELS.items():
+            ttk.Radiobutton(optimize_frame, text=text, variable=self.optimize, 
+                           value=level).pack(side="left", padx=5)
     
     def setup_advanced_tab(self, parent):
         content = tk.Frame(parent)
@@ -295,7 +452,7 @@ class UniversalPyToExe:
         deps_frame = ttk.LabelFrame(content, text="依赖检测", padding=15)
         deps_frame.pack(fill="both", expand=True, pady=(0, 10))
         
-        ttk.Label(deps_frame, text="检测到的import语句:").pack(anchor="w", pady=2)
+        ttk.Label(deps_frame, text="检测到的依赖（递归扫描本地模块）:").pack(anchor="w", pady=2)
         
         # 依赖文本框
         deps_text_frame = tk.Frame(deps_frame)
@@ -315,6 +472,9 @@ class UniversalPyToExe:
         ttk.Button(button_frame, text="检测依赖", 
                   command=self.detect_dependencies).pack(side="left", padx=(0, 10))
         
+        ttk.Button(button_frame, text="📏 预测体积", 
+                  command=self.predict_size).pack(side="left", padx=(0, 10))
+        
         ttk.Button(button_frame, text="清空", 
                   command=lambda: self.deps_text.delete(1.0, tk.END)).pack(side="left")
         
@@ -335,9 +495,16 @@ class UniversalPyToExe:
         ttk.Button(hidden_entry_frame, text="添加", 
                   command=self.add_hidden_import).pack(side="left")
         
+        ttk.Button(hidden_entry_frame, text="🔬 追踪运行", 
+                  command=self.trace_hidden_imports).pack(side="left", padx=(5, 0))
+        
         tk.Label(hidden_frame, text="多个模块用逗号分隔，如：pyautogui,PIL", 
                 font=("微软雅黑", 8), fg="gray").pack(anchor="w", pady=2)
         
+        tk.Label(hidden_frame, text=f"追踪运行：在低优先级子进程中真实运行程序（最多{TRACE_TIMEOUT}秒，"
+                "用户目录和临时目录指向临时文件夹），把动态导入且静态分析找不到的模块加入列表", 
+                font=("微软雅黑", 8), fg="gray").pack(anchor="w")
+        
         # === 额外参数 ===
         args_frame = ttk.LabelFrame(content, text="额外参数", padding=15)
         args_frame.pack(fill="x", pady=(0, 10))
@@ -350,6 +517,100 @@ class UniversalPyToExe:
         tk.Label(args_frame, text="例如：--add-data 'data;data' --add-binary 'lib;lib'", 
                 font=("微软雅黑", 8), fg="gray").pack(anchor="w")
         
+        # === UPX压缩 ===
+        upx_frame = ttk.LabelFrame(content, text="UPX压缩", padding=15)
+        upx_frame.pack(fill="x", pady=(0, 10))
+        
+        ttk.Label(upx_frame, text="UPX所在目录（留空则在PATH中查找）:").pack(anchor="w", pady=2)
+        self.upx_dir = tk.StringVar(value=self.last_config.get('upx_dir', ''))
+        ttk.Entry(upx_frame, textvariable=self.upx_dir).pack(fill="x", pady=2)
+        
+        ttk.Label(upx_frame, text="不压缩的文件（逗号分隔，支持通配符）:").pack(anchor="w", pady=(5, 2))
+        self.upx_exclude = tk.StringVar(value=self.last_config.get('upx_exclude', ''))
+        ttk.Entry(upx_frame, textvariable=self.upx_exclude).pack(fill="x", pady=2)
+        
+        tk.Label(upx_frame, text="例如：vcruntime140.dll, Qt5*.dll；目录模式下并行压缩并缓存结果，报告保存在 程序名_upx.json", 
+                font=("微软雅黑", 8), fg="gray").pack(anchor="w")
+        
+        # === 归档压缩 ===
+        compress_frame = ttk.LabelFrame(content, text="归档压缩（PYZ和单文件归档，zlib）", padding=15)
+        compress_frame.pack(fill="x", pady=(0, 10))
+        
+        compress_top_frame = tk.Frame(compress_frame)
+        compress_top_frame.pack(fill="x", pady=2)
+        ttk.Label(compress_top_frame, text="压缩级别:").pack(side="left")
+        self.compress_level = tk.IntVar(value=self.last_config.get('compress_level', -1))
+        # PyInstaller不支持设置压缩级别时禁用这些控件
+        self.compress_widgets = []
+        for level, text in COMPRESS_LEVELS.items():
+            radio = ttk.Radiobutton(compress_top_frame, text=text if level < 0 else f"{level} {text}", 
+                                    variable=self.compress_level, value=level)
+            radio.pack(side="left", padx=5)
+            self.compress_widgets.append(radio)
+        
+        compress_bench_button = ttk.Button(compress_frame, text="🗜️ 对比各压缩级别", 
+                                           command=lambda: self.start_packing({'compress_bench': True}))
+        compress_bench_button.pack(anchor="w", pady=(5, 2))
+        self.compress_widgets.append(compress_bench_button)
+        tk.Label(compress_frame, text="依次用 0/1/6/9 级构建并测试大小、解压耗时和启动耗时（共用一次模块分析），"
+                 "结果保存在 程序名_compress.json", 
+                font=("微软雅黑", 8), fg="gray", wraplength=520, justify="left").pack(anchor="w")
+        
+        # === 启动基准测试 ===
+        bench_frame = ttk.LabelFrame(content, text="启动基准测试", padding=15)
+        bench_frame.pack(fill="x", pady=(0, 10))
+        
+        bench_top_frame = tk.Frame(bench_frame)
+        bench_top_frame.pack(fill="x", pady=2)
+        
+        self.benchmark = tk.BooleanVar(value=self.last_config.get('benchmark', False))
+        ttk.Checkbutton(bench_top_frame, text="打包后测试启动耗时", 
+                       variable=self.benchmark).pack(side="left")
+        
+        ttk.Label(bench_top_frame, text="运行次数:").pack(side="left", padx=(20, 5))
+        self.bench_runs = tk.IntVar(value=self.last_config.get('bench_runs', 10))
+        ttk.Spinbox(bench_top_frame, from_=3, to=100, textvariable=self.bench_runs, 
+                   width=6).pack(side="left")
+        
+        ttk.Label(bench_frame, text="启动参数（留空则使用内置钩子，程序初始化完成后立即退出）:").pack(
+            anchor="w", pady=(5, 2))
+        self.bench_args = tk.StringVar(value=self.last_config.get('bench_args', ''))
+        ttk.Entry(bench_frame, textvariable=self.bench_args).pack(fill="x", pady=2)
+        
+        tk.Label(bench_frame, text="例如：--version（程序需要能自行退出）；结果保存在输出目录的 程序名_bench.json", 
+                font=("微软雅黑", 8), fg="gray").pack(anchor="w")
+        
+        # === 体积与启动预算（按主程序分别保存） ===
+        budget_frame = ttk.LabelFrame(content, text="体积与启动预算", padding=15)
+        budget_frame.pack(fill="x", pady=(0, 10))
+        
+        budget_top_frame = tk.Frame(budget_frame)
+        budget_top_frame.pack(fill="x", pady=2)
+        
+        budget = self.project_budget(self.py_file_path.get())
+        ttk.Label(budget_top_frame, text="大小上限(MB):").pack(side="left")
+        self.size_budget_mb = tk.DoubleVar(value=budget['size_budget_mb'])
+        ttk.Spinbox(budget_top_frame, from_=0, to=10000, increment=5, textvariable=self.size_budget_mb, 
+                   width=8).pack(side="left", padx=(5, 20))
+        
+        ttk.Label(budget_top_frame, text="启动耗时上限(ms):").pack(side="left")
+        self.startup_budget_ms = tk.IntVar(value=budget['startup_budget_ms'])
+        ttk.Spinbox(budget_top_frame, from_=0, to=60000, increment=50, textvariable=self.startup_budget_ms, 
+                   width=8).pack(side="left", padx=5)
+        
+        budget_action_frame = tk.Frame(budget_frame)
+        budget_action_frame.pack(fill="x", pady=2)
+        ttk.Label(budget_action_frame, text="超出预算时:").pack(side="left")
+        self.budget_action = tk.StringVar(value=budget['budget_action'])
+        ttk.Radiobutton(budget_action_frame, text="只提示", variable=self.budget_action, 
+                       value="warn").pack(side="left", padx=5)
+        ttk.Radiobutton(budget_action_frame, text="标记为失败", variable=self.budget_action, 
+                       value="fail").pack(side="left", padx=5)
+        
+        tk.Label(budget_frame, text="0 表示不限制；设置了启动耗时上限时打包后会自动测试启动耗时。"
+                 "每次打包后与上次的产物比较新增的模块、二进制文件和各个包的体积变化", 
+                font=("微软雅黑", 8), fg="gray", wraplength=520, justify="left").pack(anchor="w")
+        
         # === 快速工具 ===
         tools_frame = ttk.LabelFrame(content, text="快速工具", padding=15)
         tools_frame.pack(fill="x")
@@ -358,7 +619,9 @@ class UniversalPyToExe:
             ("📖 PyInstaller文档", lambda: webbrowser.open("https://pyinstaller.org/")),
             ("🗂️ 打开输出目录", self.open_output_dir),
             ("🧹 清理临时文件", self.clean_temp_files),
-            ("📊 检查PyInstaller", self.check_pyinstaller)
+            ("📊 检查PyInstaller", self.check_pyinstaller),
+            ("🗄️ 共享缓存", self.show_cache_stats),
+            ("👁️ 监视模式", self.toggle_watch)
         ]
         
         for i, (text, command) in enumerate(tools_buttons):
@@ -368,6 +631,599 @@ class UniversalPyToExe:
         tools_frame.columnconfigure(0, weight=1)
         tools_frame.columnconfigure(1, weight=1)
     
+    def setup_startup_tab(self, parent):
+        content = tk.Frame(parent)
+        content.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        # 控制按钮
+        control_frame = tk.Frame(content)
+        control_frame.pack(fill="x", pady=(0, 10))
+        
+        ttk.Button(control_frame, text="⏱️ 分析导入耗时", 
+                  command=self.profile_startup).pack(side="left", padx=(0, 10))
+        
+        self.startup_summary = tk.Label(control_frame, text="按累计导入耗时排序，展开可查看子模块",
+                                        font=("微软雅黑", 9), fg="gray", anchor="w")
+        self.startup_summary.pack(side="left", fill="x", expand=True)
+        
+        # 导入耗时树
+        tree_frame = tk.Frame(content)
+        tree_frame.pack(fill="both", expand=True)
+        
+        columns = ("cumulative", "self", "advice")
+        self.startup_tree = ttk.Treeview(tree_frame, columns=columns, height=16)
+        self.startup_tree.heading("#0", text="模块")
+        self.startup_tree.heading("cumulative", text="累计(ms)")
+        self.startup_tree.heading("self", text="自身(ms)")
+        self.startup_tree.heading("advice", text="建议")
+        self.startup_tree.column("#0", width=260)
+        self.startup_tree.column("cumulative", width=80, anchor="e")
+        self.startup_tree.column("self", width=80, anchor="e")
+        self.startup_tree.column("advice", width=220)
+        
+        tree_scrollbar = ttk.Scrollbar(tree_frame, command=self.startup_tree.yview)
+        self.startup_tree.configure(yscrollcommand=tree_scrollbar.set)
+        
+        self.startup_tree.pack(side="left", fill="both", expand=True)
+        tree_scrollbar.pack(side="right", fill="y")
+        
+        tk.Label(content, text="延迟导入：把import移到用到它的函数里；"
+                "--exclude-module：确认程序用不到后可在额外参数中排除", 
+                font=("微软雅黑", 8), fg="gray").pack(anchor="w", pady=(5, 0))
+    
+    def setup_timeline_tab(self, parent):
+        content = tk.Frame(parent)
+        content.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        self.timeline_summary = tk.Label(content, text="打包时实时显示各阶段耗时",
+                                         font=("微软雅黑", 9), fg="gray", anchor="w")
+        self.timeline_summary.pack(fill="x", pady=(0, 5))
+        
+        # 阶段耗时条形图
+        self.timeline_canvas = tk.Canvas(content, height=200, bg="white", highlightthickness=1,
+                                         highlightbackground="#bdc3c7")
+        self.timeline_canvas.pack(fill="x", pady=(0, 10))
+        
+        # 警告列表
+        warn_frame = ttk.LabelFrame(content, text="警告", padding=5)
+        warn_frame.pack(fill="both", expand=True)
+        
+        self.warning_tree = ttk.Treeview(warn_frame, columns=("phase", "line"), height=8)
+        self.warning_tree.heading("#0", text="内容")
+        self.warning_tree.heading("phase", text="阶段")
+        self.warning_tree.heading("line", text="行号")
+        self.warning_tree.column("#0", width=480)
+        self.warning_tree.column("phase", width=80)
+        self.warning_tree.column("line", width=60, anchor="e")
+        
+        warn_scrollbar = ttk.Scrollbar(warn_frame, command=self.warning_tree.yview)
+        self.warning_tree.configure(yscrollcommand=warn_scrollbar.set)
+        
+        self.warning_tree.pack(side="left", fill="both", expand=True)
+        warn_scrollbar.pack(side="right", fill="y")
+        
+        self.shown_warning_count = -1
+    
+    def refresh_timeline(self):
+        """根据正在运行的任务刷新时间线"""
+        job = self.job
+        if job is not None:
+            self.show_timeline(job.timeline.snapshot())
+    
+    def show_timeline(self, timeline):
+        """绘制阶段耗时条形图并更新警告列表"""
+        canvas = self.timeline_canvas
+        canvas.delete("all")
+        phases = timeline['phases']
+        total = max(timeline['total'], 0.001)
+        
+        width = max(canvas.winfo_width(), 400)
+        label_width, right_margin, row_height = 110, 90, 22
+        bar_width = width - label_width - right_margin
+        canvas.configure(height=max(60, len(phases) * row_height + 30))
+        
+        colors = {True: "#95a5a6", False: "#e67e22", None: "#3498db"}
+        for i, phase in enumerate(phases):
+            y = 10 + i * row_height
+            x0 = label_width + phase['start'] / total * bar_width
+            x1 = max(x0 + 2, label_width + phase['end'] / total * bar_width)
+            canvas.create_text(label_width - 8, y + 8, text=phase['name'], anchor="e",
+                               font=("微软雅黑", 9))
+            canvas.create_rectangle(x0, y, x1, y + 16, fill=colors[phase['reused']], outline="")
+            duration = phase['end'] - phase['start']
+            note = "（复用）" if phase['reused'] else ""
+            canvas.create_text(x1 + 5, y + 8, text=f"{duration:.1f}s{note}", anchor="w",
+                               font=("Consolas", 9))
+        
+        self.timeline_summary.config(
+            text=f"总耗时 {timeline['total']:.1f} 秒，{len(phases)} 个阶段，"
+                 f"警告 {timeline['warning_count']} 条（灰色为复用，橙色为重新计算）")
+        
+        # 警告数量变化时才重建列表
+        if timeline['warning_count'] != self.shown_warning_count:
+            self.shown_warning_count = timeline['warning_count']
+            self.warning_tree.delete(*self.warning_tree.get_children())
+            for category, items in timeline['warnings'].items():
+                parent = self.warning_tree.insert(
+                    "", tk.END, text=f"{BuildTimeline.WARNING_NAMES[category]} ({len(items)})", open=False)
+                for item in items:
+                    self.warning_tree.insert(parent, tk.END, text=item['text'],
+                                             values=(item['phase'], item['line']))
+    
+    def setup_size_tab(self, parent):
+        content = tk.Frame(parent)
+        content.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        # 控制按钮
+        control_frame = tk.Frame(content)
+        control_frame.pack(fill="x", pady=(0, 10))
+        
+        ttk.Button(control_frame, text="📦 分析产物", 
+                  command=self.analyze_artifact).pack(side="left", padx=(0, 10))
+        ttk.Button(control_frame, text="导出JSON", 
+                  command=self.export_size_report).pack(side="left", padx=(0, 10))
+        
+        self.size_summary = tk.Label(control_frame, text="读取程序内嵌的归档目录，不解压内容；点击列标题排序",
+                                     font=("微软雅黑", 9), fg="gray", anchor="w")
+        self.size_summary.pack(side="left", fill="x", expand=True)
+        
+        # 体积构成树：类别 -> 包 -> 文件
+        tree_frame = tk.Frame(content)
+        tree_frame.pack(fill="both", expand=True)
+        
+        columns = ("size", "uncompressed", "percent", "count")
+        self.size_tree = ttk.Treeview(tree_frame, columns=columns, height=16)
+        headings = {"#0": "名称", "size": "大小(KB)", "uncompressed": "解压后(KB)",
+                    "percent": "占比", "count": "文件数"}
+        for column, text in headings.items():
+            self.size_tree.heading(column, text=text,
+                                   command=lambda c=column: self.sort_size_tree(c))
+        self.size_tree.column("#0", width=280)
+        self.size_tree.column("size", width=90, anchor="e")
+        self.size_tree.column("uncompressed", width=90, anchor="e")
+        self.size_tree.column("percent", width=60, anchor="e")
+        self.size_tree.column("count", width=60, anchor="e")
+        
+        tree_scrollbar = ttk.Scrollbar(tree_frame, command=self.size_tree.yview)
+        self.size_tree.configure(yscrollcommand=tree_scrollbar.set)
+        
+        self.size_tree.pack(side="left", fill="both", expand=True)
+        tree_scrollbar.pack(side="right", fill="y")
+        
+        self.size_report = None
+        self.size_sort = ("size", True)
+    
+    def analyze_artifact(self):
+        """分析当前设置对应的打包产物"""
+        options = self.get_pack_options()
+        if not options['app_name'] and options['py_file']:
+            options['app_name'] = os.path.splitext(os.path.basename(options['py_file']))[0]
+        path = get_artifact_path(options) if options['app_name'] and options['output_dir'] else ''
+        if not os.path.exists(path):
+            path = filedialog.askopenfilename(
+                title="选择打包生成的程序",
+                filetypes=[("可执行文件", f"*{EXE_SUFFIX}" if EXE_SUFFIX else "*"), ("所有文件", "*.*")]
+            )
+            if not path:
+                return
+        
+        def analyze():
+            try:
+                report = analyze_bundle(path)
+                self.root.after(0, lambda: self.show_size_report(report))
+            except Exception as e:
+                self.log(f"❌ 体积分析失败: {e}")
+        
+        threading.Thread(target=analyze, daemon=True).start()
+    
+    def show_size_report(self, report):
+        """在体积分析标签页中显示体积构成树"""
+        self.size_report = report
+        self.size_tree.delete(*self.size_tree.get_children())
+        total = max(report['total_size'], 1)
+        
+        def values(item):
+            return (f"{item['size'] / 1024:,.1f}", f"{item['uncompressed'] / 1024:,.1f}",
+                    f"{item['size'] / total:.1%}", item.get('count', 1))
+        
+        entries = {}
+        for entry in report['entries']:
+            entries.setdefault((entry['category'], entry['package']), []).append(entry)
+        
+        for category in report['categories']:
+            category_item = self.size_tree.insert("", tk.END, text=category['name'],
+                                                  values=values(category))
+            for package in category['packages']:
+                package_item = self.size_tree.insert(category_item, tk.END, text=package['name'],
+                                                     values=values(package))
+                for entry in entries[(category['category'], package['name'])]:
+                    self.size_tree.insert(package_item, tk.END, text=entry['name'],
+                                          values=values(entry))
+        
+        column, reverse = self.size_sort
+        if (column, reverse) != ("size", True):
+            self.size_sort = (column, not reverse)
+            self.sort_size_tree(column)
+        
+        self.size_summary.config(
+            text=f"{os.path.basename(report['path'])}: {report['total_size'] / (1024*1024):.2f} MB，"
+                 f"解压后 {report['total_uncompressed'] / (1024*1024):.2f} MB，"
+                 f"{len(report['entries'])} 个文件")
+    
+    def sort_size_tree(self, column):
+        """按列排序体积构成树（每一层分别排序），再次点击反向"""
+        last_column, last_reverse = self.size_sort
+        reverse = not last_reverse if column == last_column else column != "#0"
+        self.size_sort = (column, reverse)
+        tree = self.size_tree
+        
+        def key(item):
+            if column == "#0":
+                return tree.item(item, "text").lower()
+            return float(str(tree.set(item, column)).replace(',', '').rstrip('%') or 0)
+        
+        def sort_children(parent):
+            for index, item in enumerate(sorted(tree.get_children(parent), key=key, reverse=reverse)):
+                tree.move(item, parent, index)
+                sort_children(item)
+        
+        sort_children("")
+    
+    def export_size_report(self):
+        """把体积分析结果导出为JSON"""
+        if not self.size_report:
+            messagebox.showinfo("提示", "请先分析打包产物")
+            return
+        name = os.path.splitext(os.path.basename(self.size_report['path']))[0]
+        file_path = filedialog.asksaveasfilename(
+            title="导出体积分析",
+            initialfile=f"{name}_contents.json",
+            defaultextension=".json",
+            filetypes=[("JSON文件", "*.json"), ("所有文件", "*.*")]
+        )
+        if file_path:
+            try:
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.size_report, f, ensure_ascii=False, indent=2)
+                self.log(f"💾 体积分析已导出到: {file_path}")
+            except Exception as e:
+                messagebox.showerror("错误", f"导出体积分析失败: {e}")
+    
+    def setup_queue_tab(self, parent):
+        content = tk.Frame(parent)
+        content.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        # 控制按钮
+        control_frame = tk.Frame(content)
+        control_frame.pack(fill="x", pady=(0, 5))
+        
+        queue_buttons = [
+            ("➕ 加入队列", self.enqueue_current),
+            ("⏫ 优先", self.prioritize_queued_job),
+            ("⬆ 上移", lambda: self.move_queued_job(-1)),
+            ("⬇ 下移", lambda: self.move_queued_job(1)),
+            ("✖ 移除/取消", self.remove_queued_job),
+            ("🧹 清除已完成", self.clear_finished_jobs),
+        ]
+        for text, command in queue_buttons:
+            ttk.Button(control_frame, text=text, command=command).pack(side="left", padx=(0, 5))
+        
+        self.queue_pause_button = ttk.Button(control_frame, command=self.toggle_queue_paused)
+        self.queue_pause_button.pack(side="right")
+        
+        self.queue_summary = tk.Label(content, text="", font=("微软雅黑", 9), fg="gray", anchor="w")
+        self.queue_summary.pack(fill="x", pady=(0, 5))
+        
+        # 任务列表
+        tree_frame = tk.Frame(content)
+        tree_frame.pack(fill="both", expand=True)
+        
+        columns = ("status", "progress", "eta", "mode", "added")
+        self.queue_tree = ttk.Treeview(tree_frame, columns=columns, height=14, selectmode="browse")
+        self.queue_tree.heading("#0", text="程序")
+        self.queue_tree.heading("status", text="状态")
+        self.queue_tree.heading("progress", text="进度")
+        self.queue_tree.heading("eta", text="预计剩余")
+        self.queue_tree.heading("mode", text="模式")
+        self.queue_tree.heading("added", text="加入时间")
+        self.queue_tree.column("#0", width=200)
+        self.queue_tree.column("status", width=70)
+        self.queue_tree.column("progress", width=60, anchor="e")
+        self.queue_tree.column("eta", width=100, anchor="e")
+        self.queue_tree.column("mode", width=60)
+        self.queue_tree.column("added", width=120)
+        
+        tree_scrollbar = ttk.Scrollbar(tree_frame, command=self.queue_tree.yview)
+        self.queue_tree.configure(yscrollcommand=tree_scrollbar.set)
+        
+        self.queue_tree.pack(side="left", fill="both", expand=True)
+        tree_scrollbar.pack(side="right", fill="y")
+        
+        tk.Label(content, text="同时运行的任务数受CPU核数和可用内存限制；进度和剩余时间按同一项目的历史打包耗时估算", 
+                font=("微软雅黑", 8), fg="gray").pack(anchor="w", pady=(5, 0))
+    
+    def selected_queue_job(self):
+        selection = self.queue_tree.selection()
+        return selection[0] if selection else None
+    
+    def enqueue_current(self):
+        """把当前界面上的设置加入队列"""
+        py_file = self.py_file_path.get()
+        if not py_file or not os.path.exists(py_file):
+            messagebox.showerror("错误", "请先选择有效的Python文件！")
+            return
+        self.save_config()
+        job = self.job_queue.add(self.get_pack_options())
+        self.log(f"📋 已加入队列: {job['name']}")
+        self.schedule_jobs()
+    
+    def prioritize_queued_job(self):
+        job_id = self.selected_queue_job()
+        if job_id and self.job_queue.prioritize(job_id):
+            self.refresh_queue()
+    
+    def move_queued_job(self, offset):
+        job_id = self.selected_queue_job()
+        if job_id and self.job_queue.move(job_id, offset):
+            self.refresh_queue()
+    
+    def remove_queued_job(self):
+        """移除选中的任务；正在运行的任务则取消"""
+        job_id = self.selected_queue_job()
+        if not job_id:
+            return
+        job = self.running_jobs.get(job_id)
+        if job:
+            if messagebox.askyesno("确认", "该任务正在运行，确定要取消吗？"):
+                job.cancel()
+                self.log("正在终止打包进程...")
+        elif self.job_queue.remove(job_id):
+            self.refresh_queue()
+    
+    def clear_finished_jobs(self):
+        self.job_queue.clear_finished()
+        self.refresh_queue()
+    
+    def toggle_queue_paused(self):
+        self.queue_paused = not self.queue_paused
+        self.schedule_jobs()
+    
+    def tick_queue(self):
+        """定时调度排队任务（内存释放后可以启动更多任务）并刷新进度"""
+        try:
+            self.schedule_jobs()
+        finally:
+            self.root.after(QUEUE_POLL_MS, self.tick_queue)
+    
+    def schedule_jobs(self):
+        """按并发上限启动排队的任务（在主线程中调用）"""
+        if not self.queue_paused and not self.closing:
+            memory_limit = int(self.settings['memory_limit'] or 0)
+            for entry in self.job_queue.start_next(self.job_queue.slots(memory_limit)):
+                if not self.packing:
+                    self.begin_packing_session(entry['name'])
+                self.start_queued_job(entry)
+        self.refresh_queue()
+    
+    def refresh_queue(self):
+        """刷新任务列表的状态、进度和预计剩余时间"""
+        counts = self.job_queue.counts()
+        memory_limit = int(self.settings['memory_limit'] or 0)
+        max_running = counts['running'] + (self.job_queue.slots(memory_limit) if not self.queue_paused else 0)
+        estimates = self.job_queue.schedule(max_running)
+        
+        tree = self.queue_tree
+        ids = []
+        for job in list(self.job_queue.jobs):
+            status = job['status']
+            if status in ('queued', 'running'):
+                progress, remaining = estimates.get(job['id'], (None, None))
+                progress_text = f"{progress:.0%}" if progress is not None else "-"
+                eta_text = format_duration(remaining) if remaining is not None else "-"
+            else:
+                progress_text = "100%" if status == 'done' else "-"
+                eta_text = f"用时 {format_duration(job['seconds'])}" if job['seconds'] else ""
+            values = (JobQueue.STATUS_NAMES[status], progress_text, eta_text,
+                      BUILD_MODE_NAMES[get_build_mode(dict(DEFAULT_OPTIONS, **job['options']))],
+                      datetime.fromtimestamp(job['added']).strftime('%m-%d %H:%M:%S'))
+            if tree.exists(job['id']):
+                tree.item(job['id'], text=job['name'], values=values)
+            else:
+                tree.insert("", tk.END, iid=job['id'], text=job['name'], values=values)
+            ids.append(job['id'])
+        
+        for item in tree.get_children():
+            if item not in ids:
+                tree.delete(item)
+        for index, job_id in enumerate(ids):
+            tree.move(job_id, "", index)
+        
+        available = get_available_memory_mb()
+        memory_text = f"，可用内存 {available:,.0f} MB" if available is not None else ""
+        self.queue_summary.config(
+            text=f"运行 {counts['running']} 个，排队 {counts['queued']} 个；"
+                 f"CPU {os.cpu_count() or 1} 核{memory_text}"
+                 f"{'；队列已暂停' if self.queue_paused else ''}")
+        self.queue_pause_button.config(text="▶ 继续队列" if self.queue_paused else "⏸ 暂停队列")
+    
+    def setup_history_tab(self, parent):
+        content = tk.Frame(parent)
+        content.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        # 项目选择和显示范围
+        control_frame = tk.Frame(content)
+        control_frame.pack(fill="x", pady=(0, 5))
+        
+        ttk.Label(control_frame, text="项目:").pack(side="left")
+        self.history_project = tk.StringVar()
+        self.history_combo = ttk.Combobox(control_frame, textvariable=self.history_project,
+                                          state="readonly", width=40)
+        self.history_combo.pack(side="left", padx=5)
+        self.history_combo.bind("<<ComboboxSelected>>", lambda e: self.show_history())
+        
+        ttk.Label(control_frame, text="最近").pack(side="left", padx=(10, 0))
+        self.history_limit = tk.IntVar(value=self.last_config.get('history_limit', HISTORY_DEFAULT_LIMIT))
+        ttk.Spinbox(control_frame, from_=5, to=500, increment=5, textvariable=self.history_limit,
+                   width=5, command=self.show_history).pack(side="left", padx=5)
+        ttk.Label(control_frame, text="次").pack(side="left")
+        
+        ttk.Button(control_frame, text="🗑️ 清除该项目", command=self.clear_history).pack(side="right")
+        ttk.Button(control_frame, text="🔄 刷新", command=self.refresh_history).pack(side="right", padx=5)
+        
+        self.history_summary = tk.Label(content, text="每次打包后自动记录",
+                                        font=("微软雅黑", 9), fg="gray", anchor="w")
+        self.history_summary.pack(fill="x", pady=(0, 5))
+        
+        # 构建时间和产物大小趋势图
+        self.history_canvas = tk.Canvas(content, height=180, bg="white", highlightthickness=1,
+                                        highlightbackground="#bdc3c7")
+        self.history_canvas.pack(fill="x", pady=(0, 10))
+        
+        # 构建列表
+        tree_frame = tk.Frame(content)
+        tree_frame.pack(fill="both", expand=True)
+        
+        columns = ("seconds", "size", "warnings", "returncode", "phases", "note")
+        self.history_tree = ttk.Treeview(tree_frame, columns=columns, height=8)
+        self.history_tree.heading("#0", text="时间")
+        self.history_tree.heading("seconds", text="耗时(秒)")
+        self.history_tree.heading("size", text="大小(MB)")
+        self.history_tree.heading("warnings", text="警告")
+        self.history_tree.heading("returncode", text="返回码")
+        self.history_tree.heading("phases", text="主要阶段")
+        self.history_tree.heading("note", text="备注")
+        self.history_tree.column("#0", width=130)
+        self.history_tree.column("seconds", width=70, anchor="e")
+        self.history_tree.column("size", width=70, anchor="e")
+        self.history_tree.column("warnings", width=50, anchor="e")
+        self.history_tree.column("returncode", width=55, anchor="e")
+        self.history_tree.column("phases", width=220)
+        self.history_tree.column("note", width=160)
+        self.history_tree.tag_configure("regression", foreground="#c0392b")
+        self.history_tree.tag_configure("reused", foreground="gray")
+        
+        tree_scrollbar = ttk.Scrollbar(tree_frame, command=self.history_tree.yview)
+        self.history_tree.configure(yscrollcommand=tree_scrollbar.set)
+        
+        self.history_tree.pack(side="left", fill="both", expand=True)
+        tree_scrollbar.pack(side="right", fill="y")
+        
+        self.history_projects = []
+        self.refresh_history()
+    
+    def refresh_history(self):
+        """重新读取项目列表，并显示当前选中项目的历史"""
+        try:
+            self.history_projects = BuildHistory().projects()
+        except (sqlite3.Error, OSError) as e:
+            self.history_summary.config(text=f"读取构建历史失败: {e}")
+            return
+        
+        labels = []
+        for project in self.history_projects:
+            mode = BUILD_MODE_NAMES.get(project['project'].rpartition('|')[2], '')
+            labels.append(f"{project['app_name']}（{mode}，{project['count']} 次）")
+        self.history_combo.config(values=labels)
+        
+        current = self.history_project.get()
+        if current not in labels:
+            # 默认选择当前界面上的项目，其次是最近构建的项目
+            try:
+                key = JobQueue.project_key(self.get_pack_options())
+            except (KeyError, TypeError):
+                key = None
+            index = next((i for i, p in enumerate(self.history_projects) if p['project'] == key), 0)
+            self.history_project.set(labels[index] if labels else "")
+        self.show_history()
+    
+    def selected_history_project(self):
+        labels = list(self.history_combo.cget("values") or ())
+        current = self.history_project.get()
+        if current in labels and labels.index(current) < len(self.history_projects):
+            return self.history_projects[labels.index(current)]['project']
+        return None
+    
+    def show_history(self):
+        """显示选中项目最近N次构建的趋势和列表，超过阈值的退化标红"""
+        self.history_tree.delete(*self.history_tree.get_children())
+        self.history_canvas.delete("all")
+        project = self.selected_history_project()
+        if not project:
+            self.history_summary.config(text="还没有构建记录")
+            return
+        try:
+            limit = max(int(self.history_limit.get()), 1)
+        except (tk.TclError, ValueError):
+            limit = HISTORY_DEFAULT_LIMIT
+        
+        threshold = self.settings['regression_percent']
+        builds = BuildHistory.find_regressions(BuildHistory().recent(project, limit), threshold)
+        comparable = [b for b in builds if BuildHistory.is_comparable(b)]
+        regressions = sum(1 for b in builds if b['regressions'])
+        
+        for build in reversed(builds):
+            top_phases = sorted(build['phases'], key=lambda p: p[1], reverse=True)[:3]
+            notes = [f"{name} +{change:.0f}%" for name, change in build['regressions']]
+            if build['reused']:
+                notes.append("复用缓存")
+            tags = ("regression",) if build['regressions'] else ("reused",) if build['reused'] else ()
+            self.history_tree.insert(
+                "", tk.END, text=datetime.fromtimestamp(build['started']).strftime("%Y-%m-%d %H:%M"),
+                values=(f"{build['seconds']:.1f}",
+                        f"{build['exe_size']:.2f}" if build['exe_size'] is not None else "-",
+                        build['warnings'], build['returncode'],
+                        ", ".join(f"{name} {seconds:.1f}s" for name, seconds in top_phases),
+                        "; ".join(notes)),
+                tags=tags)
+        
+        summary = f"最近 {len(builds)} 次构建，成功打包 {len(comparable)} 次"
+        if comparable:
+            summary += (f"，耗时中位数 {statistics.median(b['seconds'] for b in comparable):.1f} 秒，"
+                        f"大小中位数 {statistics.median(b['exe_size'] for b in comparable):.2f} MB")
+        summary += f"；{regressions} 次超过退化阈值 {threshold}%" if regressions else ""
+        self.history_summary.config(text=summary)
+        self.draw_history_trend(comparable)
+    
+    def draw_history_trend(self, builds):
+        """上下两条折线：构建时间和产物大小，退化的点标红"""
+        canvas = self.history_canvas
+        if len(builds) < 2:
+            canvas.create_text(10, 10, anchor="nw", fill="gray", font=("微软雅黑", 9),
+                               text="至少需要两次成功的打包才能显示趋势")
+            return
+        
+        width = max(canvas.winfo_width(), 400)
+        left, right, row_height = 90, 20, 80
+        step = (width - left - right) / (len(builds) - 1)
+        for row, (key, unit) in enumerate((('seconds', '秒'), ('exe_size', 'MB'))):
+            name = BuildHistory.METRICS[key]
+            values = [b[key] for b in builds]
+            low, high = min(values), max(values)
+            span = (high - low) or max(high, 1)
+            top = 10 + row * row_height
+            canvas.create_text(left - 8, top + 20, anchor="e", text=name, font=("微软雅黑", 9))
+            canvas.create_text(left - 8, top + 38, anchor="e", fill="gray", font=("Consolas", 8),
+                               text=f"{low:.1f}-{high:.1f}{unit}")
+            points = []
+            for i, value in enumerate(values):
+                points.append((left + i * step, top + 60 - (value - low) / span * 55))
+            canvas.create_line(*[c for point in points for c in point], fill="#3498db", width=2)
+            for build, (x, y) in zip(builds, points):
+                regressed = any(n == name for n, _ in build['regressions'])
+                color = "#c0392b" if regressed else "#3498db"
+                canvas.create_oval(x - 3, y - 3, x + 3, y + 3, fill=color, outline=color)
+    
+    def clear_history(self):
+        """删除选中项目的构建历史"""
+        project = self.selected_history_project()
+        if project and messagebox.askyesno("确认", "确定要删除该项目的所有构建记录吗？"):
+            try:
+                BuildHistory().clear(project)
+            except (sqlite3.Error, OSError) as e:
+                messagebox.showerror("错误", f"删除构建历史失败: {e}")
+            self.history_project.set("")
+            self.refresh_history()
+    
     def setup_log_tab(self, parent):
         content = tk.Frame(parent)
         content.pack(fill="both", expand=True, padx=10, pady=10)
@@ -398,16 +1254,73 @@ class UniversalPyToExe:
         log_scrollbar.pack(side="right", fill="y")
     
     def check_output_queue(self):
-        """检查输出队列并更新界面"""
+        """检查输出队列，把积累的日志合并成一次界面更新"""
+        lines = []
         try:
-            while True:
-                message = self.output_queue.get_nowait()
-                self.log(message)
+            while len(lines) < LOG_DRAIN_PER_TICK:
+                lines.append(self.output_queue.get_nowait())
         except queue.Empty:
             pass
+        
+        try:
+            if lines:
+                self.append_log(lines)
+                if self.packing:
+                    self.refresh_timeline()
         finally:
             # 每100ms检查一次队列
-            self.root.after(100, self.check_output_queue)
+            self.root.after(LOG_POLL_MS, self.check_output_queue)
+    
+    def append_log(self, lines):
+        """把多行日志写入日志文件，并一次性插入界面（界面只保留最近LOG_MAX_LINES行）"""
+        self.write_log_file(lines)
+        
+        shown = lines[-LOG_MAX_LINES:]
+        if len(shown) < len(lines):
+            shown.insert(0, f"... 省略 {len(lines) - len(shown)} 行，完整日志: {self.log_file_path}")
+        self.log_text.insert(tk.END, "\n".join(shown) + "\n")
+        
+        # 超出上限时删除最早的行
+        line_count = int(self.log_text.index("end-1c").split(".")[0]) - 1
+        if line_count > LOG_MAX_LINES:
+            self.log_text.delete(1.0, f"{line_count - LOG_MAX_LINES + 1}.0")
+        
+        self.log_text.see(tk.END)
+        self.status_label.config(text=LOG_TIMESTAMP_RE.sub('', lines[-1]).strip()[:50])
+    
+    def open_log_file(self, name):
+        """为本次打包新建完整日志文件，只保留最近的若干个"""
+        self.close_log_file()
+        try:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.log_file_path = os.path.join(LOG_DIR, f"{name}_{stamp}.log")
+            self.log_file = open(self.log_file_path, 'w', encoding='utf-8')
+            
+            log_files = sorted((os.path.join(LOG_DIR, f) for f in os.listdir(LOG_DIR) if f.endswith('.log')),
+                               key=os.path.getmtime)
+            for old_file in log_files[:-LOG_KEEP_FILES]:
+                os.remove(old_file)
+        except OSError:
+            self.log_file = None
+            self.log_file_path = None
+    
+    def write_log_file(self, lines):
+        """追加写入完整日志文件"""
+        if self.log_file:
+            try:
+                self.log_file.write("\n".join(lines) + "\n")
+                self.log_file.flush()
+            except (OSError, ValueError):
+                self.log_file = None
+    
+    def close_log_file(self):
+        if self.log_file:
+            try:
+                self.log_file.close()
+            except OSError:
+                pass
+            self.log_file = None
     
     def browse_py_file(self):
         """选择Python文件"""
@@ -416,10 +1329,14 @@ class UniversalPyToExe:
             filetypes=[("Python文件", "*.py"), ("所有文件", "*.*")]
         )
         if file_path:
+            self.save_project_budget()
             self.py_file_path.set(file_path)
             # 自动设置程序名称
             name = os.path.splitext(os.path.basename(file_path))[0]
             self.app_name.set(name)
+            # 切换到该程序自己的预算
+            for key, value in self.project_budget(file_path).items():
+                getattr(self, key).set(value)
             self.log(f"📄 已选择文件: {file_path}")
     
     def browse_output_dir(self):
@@ -442,7 +1359,7 @@ class UniversalPyToExe:
             self.log(f"🖼️ 图标文件: {file_path}")
     
     def detect_dependencies(self):
-        """检测Python文件的依赖"""
+        """检测Python文件的依赖（递归扫描本地模块，在后台线程中进行）"""
         py_file = self.py_file_path.get()
         if not py_file or not os.path.exists(py_file):
             messagebox.showerror("错误", "请先选择Python文件！")
@@ -450,41 +1367,201 @@ class UniversalPyToExe:
         
         self.log("🔍 开始检测依赖...")
         
-        try:
-            with open(py_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            imports = []
-            lines = content.split('\n')
-            for line in lines:
-                line = line.strip()
-                if line.startswith('import ') or line.startswith('from '):
-                    imports.append(line)
-            
-            self.deps_text.delete(1.0, tk.END)
-            if imports:
-                self.deps_text.insert(tk.END, f"共检测到 {len(imports)} 个导入:\n")
-                self.deps_text.insert(tk.END, "="*50 + "\n")
-                for imp in imports[:30]:
-                    self.deps_text.insert(tk.END, imp + '\n')
-                if len(imports) > 30:
-                    self.deps_text.insert(tk.END, f"...还有{len(imports)-30}个\n")
-                self.deps_text.insert(tk.END, "="*50)
-            else:
-                self.deps_text.insert(tk.END, "未检测到import语句")
-            
-            self.log(f"✅ 检测完成，找到{len(imports)}个导入语句")
-            
-        except Exception as e:
-            self.log(f"❌ 检测依赖时出错: {e}")
-            messagebox.showerror("错误", f"检测依赖时出错: {e}")
+        def scan():
+            try:
+                start_time = time.time()
+                graph = scan_imports(py_file)
+                elapsed = time.time() - start_time
+                self.root.after(0, lambda: self.show_dependencies(graph, elapsed))
+            except Exception as e:
+                self.log(f"❌ 检测依赖时出错: {e}")
+                self.root.after(0, lambda: messagebox.showerror("错误", f"检测依赖时出错: {e}"))
+        
+        threading.Thread(target=scan, daemon=True).start()
+    
+    def show_dependencies(self, graph, elapsed):
+        """在依赖文本框中显示扫描结果"""
+        self.import_graph = graph
+        self.deps_text.delete(1.0, tk.END)
+        
+        total = len(graph.local) + len(graph.stdlib) + len(graph.third_party)
+        self.deps_text.insert(tk.END, f"共检测到 {total} 个模块"
+                              f"（本地 {len(graph.local)}，标准库 {len(graph.stdlib)}，"
+                              f"第三方 {len(graph.third_party)}）\n")
+        self.deps_text.insert(tk.END, "="*50 + "\n")
+        
+        self.deps_text.insert(tk.END, f"[本地模块] {len(graph.local)}\n")
+        for name in sorted(graph.local):
+            path = os.path.relpath(graph.local[name], graph.base_dir)
+            imported = sorted(m for m in graph.edges.get(name, ()) if m in graph.local)
+            line = f"  {name} ({path})"
+            if imported:
+                line += f" -> {', '.join(imported)}"
+            self.deps_text.insert(tk.END, line + "\n")
+        
+        for title, modules in (("第三方库", graph.third_party), ("标准库", graph.stdlib)):
+            groups = graph.top_level(modules)
+            self.deps_text.insert(tk.END, f"[{title}] {len(groups)}\n")
+            for top, names in groups.items():
+                subs = [n for n in names if n != top]
+                flags = ""
+                if top in graph.optional or all(n in graph.optional for n in names):
+                    flags = " (可选)"
+                line = f"  {top}{flags}"
+                if subs:
+                    line += f": {', '.join(subs)}"
+                self.deps_text.insert(tk.END, line + "\n")
+        
+        for path, error in graph.errors.items():
+            self.deps_text.insert(tk.END, f"⚠️ 解析失败 {path}: {error}\n")
+        self.deps_text.insert(tk.END, "="*50)
+        
+        self.log(f"✅ 检测完成，找到{total}个模块，耗时 {elapsed:.2f} 秒")
+    
+    def predict_size(self):
+        """不打包，根据扫描到的导入和已安装发行包的RECORD估算产物体积（在后台线程中进行）"""
+        py_file = self.py_file_path.get()
+        if not py_file or not os.path.exists(py_file):
+            messagebox.showerror("错误", "请先选择Python文件！")
+            return
+        
+        options = self.get_pack_options()
+        self.log("📏 开始预测打包体积...")
+        
+        def estimate():
+            try:
+                graph = scan_imports(py_file)
+                report = SizeEstimator(find_pyinstaller_python()).estimate(graph, options['hidden_imports'])
+                try:
+                    previous = [b for b in BuildHistory().recent(JobQueue.project_key(options), 10)
+                                if BuildHistory.is_comparable(b)]
+                except (sqlite3.Error, OSError):
+                    previous = []
+                report['previous'] = previous[-1]['exe_size'] if previous else None
+                self.root.after(0, lambda: self.show_size_estimate(report, options))
+            except Exception as e:
+                self.log(f"❌ 预测体积时出错: {e}")
+        
+        threading.Thread(target=estimate, daemon=True).start()
+    
+    def show_size_estimate(self, report, options):
+        """在依赖文本框中列出体积预测和占用最多的发行包"""
+        mb = 1024 * 1024
+        single_file = options['single_file']
+        estimate = report['onefile'] if single_file else report['total']
+        
+        self.deps_text.delete(1.0, tk.END)
+        self.deps_text.insert(tk.END, f"预计大小: {estimate / mb:.1f} MB"
+                              f"（{'单文件，按压缩后估算' if single_file else '目录模式，未压缩'}）\n")
+        runtime_note = "实测" if report['calibrated'] else "按Python共享库和标准库扩展估算"
+        self.deps_text.insert(tk.END, f"  Python运行时: {report['runtime'] / mb:.1f} MB（{runtime_note}）\n")
+        self.deps_text.insert(tk.END, f"  第三方包: {len(report['dists'])} 个，"
+                              f"{(report['total'] - report['runtime']) / mb:.1f} MB（未压缩）\n")
+        if report['previous'] is not None:
+            self.deps_text.insert(tk.END, f"  上次实际打包: {report['previous']:.1f} MB\n")
+        self.deps_text.insert(tk.END, "="*50 + "\n")
+        
+        for dist in report['dists']:
+            source = "实测" if dist['source'] == 'measured' else "RECORD"
+            native = f"，原生库 {dist['native'] / mb:.1f} MB" if dist['native'] else ""
+            self.deps_text.insert(tk.END, f"  {dist['size'] / mb:>7.2f} MB  {dist['name']} {dist['version']}"
+                                  f"（{source}{native}）<- {dist['via']}\n")
+        if report['missing']:
+            self.deps_text.insert(tk.END, f"⚠️ 未找到对应的已安装发行包: {', '.join(report['missing'])}\n")
+        
+        top = ', '.join(f"{d['name']} {d['size'] / mb:.1f} MB" for d in report['dists'][:5])
+        self.log(f"📏 预计大小约 {estimate / mb:.1f} MB，用时 {report['seconds']:.2f} 秒"
+                 f"{'，占用最多: ' + top if top else ''}")
+    
+    def profile_startup(self):
+        """在子进程中用 -X importtime 分析程序的导入耗时"""
+        py_file = self.py_file_path.get()
+        if not py_file or not os.path.exists(py_file):
+            messagebox.showerror("错误", "请先选择Python文件！")
+            return
+        
+        python = self.get_python()
+        self.log("⏱️ 开始分析导入耗时...")
+        
+        def profile():
+            try:
+                graph = scan_imports(py_file)
+                roots, total_us = profile_import_time(graph, python)
+                annotate_import_advice(roots, graph, total_us)
+                self.root.after(0, lambda: self.show_startup_profile(roots, total_us))
+            except Exception as e:
+                self.log(f"❌ 分析导入耗时失败: {e}")
+        
+        threading.Thread(target=profile, daemon=True).start()
+    
+    def show_startup_profile(self, roots, total_us):
+        """在启动分析标签页中显示导入耗时树"""
+        self.startup_tree.delete(*self.startup_tree.get_children())
+        
+        def insert(parent, node):
+            item = self.startup_tree.insert(
+                parent, tk.END, text=node['name'],
+                values=(f"{node['cumulative_us'] / 1000:.1f}",
+                        f"{node['self_us'] / 1000:.1f}",
+                        node.get('advice', '')))
+            for child in node['children']:
+                insert(item, child)
+        
+        for node in roots:
+            insert("", node)
+        
+        advised = sum(1 for node in iter_import_nodes(roots) if node.get('advice'))
+        self.startup_summary.config(
+            text=f"导入总耗时 {total_us / 1000:.0f} ms，{advised} 个模块可以优化")
+        self.log(f"✅ 导入耗时分析完成，总耗时 {total_us / 1000:.0f} ms")
     
     def add_hidden_import(self):
-        """添加隐藏导入"""
-        hidden = self.hidden_imports.get().strip()
+        """添加隐藏导入（整理输入框中的模块列表）"""
+        hidden = merge_hidden_imports(self.hidden_imports.get(), [])
         if hidden:
             self.log(f"➕ 添加隐藏导入: {hidden}")
-            self.hidden_imports.set("")
+            self.hidden_imports.set(hidden)
+    
+    def get_python(self):
+        """运行目标程序使用的Python解释器"""
+        return self.settings['python_path'] or sys.executable
+    
+    def trace_hidden_imports(self):
+        """试运行程序，把动态导入的模块加入隐藏导入"""
+        py_file = self.py_file_path.get()
+        if not py_file or not os.path.exists(py_file):
+            messagebox.showerror("错误", "请先选择Python文件！")
+            return
+        
+        python = self.get_python()
+        memory_limit = int(self.settings['memory_limit'] or 0) or TRACE_MEMORY_LIMIT_MB
+        self.log(f"🔬 开始追踪运行（最多 {TRACE_TIMEOUT} 秒）: {os.path.basename(py_file)}")
+        
+        def trace():
+            try:
+                records, reason = trace_imports(py_file, python, memory_limit_mb=memory_limit)
+                graph = scan_imports(py_file)
+                candidates = find_hidden_import_candidates(records, graph)
+                self.log(f"🔬 追踪结束（{reason}），共加载 {len(records)} 个模块，"
+                         f"其中动态导入 {sum(1 for r in records if r['dynamic'])} 个")
+                self.root.after(0, lambda: self.apply_traced_imports(candidates))
+            except Exception as e:
+                self.log(f"❌ 追踪运行失败: {e}")
+        
+        threading.Thread(target=trace, daemon=True).start()
+    
+    def apply_traced_imports(self, candidates):
+        """把追踪得到的模块合并到隐藏导入列表"""
+        current = self.hidden_imports.get()
+        merged = merge_hidden_imports(current, candidates)
+        # 与规范化后的原列表比较，原列表中带空格的模块名不算新增
+        existing = merge_hidden_imports(current, []).split(',')
+        added = [m for m in merged.split(',') if m and m not in existing]
+        self.hidden_imports.set(merged)
+        if added:
+            self.log(f"➕ 新增隐藏导入 {len(added)} 个: {', '.join(added)}")
+        else:
+            self.log("✅ 没有发现静态分析遗漏的模块")
     
     def log(self, message):
         """记录日志（线程安全）"""
@@ -495,9 +1572,7 @@ class UniversalPyToExe:
         if threading.current_thread() is not threading.main_thread():
             self.output_queue.put(log_message)
         else:
-            self.log_text.insert(tk.END, log_message + "\n")
-            self.log_text.see(tk.END)
-            self.status_label.config(text=message[:50])
+            self.append_log([log_message])
     
     def save_log(self):
         """保存日志到文件"""
@@ -508,8 +1583,14 @@ class UniversalPyToExe:
         )
         if file_path:
             try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(self.log_text.get(1.0, tk.END))
+                # 优先保存完整日志文件，界面中的日志可能已被截断
+                if self.log_file_path and os.path.exists(self.log_file_path):
+                    if self.log_file:
+                        self.log_file.flush()
+                    shutil.copyfile(self.log_file_path, file_path)
+                else:
+                    with open(file_path, 'w', encoding='utf-8') as f:
+                        f.write(self.log_text.get(1.0, tk.END))
                 self.log(f"💾 日志已保存到: {file_path}")
             except Exception as e:
                 messagebox.showerror("错误", f"保存日志失败: {e}")
@@ -531,39 +1612,81 @@ class UniversalPyToExe:
             messagebox.showwarning("提示", "输出目录不存在！")
     
     def clean_temp_files(self):
-        """清理临时文件"""
-        if messagebox.askyesno("确认", "清理所有临时文件（build文件夹和.spec文件）？"):
+        """在后台扫描当前和最近用过的输出目录中残留的任务工作目录"""
+        dirs = [self.output_dir.get()]
+        exclude = [job.job_dir for job in self.running_jobs.values()]
+        
+        def scan():
             try:
-                cleaned = 0
-                
-                # 清理当前目录
-                if os.path.exists("build"):
-                    shutil.rmtree("build")
-                    cleaned += 1
-                    self.log("🗑️ 清理: build/")
-                
-                # 清理.spec文件
-                for spec_file in os.listdir('.'):
-                    if spec_file.endswith('.spec'):
-                        os.remove(spec_file)
-                        cleaned += 1
-                        self.log(f"🗑️ 清理: {spec_file}")
-                
-                # 清理输出目录中的build
-                output_dir = self.output_dir.get()
-                build_dir = os.path.join(output_dir, "build")
-                if os.path.exists(build_dir):
-                    shutil.rmtree(build_dir)
-                    cleaned += 1
-                    self.log(f"🗑️ 清理: {build_dir}")
-                
-                if cleaned > 0:
-                    self.log(f"✅ 已清理 {cleaned} 个临时项目")
+                recent = BuildHistory().recent_output_dirs(STALE_SCAN_MAX_DIRS)
+            except (sqlite3.Error, OSError):
+                recent = []
+            found = find_stale_build_files(dirs + recent, exclude)
+            self.root.after(0, lambda: self.confirm_clean(found))
+        
+        self.log("🔍 正在扫描输出目录中残留的工作目录...")
+        threading.Thread(target=scan, daemon=True).start()
+    
+    def confirm_clean(self, found):
+        """列出扫描到的全部路径，确认后移入回收区，由后台线程删除"""
+        if not found:
+            self.log("✅ 没有找到需要清理的临时文件")
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("确认清理")
+        window.geometry("640x400")
+        window.transient(self.root)
+        window.grab_set()
+        
+        tk.Label(window, text=f"将清理以下 {len(found)} 项（打包工作目录及其中的.spec文件、回收区）：",
+                font=("微软雅黑", 9), anchor="w").pack(fill="x", padx=10, pady=(10, 5))
+        
+        list_frame = tk.Frame(window)
+        list_frame.pack(fill="both", expand=True, padx=10)
+        listbox = tk.Listbox(list_frame, font=("Consolas", 9))
+        list_scrollbar = ttk.Scrollbar(list_frame, command=listbox.yview)
+        listbox.configure(yscrollcommand=list_scrollbar.set)
+        listbox.pack(side="left", fill="both", expand=True)
+        list_scrollbar.pack(side="right", fill="y")
+        for path in found:
+            listbox.insert(tk.END, path)
+        
+        def confirm():
+            window.destroy()
+            self.discard_stale(found)
+        
+        button_frame = tk.Frame(window)
+        button_frame.pack(fill="x", padx=10, pady=10)
+        ttk.Button(button_frame, text="取消", command=window.destroy).pack(side="right")
+        ttk.Button(button_frame, text="🗑️ 清理", command=confirm).pack(side="right", padx=5)
+    
+    def discard_stale(self, found):
+        """把确认过的临时文件移入回收区"""
+        cleaned = 0
+        for path in found:
+            try:
+                if os.path.isdir(path):
+                    trash_bin.discard(path)
                 else:
-                    self.log("✅ 没有找到需要清理的临时文件")
-                    
-            except Exception as e:
-                self.log(f"❌ 清理失败: {e}")
+                    os.remove(path)
+                cleaned += 1
+                self.log(f"🗑️ 清理: {path}")
+            except OSError as e:
+                self.log(f"❌ 清理失败: {path}: {e}")
+        if cleaned:
+            self.log(f"✅ 已清理 {cleaned} 个临时项目，正在后台删除")
+            self.tick_trash()
+    
+    def tick_trash(self):
+        """后台删除期间在状态栏显示进度"""
+        pending, deleted, total = trash_bin.progress()
+        if pending:
+            if not self.packing:
+                self.status_label.config(text=f"🗑️ 后台删除中: {deleted:,}/{total:,} 个文件")
+            self.root.after(500, self.tick_trash)
+        elif not self.packing:
+            self.status_label.config(text="就绪")
     
     def check_pyinstaller(self):
         """检查PyInstaller"""
@@ -580,11 +1703,100 @@ class UniversalPyToExe:
             self.log(f"❌ PyInstaller 检查失败: {e}")
             self.log("请运行: pip install pyinstaller")
     
+    def check_compress_support(self):
+        """在后台查询PyInstaller版本，不支持设置归档压缩级别时禁用相关选项"""
+        def check():
+            if not compress_level_supported():
+                version = get_pyinstaller_version()
+                self.root.after(0, lambda: self.disable_compress_options(version))
+        
+        threading.Thread(target=check, daemon=True).start()
+    
+    def disable_compress_options(self, version):
+        for widget in self.compress_widgets:
+            widget.config(state="disabled")
+        self.log(f"⚠️  PyInstaller {version} 不读取 PYINSTALLER_ZLIB_COMPRESSION_LEVEL"
+                 f"（需要 {ZLIB_LEVEL_MIN_PYINSTALLER} 及以上），已禁用归档压缩级别和压缩级别对比")
+    
+    def show_cache_stats(self):
+        """显示共享缓存的统计信息"""
+        window = tk.Toplevel(self.root)
+        window.title("共享缓存")
+        window.geometry("640x460")
+        window.transient(self.root)
+        
+        summary = tk.Label(window, text="正在统计...", font=("微软雅黑", 9), anchor="w")
+        summary.pack(fill="x", padx=10, pady=(10, 5))
+        
+        tree_frame = tk.Frame(window)
+        tree_frame.pack(fill="both", expand=True, padx=10)
+        
+        tree = ttk.Treeview(tree_frame, columns=("size", "count", "hit_rate", "last_used"), height=14)
+        tree.heading("#0", text="缓存")
+        tree.heading("size", text="大小(MB)")
+        tree.heading("count", text="条目")
+        tree.heading("hit_rate", text="命中率")
+        tree.heading("last_used", text="最近使用")
+        tree.column("#0", width=260)
+        tree.column("size", width=80, anchor="e")
+        tree.column("count", width=60, anchor="e")
+        tree.column("hit_rate", width=70, anchor="e")
+        tree.column("last_used", width=130)
+        
+        tree_scrollbar = ttk.Scrollbar(tree_frame, command=tree.yview)
+        tree.configure(yscrollcommand=tree_scrollbar.set)
+        tree.pack(side="left", fill="both", expand=True)
+        tree_scrollbar.pack(side="right", fill="y")
+        
+        shared = SharedCache(max_bytes=self.settings['cache_max_mb'] * 1024 * 1024)
+        
+        def show(stats):
+            if not window.winfo_exists():
+                return
+            tree.delete(*tree.get_children())
+            for area in stats['areas']:
+                lookups = area['hits'] + area['misses']
+                hit_rate = f"{area['hits'] / lookups:.0%}" if lookups else "-"
+                parent = tree.insert("", tk.END, text=area['name'], values=(
+                    f"{area['size'] / (1024*1024):,.1f}", area['count'], hit_rate, ""))
+                for entry in area['entries']:
+                    tree.insert(parent, tk.END, text=entry['name'], values=(
+                        f"{entry['size'] / (1024*1024):,.2f}", "", "",
+                        datetime.fromtimestamp(entry['last_used']).strftime('%Y-%m-%d %H:%M')))
+            summary.config(text=f"位置: {shared.root}　已用 {stats['total'] / (1024*1024):,.0f} MB / "
+                                f"上限 {stats['max_bytes'] / (1024*1024):,.0f} MB（超出时按最近使用时间淘汰）")
+        
+        def refresh():
+            def collect():
+                try:
+                    stats = shared.stats()
+                    self.root.after(0, lambda: show(stats))
+                except Exception as e:
+                    self.log(f"❌ 统计共享缓存失败: {e}")
+            threading.Thread(target=collect, daemon=True).start()
+        
+        def clear():
+            if self.packing:
+                messagebox.showwarning("提示", "正在打包，请稍后再清空缓存", parent=window)
+                return
+            if messagebox.askyesno("确认", "清空所有项目共用的缓存？下次打包会重新生成。", parent=window):
+                shared.clear()
+                self.log("🗑️ 已清空共享缓存")
+                refresh()
+        
+        button_frame = tk.Frame(window)
+        button_frame.pack(fill="x", padx=10, pady=10)
+        ttk.Button(button_frame, text="刷新", command=refresh).pack(side="left")
+        ttk.Button(button_frame, text="清空共享缓存", command=clear).pack(side="left", padx=10)
+        ttk.Button(button_frame, text="关闭", command=window.destroy).pack(side="right")
+        
+        refresh()
+    
     def show_settings(self):
         """显示设置窗口"""
         settings_window = tk.Toplevel(self.root)
         settings_window.title("设置")
-        settings_window.geometry("500x400")
+        settings_window.geometry("500x640")
         settings_window.resizable(False, False)
         
         # 使设置窗口模态
@@ -598,22 +1810,51 @@ class UniversalPyToExe:
         path_frame = ttk.LabelFrame(settings_window, text="Python路径", padding=10)
         path_frame.pack(fill="x", padx=20, pady=5)
         
-        self.python_path = tk.StringVar(value=sys.executable)
+        self.python_path = tk.StringVar(value=self.settings['python_path'] or sys.executable)
         ttk.Entry(path_frame, textvariable=self.python_path).pack(fill="x", pady=5)
         
         # 打包超时设置
         timeout_frame = ttk.LabelFrame(settings_window, text="打包超时（秒）", padding=10)
         timeout_frame.pack(fill="x", padx=20, pady=5)
         
-        self.timeout = tk.IntVar(value=300)  # 5分钟
-        ttk.Spinbox(timeout_frame, from_=60, to=3600, textvariable=self.timeout, width=10).pack()
+        ttk.Label(timeout_frame, text="总时长:").pack(side="left")
+        self.timeout = tk.IntVar(value=self.settings['timeout'])
+        ttk.Spinbox(timeout_frame, from_=60, to=7200, textvariable=self.timeout, width=8).pack(
+            side="left", padx=(5, 20))
+        
+        ttk.Label(timeout_frame, text="无输出（0为不限）:").pack(side="left")
+        self.idle_timeout = tk.IntVar(value=self.settings['idle_timeout'])
+        ttk.Spinbox(timeout_frame, from_=0, to=3600, textvariable=self.idle_timeout, width=8).pack(
+            side="left", padx=5)
         
         # 内存限制
-        memory_frame = ttk.LabelFrame(settings_window, text="内存限制（MB）", padding=10)
+        memory_frame = ttk.LabelFrame(settings_window, text="内存限制（MB，0为不限，仅Linux/macOS）", padding=10)
         memory_frame.pack(fill="x", padx=20, pady=5)
         
-        self.memory_limit = tk.IntVar(value=2048)  # 2GB
-        ttk.Spinbox(memory_frame, from_=512, to=8192, textvariable=self.memory_limit, width=10).pack()
+        self.memory_limit = tk.IntVar(value=self.settings['memory_limit'])
+        ttk.Spinbox(memory_frame, from_=0, to=65536, increment=512,
+                   textvariable=self.memory_limit, width=10).pack(side="left")
+        
+        self.low_priority = tk.BooleanVar(value=self.settings['low_priority'])
+        ttk.Checkbutton(memory_frame, text="以低CPU优先级运行打包", 
+                       variable=self.low_priority).pack(side="left", padx=20)
+        
+        # 共享缓存上限
+        cache_frame = ttk.LabelFrame(settings_window, text="共享缓存上限（MB，所有项目共用）", padding=10)
+        cache_frame.pack(fill="x", padx=20, pady=5)
+        
+        self.cache_max_var = tk.IntVar(value=self.settings['cache_max_mb'])
+        ttk.Spinbox(cache_frame, from_=256, to=65536, increment=256,
+                   textvariable=self.cache_max_var, width=10).pack()
+        
+        # 性能退化阈值
+        regression_frame = ttk.LabelFrame(settings_window, text="性能退化提示阈值（%，与最近几次构建的中位数比较）",
+                                          padding=10)
+        regression_frame.pack(fill="x", padx=20, pady=5)
+        
+        self.regression_var = tk.IntVar(value=self.settings['regression_percent'])
+        ttk.Spinbox(regression_frame, from_=5, to=500, increment=5,
+                   textvariable=self.regression_var, width=10).pack()
         
         # 保存设置按钮
         ttk.Button(settings_window, text="保存设置", 
@@ -624,180 +1865,221 @@ class UniversalPyToExe:
     
     def save_settings(self, window):
         """保存设置"""
-        # 这里可以添加保存设置到配置文件的代码
+        python_path = self.python_path.get().strip()
+        self.settings['python_path'] = '' if python_path == sys.executable else python_path
+        self.settings['low_priority'] = self.low_priority.get()
+        for key, var in (('timeout', self.timeout), ('idle_timeout', self.idle_timeout),
+                         ('memory_limit', self.memory_limit), ('cache_max_mb', self.cache_max_var),
+                         ('regression_percent', self.regression_var)):
+            try:
+                self.settings[key] = int(var.get())
+            except (tk.TclError, ValueError):
+                pass
+        self.save_config()
         self.log("⚙️ 设置已保存")
         window.destroy()
+        self.refresh_history()
     
-    def start_packing(self):
-        """开始打包"""
+    def start_packing(self, overrides=None):
+        """开始打包（已有任务在运行时加入队列）；overrides 覆盖界面上的选项"""
         py_file = self.py_file_path.get()
         if not py_file or not os.path.exists(py_file):
             messagebox.showerror("错误", "请先选择有效的Python文件！")
             return
         
-        if self.packing:
-            return
-        
         # 确认开始打包
         if not messagebox.askyesno("确认", 
-                                  f"确定开始打包吗？\n"
+                                  f"确定{'加入打包队列' if self.packing else '开始打包'}吗？\n"
                                   f"程序：{os.path.basename(py_file)}\n"
                                   f"输出到：{self.output_dir.get()}"):
             return
         
+        # 保存当前配置
+        self.save_config()
+        
+        # 在主线程中读取界面选项，导入预检通过后加入队列由调度器启动
+        options = dict(self.get_pack_options(), **(overrides or {}))
+        if not options['preflight']:
+            self.enqueue_checked(options)
+            return
+        
+        def check():
+            try:
+                report = PreflightCheck(find_pyinstaller_python()).check(
+                    scan_imports(py_file), options['hidden_imports'])
+                self.root.after(0, lambda: self.confirm_preflight(options, report))
+            except Exception as e:
+                self.log(f"⚠️  导入预检失败，跳过: {e}")
+                self.root.after(0, lambda: self.enqueue_checked(dict(options, preflight=False)))
+        
+        threading.Thread(target=check, daemon=True).start()
+    
+    def confirm_preflight(self, options, report):
+        """导入预检发现缺失的模块时询问是否仍然打包；已经检查过的任务在打包时不再重复预检"""
+        blocking, lines = PreflightCheck.format(report)
+        for line in lines:
+            self.log(line)
+        if blocking and not messagebox.askyesno(
+                "导入预检", "\n".join(lines) + "\n\n打包后的程序很可能无法运行，仍然要打包吗？"):
+            self.log("⛔ 导入预检未通过，已取消打包")
+            return
+        self.enqueue_checked(dict(options, preflight=False))
+    
+    def enqueue_checked(self, options):
+        self.job_queue.add(options)
+        self.queue_paused = False
+        self.schedule_jobs()
+    
+    def toggle_watch(self):
+        """开始或停止监视主程序及其本地导入的模块，保存后自动重新打包"""
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+            self.log("⏹ 已停止监视源码变化")
+            return
+        
+        py_file = self.py_file_path.get()
+        if not py_file or not os.path.exists(py_file):
+            messagebox.showerror("错误", "请先选择有效的Python文件！")
+            return
+        self.watcher = SourceWatcher(
+            py_file, lambda changed: self.root.after(0, lambda: self.watch_rebuild(changed)))
+        self.watcher.start()
+        self.log(f"👁️ 开始监视 {len(self.watcher.files)} 个源码文件，"
+                 f"保存后 {WATCH_DEBOUNCE_SECONDS:g} 秒内没有新的修改就自动重新打包")
+    
+    def watch_rebuild(self, changed):
+        """源码变化后加入一个增量构建任务，取代尚未完成的上一次自动构建"""
+        if not self.watcher:
+            return
+        base_dir = os.path.dirname(os.path.abspath(self.watcher.py_file))
+        names = [os.path.relpath(path, base_dir) for path in changed]
+        self.log(f"🔁 检测到源码变化: {', '.join(names[:10])}{' 等' if len(names) > 10 else ''}")
+        
+        previous = self.job_queue.get(self.watch_job_id) if self.watch_job_id else None
+        if previous and previous['status'] == 'queued':
+            self.job_queue.remove(previous['id'])
+        elif previous and previous['status'] == 'running' and previous['id'] in self.running_jobs:
+            # 新任务与它使用同一工作目录，队列会等它完全退出后才启动新任务
+            self.running_jobs[previous['id']].cancel()
+            self.log("⏭️ 上一次自动构建尚未完成，已取消，将在其退出后开始新的构建")
+        
+        options = dict(self.get_pack_options(), py_file=self.watcher.py_file)
+        if options['backend'] != 'zipapp':
+            options['incremental'] = True
+        self.watch_job_id = self.job_queue.add(options, priority=True)['id']
+        if self.queue_paused:
+            self.log("⏸ 队列已暂停，自动构建将在继续队列后运行")
+        self.schedule_jobs()
+    
+    def begin_packing_session(self, name):
+        """第一个任务开始时：更新按钮状态，清空日志并新建完整日志文件"""
         self.packing = True
-        self.pack_button.config(state="disabled")
         self.cancel_button.config(state="normal")
         self.progress.start()
         
-        # 清空日志
         self.log_text.delete(1.0, tk.END)
+        self.open_log_file(name or "pack")
+        if self.log_file_path:
+            self.log(f"📝 完整日志: {self.log_file_path}")
+    
+    def start_queued_job(self, entry):
+        """在新线程中运行一个队列任务"""
+        name = entry['name']
         
-        # 保存当前配置
-        self.save_config()
+        # 同时运行多个任务时在日志前加上程序名
+        def prefix():
+            return f"[{name}] " if len(self.running_jobs) > 1 else ""
         
-        # 在新线程中打包
-        thread = threading.Thread(target=self.pack_in_thread, daemon=True)
-        thread.start()
+        job = PackJob(entry['options'], log=lambda message: self.log(prefix() + message),
+                      output=lambda line: self.output_queue.put(f"  {prefix()}{line}"))
+        self.running_jobs[entry['id']] = job
+        self.job = job
+        threading.Thread(target=self.pack_in_thread, args=(entry['id'], job), daemon=True).start()
+    
+    def selected_variants(self):
+        return [key for key, var in self.variant_vars.items() if var.get()]
+    
+    def get_pack_options(self):
+        """收集当前界面上的打包选项"""
+        return {
+            'py_file': self.py_file_path.get(),
+            'app_name': self.app_name.get(),
+            'backend': self.backend.get(),
+            'variants': self.selected_variants(),
+            'icon_path': self.icon_path.get(),
+            'output_dir': self.output_dir.get(),
+            'single_file': self.single_file.get(),
+            'no_console': self.no_console.get(),
+            'clean_build': self.clean_build.get(),
+            'use_upx': self.use_upx.get(),
+            'debug_mode': self.debug_mode.get(),
+            'optimize': self.optimize.get(),
+            'compress_level': self.compress_level.get(),
+            'hidden_imports': self.hidden_imports.get(),
+            'extra_args': self.extra_args.get(),
+            'use_cache': self.use_cache.get(),
+            'incremental': self.incremental.get(),
+            'use_daemon': self.use_daemon.get(),
+            'preflight': self.preflight.get(),
+            'benchmark': self.benchmark.get(),
+            'bench_runs': self.bench_runs.get(),
+            'bench_args': self.bench_args.get(),
+            'size_budget_mb': self.size_budget_mb.get(),
+            'startup_budget_ms': self.startup_budget_ms.get(),
+            'budget_action': self.budget_action.get(),
+            'upx_dir': self.upx_dir.get(),
+            'upx_exclude': self.upx_exclude.get(),
+            **{key: self.settings[key] for key in SETTINGS_DEFAULTS if key in DEFAULT_OPTIONS}
+        }
     
-    def pack_in_thread(self):
+    def pack_in_thread(self, job_id, job):
         """在后台线程中执行打包"""
+        result = None
         try:
-            py_file = self.py_file_path.get()
-            app_name = self.app_name.get()
-            icon_path = self.icon_path.get()
-            output_dir = self.output_dir.get()
-            
-            # 确保输出目录存在
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # 构建PyInstaller命令
-            cmd = ["pyinstaller"]
-            
-            # 基本选项
-            if self.single_file.get():
-                cmd.append("--onefile")
+            result = job.run()
             
-            if self.no_console.get():
-                cmd.append("--windowed")
-            else:
-                cmd.append("--console")
-            
-            if icon_path and os.path.exists(icon_path):
-                cmd.append(f"--icon={icon_path}")
-            
-            # 清理选项
-            cmd.append("--clean")
-            
-            # UPX压缩
-            if not self.use_upx.get():
-                cmd.append("--noupx")
-            
-            # 调试模式
-            if self.debug_mode.get():
-                cmd.append("--debug=all")
-            
-            # 输出路径设置
-            cmd.append(f"--distpath={output_dir}")
-            cmd.append(f"--workpath={os.path.join(output_dir, 'build')}")
-            cmd.append(f"--specpath={output_dir}")
-            
-            # 添加隐藏导入
-            hidden_imports = self.hidden_imports.get().strip()
-            if hidden_imports:
-                for module in hidden_imports.split(','):
-                    module = module.strip()
-                    if module:
-                        cmd.append(f"--hidden-import={module}")
-            
-            # 额外参数
-            extra_args = self.extra_args.get().strip()
-            if extra_args:
-                cmd.extend(extra_args.split())
+            timeline = job.timeline.snapshot()
+            self.root.after(0, lambda: self.show_timeline(timeline))
+            if result.get('contents'):
+                self.root.after(0, lambda: self.show_size_report(result['contents']))
             
-            # 程序名称和主文件
-            cmd.append(f"--name={app_name}")
-            cmd.append(py_file)
+            output_dir = job.options['output_dir']
+            exe_path = result['exe_path']
+            return_code = result['returncode']
             
-            self.log("="*70)
-            self.log(f"🚀 开始打包: {os.path.basename(py_file)}")
-            self.log(f"📁 输出目录: {output_dir}")
-            self.log(f"⚙️  打包命令: {' '.join(cmd)}")
-            self.log("="*70)
-            
-            # 执行打包命令（超时设置）
-            self.process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,  # 合并输出
-                text=True,
-                encoding='utf-8',
-                errors='ignore',
-                bufsize=1,
-                universal_newlines=True
-            )
-            
-            # 实时读取输出
-            for line in iter(self.process.stdout.readline, ''):
-                if line.strip():
-                    self.output_queue.put(f"  {line.strip()}")
-            
-            # 等待进程完成（带超时）
-            timeout = 300  # 5分钟
-            start_time = time.time()
-            
-            while self.process.poll() is None:
-                if time.time() - start_time > timeout:
-                    self.process.terminate()
-                    self.log(f"⏰ 打包超时（{timeout}秒），已终止")
-                    break
-                time.sleep(0.1)
+            # 队列中还有其他任务或处于监视模式时只记录日志，不弹出对话框
+            if len(self.running_jobs) > 1 or self.job_queue.counts()['queued'] or self.watcher:
+                pass
+            elif return_code == 0 and result.get('variants'):
+                lines = [f"{v['variant']}: {v['exe_size']:.2f} MB，{v['seconds']:.1f} 秒"
+                         for v in result['variants']]
+                success_msg = f"✅ 多变体打包成功！\n\n" + "\n".join(lines) + f"\n\n位置: {output_dir}"
+                self.root.after(0, lambda: self.show_success_message(success_msg, output_dir, exe_path))
             
-            return_code = self.process.wait()
+            elif result.get('over_budget'):
+                title = "超出预算" if return_code == 0 else "失败"
+                message = (f"{os.path.basename(exe_path)} 超出预算：\n\n" + "\n".join(result['over_budget']) +
+                           "\n\n详细的产物变化请查看日志")
+                self.root.after(0, lambda: messagebox.showwarning(title, message))
             
-            # 检查打包结果
-            if return_code == 0 or return_code is None:
-                # 根据打包模式确定EXE路径
-                if self.single_file.get():
-                    exe_path = os.path.join(output_dir, f"{app_name}.exe")
-                else:
-                    exe_path = os.path.join(output_dir, app_name, f"{app_name}.exe")
+            elif return_code == 0 and result['exe_size'] is not None:
+                exe_size = result['exe_size']
                 
-                if os.path.exists(exe_path):
-                    exe_size = os.path.getsize(exe_path) / (1024*1024)  # MB
-                    self.log("="*70)
-                    self.log(f"✅ 打包成功！")
-                    self.log(f"📄 EXE文件: {exe_path}")
-                    self.log(f"📏 文件大小: {exe_size:.2f} MB")
-                    
-                    # 清理build文件夹
-                    if self.clean_build.get():
-                        build_dir = os.path.join(output_dir, "build")
-                        if os.path.exists(build_dir):
-                            try:
-                                shutil.rmtree(build_dir)
-                                self.log(f"🗑️  已清理build文件夹")
-                            except Exception as e:
-                                self.log(f"⚠️  清理build文件夹失败: {e}")
-                    
-                    self.log("="*70)
-                    
-                    # 显示成功消息
-                    success_msg = (
-                        f"✅ 打包成功！\n\n"
-                        f"程序: {app_name}.exe\n"
-                        f"大小: {exe_size:.2f} MB\n"
-                        f"位置: {output_dir}"
-                    )
-                    
-                    self.root.after(0, lambda: self.show_success_message(success_msg, output_dir, exe_path))
-                    
-                else:
-                    self.log("❌ EXE文件未生成，请检查错误信息")
-                    self.root.after(0, lambda: messagebox.showerror(
-                        "失败", "EXE文件未生成，请检查错误信息"))
-            else:
-                self.log(f"❌ 打包失败，返回码: {return_code}")
+                # 显示成功消息
+                success_msg = (
+                    f"✅ 打包成功！\n\n"
+                    f"程序: {os.path.basename(exe_path)}\n"
+                    f"大小: {exe_size:.2f} MB\n"
+                    f"位置: {output_dir}"
+                )
+                
+                self.root.after(0, lambda: self.show_success_message(success_msg, output_dir, exe_path))
+                
+            elif return_code == 0:
+                self.root.after(0, lambda: messagebox.showerror(
+                    "失败", "EXE文件未生成，请检查错误信息"))
+            elif not job.cancelled:
                 self.root.after(0, lambda: messagebox.showerror(
                     "失败", f"打包失败，返回码: {return_code}"))
             
@@ -807,9 +2089,21 @@ class UniversalPyToExe:
                 "错误", f"打包过程中出错:\n{str(e)}"))
         
         finally:
+            self.running_jobs.pop(job_id, None)
+            if self.job is job:
+                self.job = None
+            # 退出程序时被终止的任务保持运行状态，下次启动时重新排队
+            if not self.closing:
+                self.job_queue.finish(job_id, result, cancelled=job.cancelled)
+                self.root.after(0, self.job_finished)
+    
+    def job_finished(self):
+        """一个任务结束后启动后续任务，全部结束时恢复界面状态"""
+        self.schedule_jobs()
+        self.refresh_history()
+        if not self.running_jobs and self.packing:
             self.packing = False
-            self.process = None
-            self.root.after(0, self.finish_packing)
+            self.finish_packing()
     
     def show_success_message(self, message, output_dir, exe_path):
         """显示成功消息"""
@@ -825,59 +2119,4197 @@ class UniversalPyToExe:
     
     def finish_packing(self):
         """完成打包后的清理工作"""
-        self.pack_button.config(state="normal")
         self.cancel_button.config(state="disabled")
         self.progress.stop()
         self.status_label.config(text="打包完成")
     
     def cancel_packing(self):
-        """取消打包"""
-        if self.process and self.packing:
-            if messagebox.askyesno("确认", "确定要取消打包吗？"):
+        """取消正在运行的打包任务，并暂停队列"""
+        if self.running_jobs and self.packing:
+            if messagebox.askyesno("确认", "确定要取消打包吗？\n排队中的任务会暂停，可在任务队列中继续。"):
+                self.queue_paused = True
                 try:
-                    self.process.terminate()
+                    for job in list(self.running_jobs.values()):
+                        job.cancel()
                     self.log("正在终止打包进程...")
-                    self.packing = False
                 except:
                     self.log("无法终止进程")
+                self.refresh_queue()
         else:
             messagebox.showinfo("提示", "没有正在运行的打包任务")
     
     def on_closing(self):
-        """窗口关闭事件"""
+        """窗口关闭事件（未完成的任务保留在队列中）"""
+        if self.packing and not messagebox.askyesno(
+                "确认", "打包正在进行中，确定要退出吗？\n未完成的任务会保留在队列中。"):
+            return
+        # 确认退出后才停止监视，取消退出时监视继续有效
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
         if self.packing:
-            if messagebox.askyesno("确认", "打包正在进行中，确定要退出吗？"):
-                try:
-                    if self.process:
-                        self.process.terminate()
-                except:
-                    pass
-                self.root.destroy()
-        else:
-            self.root.destroy()
+            self.closing = True
+            try:
+                for job in list(self.running_jobs.values()):
+                    job.cancel()
+            except:
+                pass
+        self.root.destroy()
     
     def run(self):
         self.root.mainloop()
+        self.close_log_file()
 
-def check_dependencies():
-    """检查依赖"""
+
+# 可执行文件后缀（Linux/macOS下PyInstaller生成的程序没有后缀）
+EXE_SUFFIX = '.exe' if sys.platform == 'win32' else ''
+
+# 打包选项默认值（批量清单中未填写的字段使用这些值）
+DEFAULT_OPTIONS = {
+    'py_file': '',
+    'app_name': '',
+    'backend': 'pyinstaller',
+    'variants': [],
+    'icon_path': '',
+    'output_dir': '',
+    'single_file': True,
+    'no_console': True,
+    'clean_build': True,
+    'use_upx': False,
+    'debug_mode': False,
+    'optimize': 0,
+    'compress_level': -1,
+    'compress_bench': False,
+    'hidden_imports': '',
+    'extra_args': '',
+    'use_cache': True,
+    'incremental': False,
+    'use_daemon': False,
+    'preflight': True,
+    'benchmark': False,
+    'bench_runs': 10,
+    'bench_args': '',
+    'size_budget_mb': 0,
+    'startup_budget_ms': 0,
+    'budget_action': 'warn',
+    'upx_dir': '',
+    'upx_exclude': '',
+    'timeout': 300,
+    'idle_timeout': 180,
+    'low_priority': False,
+    'memory_limit': 0,
+    'cache_max_mb': 2048,
+    'regression_percent': 20
+}
+
+# 字节码优化级别（对应 python -O / -OO）
+OPTIMIZE_LEVELS = {
+    0: "不优化",
+    1: "-O（去掉assert）",
+    2: "-OO（再去掉文档字符串）",
+}
+
+# 归档的zlib压缩级别（-1为PyInstaller默认：PYZ用6，单文件归档用9）；引导程序只支持zlib
+COMPRESS_LEVELS = {
+    -1: "默认",
+    0: "不压缩",
+    1: "最快",
+    6: "均衡",
+    9: "最小",
+}
+# 压缩级别对比时构建的候选级别
+COMPRESS_BENCH_LEVELS = (0, 1, 6, 9)
+# 从这个版本起PyInstaller读取 PYINSTALLER_ZLIB_COMPRESSION_LEVEL，更早的版本忽略它
+ZLIB_LEVEL_MIN_PYINSTALLER = '6.22'
+
+# 按主程序分别保存的预算选项
+BUDGET_OPTIONS = ('size_budget_mb', 'startup_budget_ms', 'budget_action')
+
+# 设置窗口中的选项及默认值
+SETTINGS_DEFAULTS = {
+    'python_path': '',
+    'timeout': 300,
+    'idle_timeout': 180,
+    'low_priority': False,
+    'memory_limit': 0,
+    'cache_max_mb': 2048,
+    'regression_percent': 20
+}
+
+# 缓存目录
+CACHE_ROOT = os.path.join(os.path.expanduser('~'), '.pytoexe_cache')
+
+# 所有项目共用的PyInstaller缓存目录（PYINSTALLER_CONFIG_DIR），不再用--clean整体清空
+PYINSTALLER_CACHE_DIR = os.path.join(CACHE_ROOT, 'pyinstaller')
+
+def build_pyinstaller_command(options, workpath, specpath, clean=True):
+    """根据打包选项生成PyInstaller命令"""
+    # --noconfirm：目录模式下覆盖已有的输出目录，不再询问
+    cmd = ["pyinstaller", "--noconfirm"]
+    
+    # 基本选项
+    if options['single_file']:
+        cmd.append("--onefile")
+    
+    if options['no_console']:
+        cmd.append("--windowed")
+    else:
+        cmd.append("--console")
+    
+    icon_path = options['icon_path']
+    if icon_path and os.path.exists(icon_path):
+        cmd.append(f"--icon={icon_path}")
+    
+    # 清理选项
+    if clean:
+        cmd.append("--clean")
+    
+    # UPX压缩：目录模式由打包后的并行压缩阶段处理；单文件模式的二进制文件在归档内，只能交给PyInstaller
+    if options['use_upx'] and options['single_file']:
+        if options['upx_dir']:
+            cmd.append(f"--upx-dir={options['upx_dir']}")
+        for pattern in parse_exclude_patterns(options['upx_exclude']):
+            cmd.append(f"--upx-exclude={pattern}")
+    else:
+        cmd.append("--noupx")
+    
+    # 调试模式
+    if options['debug_mode']:
+        cmd.append("--debug=all")
+    
+    # 字节码优化：收集的模块按该级别编译，打包后的解释器也以同样的级别运行
+    if int(options['optimize']):
+        cmd.append(f"--optimize={int(options['optimize'])}")
+    
+    # 输出路径设置
+    cmd.append(f"--distpath={options['output_dir']}")
+    cmd.append(f"--workpath={workpath}")
+    cmd.append(f"--specpath={specpath}")
+    
+    # 添加隐藏导入
+    for module in options['hidden_imports'].split(','):
+        module = module.strip()
+        if module:
+            cmd.append(f"--hidden-import={module}")
+    
+    # 额外参数
+    extra_args = options['extra_args'].strip()
+    if extra_args:
+        cmd.extend(extra_args.split())
+    
+    # 启动基准测试的运行时钩子（只有设置了环境变量时才生效）
+    if wants_benchmark(options) and not options['bench_args'].strip():
+        cmd.append(f"--runtime-hook={BENCH_HOOK_PATH}")
+    
+    # 程序名称和主文件
+    cmd.append(f"--name={options['app_name']}")
+    cmd.append(options['py_file'])
+    return cmd
+
+# 多变体构建：变体 -> (显示名称, 覆盖的选项)；这两个选项不影响模块分析，各变体可以共用一次分析
+BUILD_VARIANTS = {
+    'onefile_console': ('单文件+控制台', {'single_file': True, 'no_console': False}),
+    'onefile_windowed': ('单文件+无控制台', {'single_file': True, 'no_console': True}),
+    'onedir_console': ('目录+控制台', {'single_file': False, 'no_console': False}),
+    'onedir_windowed': ('目录+无控制台', {'single_file': False, 'no_console': True}),
+}
+
+# 复制给其他变体的模块分析结果（Analysis-00.toc中引用的base_library.zip仍指向第一个变体的工作目录）
+ANALYSIS_SEED_FILES = ('Analysis-00.toc', 'base_library.zip', 'localpycs')
+
+# 打包方式的显示名称
+BUILD_MODE_NAMES = {'onefile': '单文件', 'onedir': '目录', 'zipapp': 'zipapp', 'matrix': '多变体',
+                    'compress': '压缩级别对比'}
+
+def get_build_mode(options):
+    """返回打包方式：zipapp（开发构建）、compress（压缩级别对比）、matrix（多变体）、onefile 或 onedir"""
+    if options['backend'] == 'zipapp':
+        return 'zipapp'
+    if options['compress_bench']:
+        return 'compress'
+    if options['variants']:
+        return 'matrix'
+    return 'onefile' if options['single_file'] else 'onedir'
+
+def get_exe_path(options):
+    """根据打包模式确定生成的可执行文件路径"""
+    app_name = options['app_name']
+    if options['backend'] == 'zipapp':
+        # Windows上无控制台的程序用.pyzw，由pythonw运行
+        suffix = '.pyzw' if options['no_console'] and sys.platform == 'win32' else '.pyz'
+        return os.path.join(options['output_dir'], f"{app_name}{suffix}")
+    if options['single_file']:
+        return os.path.join(options['output_dir'], f"{app_name}{EXE_SUFFIX}")
+    return os.path.join(options['output_dir'], app_name, f"{app_name}{EXE_SUFFIX}")
+
+def get_artifact_path(options):
+    """打包产物路径：单文件模式和zipapp为可执行文件，否则为程序目录"""
+    if options['single_file'] or options['backend'] == 'zipapp':
+        return get_exe_path(options)
+    return os.path.join(options['output_dir'], options['app_name'])
+
+# 回收区目录名（建在被删除目录的上级目录中，保证改名在同一文件系统内完成）
+TRASH_DIR_NAME = '.pytoexe_trash'
+# 扫描残留临时文件时最多检查的目录数，以及每个目录最多检查的条目数
+STALE_SCAN_MAX_DIRS = 30
+STALE_SCAN_MAX_ENTRIES = 2000
+
+class TrashBin:
+    """先把目录原子地改名移入回收区（瞬间完成），再由后台线程删除并统计进度"""
+    
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self.idle = threading.Event()
+        self.idle.set()
+        self.pending = 0          # 尚未删除完的目录数
+        self.total_files = 0      # 本轮需要删除的文件数（扫描到后才计入）
+        self.deleted_files = 0
+    
+    def discard(self, path):
+        """把path移入回收区并排队删除，返回回收区中的路径；path不存在时返回None"""
+        path = os.path.abspath(path)
+        if not os.path.lexists(path):
+            return None
+        if os.path.basename(path) == TRASH_DIR_NAME:
+            # 上次没有删完的回收区：直接删除其中的内容
+            for name in os.listdir(path):
+                self._enqueue(os.path.join(path, name))
+            return path
+        
+        trash_dir = os.path.join(os.path.dirname(path), TRASH_DIR_NAME)
+        target = os.path.join(trash_dir, f"{os.path.basename(path)}-{time.time_ns():x}")
+        with self._lock:
+            os.makedirs(trash_dir, exist_ok=True)
+            os.rename(path, target)
+        self._enqueue(target)
+        return target
+    
+    def _enqueue(self, path):
+        with self._lock:
+            self.pending += 1
+            self.idle.clear()
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+        self._queue.put(path)
+    
+    def _run(self):
+        while True:
+            path = self._queue.get()
+            try:
+                self._delete(path)
+            except Exception:
+                pass
+            with self._lock:
+                self.pending -= 1
+                if not self.pending:
+                    self.total_files = self.deleted_files = 0
+                    self.idle.set()
+    
+    def _delete(self, path):
+        if not os.path.isdir(path) or os.path.islink(path):
+            if os.path.lexists(path):
+                os.unlink(path)
+        else:
+            count = sum(len(names) for _, _, names in os.walk(path))
+            with self._lock:
+                self.total_files += count
+            for root, dirs, names in os.walk(path, topdown=False):
+                for name in names:
+                    try:
+                        os.unlink(os.path.join(root, name))
+                    except OSError:
+                        pass
+                    with self._lock:
+                        self.deleted_files += 1
+                for name in dirs:
+                    sub_path = os.path.join(root, name)
+                    try:
+                        os.unlink(sub_path) if os.path.islink(sub_path) else os.rmdir(sub_path)
+                    except OSError:
+                        pass
+            # 只读文件等无法逐个删除的内容最后再统一处理一次
+            shutil.rmtree(path, ignore_errors=True)
+        
+        # 回收区空了就删掉
+        with self._lock:
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                pass
+    
+    def progress(self):
+        """返回 (待删除的目录数, 已删除文件数, 需要删除的文件数)"""
+        with self._lock:
+            return self.pending, self.deleted_files, self.total_files
+    
+    def wait(self, timeout=None):
+        """等待所有排队的删除完成，返回是否已完成"""
+        return self.idle.wait(timeout)
+
+trash_bin = TrashBin()
+
+def discard_tree(path):
+    """删除目录：优先移入回收区后台删除，无法改名（如文件被占用）时同步删除"""
     try:
-        import PyInstaller
-        return True
-    except ImportError:
-        result = messagebox.askyesno("依赖缺失", 
-                                   "未检测到PyInstaller，是否自动安装？\n需要管理员权限。")
-        if result:
+        trash_bin.discard(path)
+    except OSError:
+        shutil.rmtree(path, ignore_errors=True)
+
+def is_job_dir(path):
+    """是否为本工具创建的任务工作目录：输出目录/build/<程序名>，其中有同名的.spec文件"""
+    name = os.path.basename(path)
+    return (os.path.isdir(path) and not os.path.islink(path)
+            and os.path.isfile(os.path.join(path, f"{name}.spec")))
+
+def find_stale_build_files(output_dirs, exclude=(), max_dirs=STALE_SCAN_MAX_DIRS,
+                           max_entries=STALE_SCAN_MAX_ENTRIES):
+    """在输出目录中查找残留的任务工作目录（build/<程序名>，spec文件也在其中）和回收区
+    
+    只返回本工具创建的内容，不会涉及源码目录或用户自己的build文件夹；跳过exclude中的路径及其上级。
+    """
+    exclude = [os.path.abspath(path) for path in exclude]
+    
+    def excluded(path):
+        return any(other == path or other.startswith(path + os.sep) for other in exclude)
+    
+    found = []
+    seen = set()
+    for directory in output_dirs:
+        if not directory:
+            continue
+        directory = os.path.abspath(directory)
+        if directory in seen:
+            continue
+        seen.add(directory)
+        if len(seen) > max_dirs:
+            break
+        
+        trash_dir = os.path.join(directory, TRASH_DIR_NAME)
+        if os.path.isdir(trash_dir) and not os.path.islink(trash_dir) and not excluded(trash_dir):
+            found.append(trash_dir)
+        
+        build_dir = os.path.join(directory, 'build')
+        if os.path.islink(build_dir):
+            continue
+        try:
+            with os.scandir(build_dir) as entries:
+                for i, entry in enumerate(entries):
+                    if i >= max_entries:
+                        break
+                    if entry.is_dir(follow_symlinks=False) and is_job_dir(entry.path) and not excluded(entry.path):
+                        found.append(entry.path)
+        except OSError:
+            continue
+    return found
+
+def parse_exclude_patterns(text):
+    """把逗号或空白分隔的排除列表拆成通配符列表"""
+    return [pattern for pattern in re.split(r'[,\s]+', text) if pattern]
+
+def archive_options_key(options):
+    """通过环境变量传给PyInstaller的归档压缩级别（不在命令中，需要单独参与缓存键）
+    
+    PyInstaller不支持该设置时级别不会生效，也不参与缓存键，避免无意义的重新构建。
+    """
+    level = int(options['compress_level'])
+    return f"zlib|{level}\n" if level >= 0 and compress_level_supported() else ''
+
+def upx_stage_key(options):
+    """打包后UPX压缩阶段的选项（不在PyInstaller命令中，需要单独参与缓存键）"""
+    if not options['use_upx'] or options['single_file']:
+        return ''
+    return f"upx|{options['upx_exclude']}\n"
+
+class _ImportVisitor(ast.NodeVisitor):
+    """收集一个文件中的全部导入（包括函数内、try块内和importlib的动态导入）"""
+    
+    def __init__(self):
+        self.imports = []  # (模块名, 相对层级, 导入的名称, 是否在函数内, 是否在try块内)
+        self.function_depth = 0
+        self.try_depth = 0
+    
+    def _add(self, module, level, names):
+        self.imports.append((module, level, tuple(names),
+                             self.function_depth > 0, self.try_depth > 0))
+    
+    def visit_Import(self, node):
+        for alias in node.names:
+            self._add(alias.name, 0, ())
+    
+    def visit_ImportFrom(self, node):
+        self._add(node.module or '', node.level, [alias.name for alias in node.names])
+    
+    def visit_Call(self, node):
+        # importlib.import_module("x") / __import__("x") 中的字符串常量
+        func = node.func
+        name = func.attr if isinstance(func, ast.Attribute) else getattr(func, 'id', '')
+        if (name in ('import_module', '__import__') and node.args
+                and isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str)
+                and not node.args[0].value.startswith('.')):
+            self._add(node.args[0].value, 0, ())
+        self.generic_visit(node)
+    
+    def _visit_function(self, node):
+        self.function_depth += 1
+        self.generic_visit(node)
+        self.function_depth -= 1
+    
+    visit_FunctionDef = visit_AsyncFunctionDef = visit_Lambda = _visit_function
+    
+    def _visit_try(self, node):
+        self.try_depth += 1
+        for child in node.body:
+            self.visit(child)
+        self.try_depth -= 1
+        for child in node.handlers + node.orelse + node.finalbody:
+            self.visit(child)
+    
+    visit_Try = _visit_try
+    if hasattr(ast, 'TryStar'):
+        visit_TryStar = _visit_try
+
+# 解析结果缓存：路径 -> ((修改时间, 大小), 导入列表)
+_parse_cache = {}
+_parse_cache_lock = threading.Lock()
+
+def parse_imports(path):
+    """解析一个Python文件中的导入语句，按路径和修改时间缓存结果"""
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _parse_cache_lock:
+        cached = _parse_cache.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), filename=path)
+    visitor = _ImportVisitor()
+    visitor.visit(tree)
+    
+    with _parse_cache_lock:
+        _parse_cache[path] = (stamp, visitor.imports)
+    return visitor.imports
+
+# 标准库模块名（Python 3.10+提供，旧版本退化为内置模块列表）
+STDLIB_MODULES = set(getattr(sys, 'stdlib_module_names', ())) | set(sys.builtin_module_names)
+
+class ImportGraph:
+    """导入关系图：本地模块、标准库、第三方库分开保存"""
+    
+    def __init__(self, py_file):
+        self.py_file = os.path.abspath(py_file)
+        self.base_dir = os.path.dirname(self.py_file)
+        self.local = {}         # 本地模块名 -> 文件路径（主程序为 __main__）
+        self.edges = {}         # 本地模块名 -> 它导入的模块名集合
+        self.stdlib = set()
+        self.third_party = set()
+        self.eager = set()      # 在模块顶层导入（启动时就会加载）的模块
+        self.optional = set()   # 只在try块中导入的模块（缺失时程序可能仍能运行）
+        self.errors = {}        # 解析失败的文件 -> 错误信息
+    
+    @property
+    def files(self):
+        return sorted(self.local.values())
+    
+    def classify(self, module):
+        top = module.split('.')[0]
+        if top in STDLIB_MODULES or top == '__main__':
+            return 'stdlib'
+        return 'third_party'
+    
+    def top_level(self, modules):
+        """按顶层包名分组"""
+        groups = {}
+        for module in sorted(modules):
+            groups.setdefault(module.split('.')[0], []).append(module)
+        return groups
+
+def _resolve_local(base_dir, module_name):
+    """把模块名解析为本地文件，返回 [(模块名, 路径), ...]（包含沿途的包），找不到返回空列表"""
+    parts = module_name.split('.')
+    found = []
+    for i in range(1, len(parts) + 1):
+        stem = os.path.join(base_dir, *parts[:i])
+        for candidate in (os.path.join(stem, '__init__.py'), stem + '.py'):
+            if os.path.isfile(candidate):
+                found.append(('.'.join(parts[:i]), candidate))
+                break
+        else:
+            # 包目录存在但缺少__init__.py时按命名空间包继续查找
+            if i < len(parts) and os.path.isdir(stem):
+                continue
+            return found if i > 1 and found else []
+    return found
+
+def scan_imports(py_file, max_workers=None):
+    """从主程序开始递归扫描所有可达的本地模块，返回ImportGraph
+    
+    同一层的文件在线程池中并行解析，解析结果按路径和修改时间缓存。
+    """
+    graph = ImportGraph(py_file)
+    graph.local['__main__'] = graph.py_file
+    pending = [('__main__', graph.py_file)]
+    required = set()
+    
+    with ThreadPoolExecutor(max_workers=max_workers or min(32, (os.cpu_count() or 1) * 4)) as executor:
+        while pending:
+            futures = {executor.submit(parse_imports, path): (name, path) for name, path in pending}
+            pending = []
+            for future in as_completed(futures):
+                name, path = futures[future]
+                try:
+                    imports = future.result()
+                except (OSError, SyntaxError, ValueError) as e:
+                    graph.errors[path] = str(e)
+                    imports = []
+                
+                is_package = os.path.basename(path) == '__init__.py'
+                package = name if is_package else name.rpartition('.')[0]
+                if name == '__main__':
+                    package = ''
+                
+                targets = graph.edges.setdefault(name, set())
+                for module, level, names, in_function, in_try in imports:
+                    # 相对导入：按当前模块所在的包计算绝对名称
+                    if level:
+                        base = package.split('.') if package else []
+                        if level - 1 > len(base) or not base:
+                            continue
+                        base = base[:len(base) - (level - 1)]
+                        module = '.'.join(base + ([module] if module else []))
+                    
+                    # from X import Y 中的 Y 可能是子模块
+                    candidates = [module] if module else []
+                    candidates += [f"{module}.{n}" if module else n for n in names if n != '*']
+                    
+                    for candidate in candidates:
+                        resolved = _resolve_local(graph.base_dir, candidate)
+                        if resolved:
+                            for local_name, local_path in resolved:
+                                if local_name != name:
+                                    targets.add(local_name)
+                                if local_name not in graph.local:
+                                    graph.local[local_name] = local_path
+                                    pending.append((local_name, local_path))
+                        elif candidate == module:
+                            # 非本地模块只记录 from 之后的模块名，不把导入的函数/类当作模块
+                            targets.add(candidate)
+                            kind = graph.classify(candidate)
+                            (graph.stdlib if kind == 'stdlib' else graph.third_party).add(candidate)
+                            if not in_function:
+                                graph.eager.add(candidate)
+                            (graph.optional if in_try else required).add(candidate)
+    
+    # 只要有一处不在try块中导入，就不算可选
+    graph.optional -= required
+    return graph
+
+def find_local_modules(py_file):
+    """找出主程序及其递归导入的本地模块文件"""
+    return scan_imports(py_file).files
+
+def build_zipapp(options, log=print, mark=None):
+    """把主程序和它导入的本地模块打成可直接运行的zipapp（第三方库由运行时的Python环境提供）
+    
+    mark在扫描结束、开始写入归档时调用。返回 {'path', 'files', 'external', 'scan_seconds', 'write_seconds'}。
+    """
+    start = time.perf_counter()
+    graph = scan_imports(options['py_file'])
+    for path, error in graph.errors.items():
+        log(f"⚠️  解析失败: {path}: {error}")
+    files = {name: path for name, path in graph.local.items() if name != '__main__'}
+    
+    # 隐藏导入：本地模块一起打包，其余模块由运行环境提供
+    external = sorted(graph.third_party)
+    for module in options['hidden_imports'].split(','):
+        module = module.strip()
+        if not module:
+            continue
+        resolved = _resolve_local(graph.base_dir, module)
+        if resolved:
+            for name, path in resolved:
+                files.setdefault(name, path)
+        elif module not in external:
+            external.append(module)
+    scan_seconds = time.perf_counter() - start
+    if mark:
+        mark('写入归档')
+    
+    # 主程序以模块的形式放入归档，由__main__.py按 __main__ 运行
+    start = time.perf_counter()
+    main_name = os.path.splitext(os.path.basename(graph.py_file))[0]
+    if not main_name.isidentifier() or main_name in files:
+        main_name = '__pytoexe_main__'
+    bootstrap = f"import runpy\nrunpy.run_module({main_name!r}, run_name='__main__', alter_sys=True)\n"
+    
+    output = get_exe_path(options)
+    os.makedirs(options['output_dir'], exist_ok=True)
+    tmp_file = output + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(b'#!/usr/bin/env python3\n')
+        with zipfile.ZipFile(f, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('__main__.py', bootstrap)
+            archive.write(graph.py_file, f"{main_name}.py")
+            for path in sorted(set(files.values())):
+                archive.write(path, os.path.relpath(path, graph.base_dir).replace(os.sep, '/'))
+    os.chmod(tmp_file, 0o755)
+    os.replace(tmp_file, output)
+    return {'path': output, 'files': len(files) + 1, 'external': external,
+            'scan_seconds': scan_seconds, 'write_seconds': time.perf_counter() - start}
+
+# 监视模式：检查源码的间隔，以及最后一次修改后等待多久再构建（秒）
+WATCH_POLL_SECONDS = 0.5
+WATCH_DEBOUNCE_SECONDS = 1.0
+
+class SourceWatcher:
+    """在后台线程中监视主程序及其递归导入的本地模块，内容变化且稳定一段时间后回调
+    
+    先比较修改时间和大小，有变化时再比较内容哈希，只保存未修改的文件不会触发回调；
+    在debounce秒内连续保存的多个文件合并为一次回调 on_change(变化的文件列表)。
+    """
+    
+    def __init__(self, py_file, on_change, interval=WATCH_POLL_SECONDS, debounce=WATCH_DEBOUNCE_SECONDS):
+        self.py_file = os.path.abspath(py_file)
+        self.on_change = on_change
+        self.interval = interval
+        self.debounce = debounce
+        self.files = {}     # 路径 -> (修改时间, 大小, 内容哈希)
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        self.poll()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def poll(self):
+        """检查一次，返回内容发生变化（包括删除）的文件"""
+        changed = []
+        for path in list(self.files) or find_local_modules(self.py_file):
             try:
-                subprocess.check_call([sys.executable, "-m", "pip", "install", "pyinstaller"])
-                messagebox.showinfo("成功", "PyInstaller安装成功！")
-                return True
-            except:
-                messagebox.showerror("错误", "安装失败，请手动运行: pip install pyinstaller")
-                return False
-        return False
+                stat = os.stat(path)
+            except OSError:
+                if self.files.pop(path, None):
+                    changed.append(path)
+                continue
+            old = self.files.get(path)
+            if old and old[:2] == (stat.st_mtime_ns, stat.st_size):
+                continue
+            try:
+                digest = hash_file(path).hexdigest()
+            except OSError:
+                continue
+            self.files[path] = (stat.st_mtime_ns, stat.st_size, digest)
+            if old and old[2] != digest:
+                changed.append(path)
+        
+        # 源码变化后导入关系可能变了，重新确定要监视的文件
+        if changed:
+            closure = set(find_local_modules(self.py_file))
+            for path in set(self.files) - closure:
+                del self.files[path]
+            for path in closure - set(self.files):
+                try:
+                    stat = os.stat(path)
+                    self.files[path] = (stat.st_mtime_ns, stat.st_size, hash_file(path).hexdigest())
+                except OSError:
+                    pass
+        return changed
+    
+    def _run(self):
+        pending = set()
+        last_change = 0
+        while not self._stop.wait(self.interval):
+            try:
+                changed = self.poll()
+            except Exception:
+                continue
+            if changed:
+                pending.update(changed)
+                last_change = time.monotonic()
+            elif pending and time.monotonic() - last_change >= self.debounce:
+                self.on_change(sorted(pending))
+                pending = set()
 
-if __name__ == "__main__":
-    if check_dependencies():
-        app = UniversalPyToExe()
-        app.run()
\ No newline at end of file
+def hash_file(path, digest=None):
+    """计算文件内容的SHA-256"""
+    digest = digest or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest
+
+_pyinstaller_versions = {}
+
+def get_pyinstaller_version():
+    """获取PATH中PyInstaller的版本（按pyinstaller命令的路径缓存）"""
+    pyinstaller = shutil.which("pyinstaller") or "pyinstaller"
+    if pyinstaller not in _pyinstaller_versions:
+        try:
+            result = subprocess.run([pyinstaller, "--version"],
+                                    capture_output=True, text=True, timeout=30)
+            _pyinstaller_versions[pyinstaller] = result.stdout.strip() or "未知"
+        except Exception:
+            _pyinstaller_versions[pyinstaller] = "未知"
+    return _pyinstaller_versions[pyinstaller]
+
+def parse_version(text):
+    """把 '6.22.3' 这样的版本号转换成整数元组，无法解析时返回None"""
+    match = re.match(r'\d+(\.\d+)*', text.strip())
+    return tuple(int(part) for part in match.group(0).split('.')) if match else None
+
+def compress_level_supported():
+    """PATH中的PyInstaller是否读取 PYINSTALLER_ZLIB_COMPRESSION_LEVEL（版本未知时按不支持处理）"""
+    version = parse_version(get_pyinstaller_version())
+    return version is not None and version >= parse_version(ZLIB_LEVEL_MIN_PYINSTALLER)
+
+def find_pyinstaller_python():
+    """找到PATH中pyinstaller命令所用的解释器（读取脚本的#!行）"""
+    pyinstaller = shutil.which('pyinstaller')
+    if pyinstaller:
+        try:
+            with open(pyinstaller, 'rb') as f:
+                first_line = f.readline().decode('utf-8', errors='ignore').strip()
+            if first_line.startswith('#!'):
+                parts = first_line[2:].split()
+                if parts and os.path.basename(parts[0]) == 'env' and len(parts) > 1:
+                    return shutil.which(parts[1])
+                if parts:
+                    return parts[0]
+        except OSError:
+            pass
+    return sys.executable
+
+_build_interpreters = {}
+
+def get_build_interpreter():
+    """运行PyInstaller的解释器：路径、完整版本和平台（每个路径只查询一次）"""
+    python = find_pyinstaller_python() or sys.executable
+    if python not in _build_interpreters:
+        try:
+            result = subprocess.run([python, '-c', "import platform, sys; print(sys.version, platform.platform(), sep='|')"],
+                                    capture_output=True, text=True, timeout=30)
+            version = result.stdout.strip() if result.returncode == 0 else ''
+        except (OSError, subprocess.SubprocessError):
+            version = ''
+        # 不解析符号链接：虚拟环境的python通常链接到同一个基础解释器，但安装的包不同
+        _build_interpreters[python] = f"{os.path.abspath(python)}|{version or '未知'}"
+    return _build_interpreters[python]
+
+def hash_command(cmd, digest, skip_paths=True):
+    """把打包命令和运行PyInstaller的解释器/PyInstaller版本写入哈希（--clean不影响产物，总是跳过）"""
+    digest.update(f"{get_build_interpreter()}|{get_pyinstaller_version()}\n".encode())
+    for arg in cmd:
+        if arg == '--clean':
+            continue
+        if skip_paths and arg.startswith(('--distpath=', '--workpath=', '--specpath=')):
+            continue
+        digest.update(arg.encode('utf-8') + b'\0')
+    return digest
+
+def compute_build_key(options, cmd):
+    """根据源码、本地导入、打包命令和解释器/PyInstaller版本计算缓存键"""
+    # 输出路径不影响产物内容，不参与计算
+    digest = hash_command(cmd, hashlib.sha256())
+    digest.update(upx_stage_key(options).encode('utf-8'))
+    digest.update(archive_options_key(options).encode('utf-8'))
+    
+    base_dir = os.path.dirname(os.path.abspath(options['py_file']))
+    for path in find_local_modules(options['py_file']):
+        digest.update(os.path.relpath(path, base_dir).encode('utf-8') + b'\0')
+        hash_file(path, digest)
+    
+    icon_path = options['icon_path']
+    if icon_path and os.path.exists(icon_path):
+        hash_file(icon_path, digest)
+    return digest.hexdigest()
+
+class IncrementalState:
+    """记录增量构建的源码指纹和打包选项，判断是否需要重新构建"""
+    
+    STATE_NAME = 'pytoexe_state.json'
+    
+    def __init__(self, job_dir, options, cmd):
+        self.state_file = os.path.join(job_dir, self.STATE_NAME)
+        self.options = options
+        digest = hash_command(cmd, hashlib.sha256(), skip_paths=False)
+        digest.update(upx_stage_key(options).encode('utf-8'))
+        digest.update(archive_options_key(options).encode('utf-8'))
+        self.options_key = digest.hexdigest()
+        self.previous = self._load()
+        self.sources = {}
+    
+    def _load(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _source_paths(self):
+        paths = find_local_modules(self.options['py_file'])
+        icon_path = self.options['icon_path']
+        if icon_path and os.path.exists(icon_path):
+            paths.append(os.path.abspath(icon_path))
+        return paths
+    
+    def check(self):
+        """返回 (选项是否变化, 变化的文件列表)"""
+        old_sources = (self.previous or {}).get('sources', {})
+        changed = []
+        for path in self._source_paths():
+            old = old_sources.get(path)
+            try:
+                stat = os.stat(path)
+                # 修改时间和大小都没变时认为内容没变，否则再比较内容哈希
+                if old and old['mtime'] == stat.st_mtime_ns and old['size'] == stat.st_size:
+                    self.sources[path] = old
+                    continue
+                entry = {'mtime': stat.st_mtime_ns, 'size': stat.st_size,
+                         'sha256': hash_file(path).hexdigest()}
+            except OSError:
+                # 扫描后被删除或无法读取：按已变化处理，不记录指纹，下次构建时重新检查
+                changed.append(path)
+                continue
+            self.sources[path] = entry
+            if not old or old['sha256'] != entry['sha256']:
+                changed.append(path)
+        changed.extend(path for path in old_sources if path not in self.sources and path not in changed)
+        
+        options_changed = not self.previous or self.previous.get('options_key') != self.options_key
+        return options_changed, changed
+    
+    def invalidate_stale_tocs(self, changed_files):
+        """PyInstaller按整秒比较修改时间，与上次构建同一秒内的修改会被忽略，这时删除各阶段记录强制重新处理"""
+        work_dir = os.path.join(os.path.dirname(self.state_file), self.options['app_name'])
+        if not os.path.isdir(work_dir):
+            return False
+        toc_files = [os.path.join(work_dir, name) for name in os.listdir(work_dir) if name.endswith('.toc')]
+        if not toc_files:
+            return False
+        last_build = max(int(os.stat(path).st_mtime) for path in toc_files)
+        if any(int(os.stat(path).st_mtime) <= last_build for path in changed_files if os.path.exists(path)):
+            for path in toc_files:
+                os.remove(path)
+            return True
+        return False
+    
+    def save(self):
+        with open(self.state_file, 'w', encoding='utf-8') as f:
+            json.dump({'options_key': self.options_key, 'sources': self.sources},
+                      f, ensure_ascii=False, indent=2)
+
+class BuildTimeline:
+    """实时解析PyInstaller输出：划分构建阶段并记录时间，分类整理警告
+    
+    同时记录每个检查阶段（Analysis/PYZ/PKG/EXE/COLLECT）是复用了上次结果还是重新计算。
+    """
+    
+    CHECK_RE = re.compile(r'INFO: checking (\w+)')
+    
+    # 阶段开始的标志（按出现顺序依次切换）
+    PHASE_MARKERS = [
+        (re.compile(r'INFO: checking Analysis'), 'Analysis'),
+        (re.compile(r'Initializing module dependency graph'), '模块图'),
+        (re.compile(r'Looking for dynamic libraries'), '二进制依赖'),
+        (re.compile(r'INFO: checking PYZ'), 'PYZ'),
+        (re.compile(r'INFO: checking PKG'), 'PKG'),
+        (re.compile(r'INFO: checking EXE'), 'EXE'),
+        (re.compile(r'INFO: checking COLLECT'), 'COLLECT'),
+        (re.compile(r'\bUPX\b|\bupx\b'), 'UPX'),
+    ]
+    
+    # 警告分类（按顺序匹配第一个）
+    WARNING_CATEGORIES = [
+        ('hidden_import', re.compile(r'[Hh]idden import .* not found')),
+        ('library', re.compile(r'[Ll]ib(rary)? not found|[Cc]annot find .*\.(dll|so|dylib)')),
+        ('hook', re.compile(r'[Hh]ook|collect_(submodules|data_files)')),
+        ('deprecation', re.compile(r'[Dd]eprecat')),
+        ('error', re.compile(r'ERROR')),
+        ('other', re.compile(r'')),
+    ]
+    
+    WARNING_NAMES = {
+        'hidden_import': '隐藏导入未找到',
+        'library': '动态库缺失',
+        'hook': '钩子警告',
+        'deprecation': '弃用提示',
+        'error': '错误',
+        'other': '其他警告'
+    }
+    
+    def __init__(self):
+        self.start = time.time()
+        self.end = None
+        self.phases = []      # {'name', 'start', 'end', 'reused'}，时间为相对构建开始的秒数
+        self.checks = []      # [检查阶段名, 是否重新计算]
+        self.warnings = {}    # 分类 -> [{'line', 'phase', 'text'}]
+        self.line_count = 0
+        self._lock = threading.Lock()
+    
+    def mark(self, name, reused=None):
+        """开始一个新阶段（也可以由打包后的其他步骤调用）"""
+        now = time.time() - self.start
+        with self._lock:
+            if self.phases and self.phases[-1]['end'] is None:
+                if self.phases[-1]['name'] == name:
+                    return
+                self.phases[-1]['end'] = now
+            self.phases.append({'name': name, 'start': now, 'end': None, 'reused': reused})
+    
+    def feed(self, line):
+        self.line_count += 1
+        if not self.phases:
+            # 第一行输出之前是启动PyInstaller的时间
+            self.mark('准备')
+        
+        match = self.CHECK_RE.search(line)
+        if match:
+            self.checks.append([match.group(1), False])
+        elif self.checks and ('INFO: Building ' in line or 'INFO: Rebuilding ' in line):
+            self.checks[-1][1] = True
+            with self._lock:
+                if self.phases and self.phases[-1]['name'] == self.checks[-1][0]:
+                    self.phases[-1]['reused'] = False
+        
+        for pattern, name in self.PHASE_MARKERS:
+            if pattern.search(line):
+                self.mark(name, reused=True if name == (match and match.group(1)) else None)
+                break
+        
+        if 'WARNING' in line or 'ERROR' in line:
+            for category, pattern in self.WARNING_CATEGORIES:
+                if pattern.search(line):
+                    with self._lock:
+                        self.warnings.setdefault(category, []).append({
+                            'line': self.line_count,
+                            'phase': self.phases[-1]['name'] if self.phases else '',
+                            'text': line.strip()
+                        })
+                    break
+    
+    def finish(self):
+        """结束计时，关闭最后一个阶段"""
+        self.end = time.time() - self.start
+        with self._lock:
+            if self.phases and self.phases[-1]['end'] is None:
+                self.phases[-1]['end'] = self.end
+    
+    def summary(self):
+        """返回 (复用的检查阶段, 重新计算的检查阶段)"""
+        reused = [name for name, rebuilt in self.checks if not rebuilt]
+        rebuilt = [name for name, rebuilt in self.checks if rebuilt]
+        return reused, rebuilt
+    
+    def snapshot(self):
+        """返回当前时间线的副本（可在其他线程中调用）"""
+        now = time.time() - self.start
+        with self._lock:
+            phases = [dict(phase, end=phase['end'] if phase['end'] is not None else now)
+                      for phase in self.phases]
+            warnings = {category: list(items) for category, items in self.warnings.items()}
+        return {
+            'started': datetime.fromtimestamp(self.start).isoformat(timespec='seconds'),
+            'total': self.end if self.end is not None else now,
+            'phases': phases,
+            'warnings': warnings,
+            'warning_count': sum(len(items) for items in warnings.values())
+        }
+
+class BuildCache:
+    """按内容哈希保存打包产物（容量由SharedCache统一按最近使用时间淘汰）"""
+    
+    _lock = threading.Lock()
+    
+    def __init__(self, root=None):
+        self.root = root or os.path.join(CACHE_ROOT, 'builds')
+        self.index_file = os.path.join(self.root, 'index.json')
+    
+    def _load_index(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_index(self, index):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_file = self.index_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.index_file)
+    
+    def restore(self, key, artifact_path):
+        """缓存命中时把产物复制到目标位置，返回是否命中"""
+        with self._lock:
+            index = self._load_index()
+            entry = index.get(key)
+            cached_path = os.path.join(self.root, key, 'artifact')
+            if not entry or not os.path.exists(cached_path):
+                return False
+            entry['last_used'] = time.time()
+            self._save_index(index)
+        
+        if os.path.isdir(artifact_path):
+            shutil.rmtree(artifact_path)
+        elif os.path.exists(artifact_path):
+            os.remove(artifact_path)
+        os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+        if os.path.isdir(cached_path):
+            shutil.copytree(cached_path, artifact_path, symlinks=True)
+        else:
+            shutil.copy2(cached_path, artifact_path)
+        return True
+    
+    def store(self, key, artifact_path, name=''):
+        """保存产物到缓存"""
+        entry_dir = os.path.join(self.root, key)
+        tmp_dir = entry_dir + f'.tmp{os.getpid()}_{threading.get_ident()}'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        
+        # 先复制到临时目录再改名，避免留下不完整的缓存
+        target = os.path.join(tmp_dir, 'artifact')
+        if os.path.isdir(artifact_path):
+            shutil.copytree(artifact_path, target, symlinks=True)
+        else:
+            shutil.copy2(artifact_path, target)
+        size = get_path_size(target)
+        
+        with self._lock:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+            index = self._load_index()
+            index[key] = {'name': name, 'size': size, 'last_used': time.time()}
+            self._save_index(index)
+    
+    def entries(self):
+        """返回缓存条目 {键: {'name', 'size', 'last_used'}}"""
+        with self._lock:
+            return self._load_index()
+    
+    def remove(self, key):
+        """删除一个缓存条目"""
+        with self._lock:
+            index = self._load_index()
+            index.pop(key, None)
+            self._save_index(index)
+        shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+
+def get_path_size(path):
+    """计算文件或目录的总大小（字节）"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            file_path = os.path.join(dirpath, filename)
+            if not os.path.islink(file_path):
+                total += os.path.getsize(file_path)
+    return total
+
+# 导入耗时超过这个值（或超过总耗时5%）的模块才给出优化建议
+HEAVY_IMPORT_MS = 20
+
+IMPORTTIME_RE = re.compile(r'^import time:\s*(\d+) \|\s*(\d+) \| ( *)(\S.*)$')
+
+def profile_import_time(graph, python=None, timeout=60):
+    """用 -X importtime 导入程序依赖的模块，返回 (导入树, 总耗时微秒)
+    
+    只导入本地模块（主程序除外）和代码中直接导入的模块，不运行主程序本身。
+    """
+    modules = sorted(graph.stdlib | graph.third_party) + sorted(
+        name for name in graph.local if name != '__main__')
+    code = (
+        "import sys\n"
+        f"sys.path.insert(0, {graph.base_dir!r})\n"
+        f"for name in {modules!r}:\n"
+        "    try:\n"
+        "        __import__(name)\n"
+        "    except BaseException:\n"
+        "        pass\n"
+    )
+    result = subprocess.run([python or sys.executable, "-X", "importtime", "-c", code],
+                            cwd=graph.base_dir, stdin=subprocess.DEVNULL,
+                            capture_output=True, text=True, errors='ignore', timeout=timeout)
+    return parse_import_time(result.stderr)
+
+def parse_import_time(output):
+    """解析 -X importtime 的输出，返回按累计耗时排序的导入树"""
+    # 输出是后序的：子模块先于父模块打印，缩进表示层级
+    pending = {}
+    for line in output.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        depth = len(match.group(3)) // 2
+        node = {
+            'name': match.group(4).strip(),
+            'self_us': int(match.group(1)),
+            'cumulative_us': int(match.group(2)),
+            'children': pending.pop(depth + 1, [])
+        }
+        pending.setdefault(depth, []).append(node)
+    
+    roots = pending.get(0, [])
+    
+    def sort(nodes):
+        nodes.sort(key=lambda n: n['cumulative_us'], reverse=True)
+        for node in nodes:
+            sort(node['children'])
+    
+    sort(roots)
+    return roots, sum(node['cumulative_us'] for node in roots)
+
+def iter_import_nodes(nodes):
+    """遍历导入树中的所有节点"""
+    for node in nodes:
+        yield node
+        yield from iter_import_nodes(node['children'])
+
+def annotate_import_advice(roots, graph, total_us):
+    """给耗时较多的模块标注优化建议（延迟导入或排除模块）"""
+    threshold_us = max(HEAVY_IMPORT_MS * 1000, total_us * 0.05)
+    direct = graph.stdlib | graph.third_party
+    direct_tops = {m.split('.')[0] for m in direct} | {m.split('.')[0] for m in graph.local}
+    
+    def visit(nodes, parent_top):
+        for node in nodes:
+            name = node['name']
+            top = name.split('.')[0]
+            if node['cumulative_us'] >= threshold_us:
+                if name in direct and name in graph.eager:
+                    node['advice'] = "顶层导入较慢，可考虑延迟导入"
+                elif name in direct:
+                    node['advice'] = "已在函数内导入"
+                elif (parent_top and top != parent_top and top not in direct_tops
+                      and graph.classify(top) != 'stdlib'):
+                    # 被其他第三方包顺带导入、代码本身没有用到的包
+                    node['advice'] = f"由 {parent_top} 间接导入，可尝试 --exclude-module {top}"
+            visit(node['children'], top)
+    
+    visit(roots, None)
+
+# 启动基准测试钩子：设置了PYTOEXE_BENCH环境变量时记录时间并立即退出
+BENCH_HOOK_PATH = os.path.join(CACHE_ROOT, 'pytoexe_bench_hook.py')
+BENCH_HOOK_SOURCE = """import os, time
+if os.environ.get('PYTOEXE_BENCH'):
+    with open(os.environ['PYTOEXE_BENCH'], 'w') as f:
+        f.write(repr(time.time()))
+    os._exit(0)
+"""
+
+# 冷启动测试次数（每次运行前尽量把程序文件移出系统缓存）
+BENCH_COLD_RUNS = 3
+
+# 启动耗时比上次慢这么多就提示回退
+BENCH_REGRESSION_RATIO = 0.2
+
+# 产物内容比较时每类最多列出的条目数
+DIFF_LIST_LIMIT = 10
+
+def wants_benchmark(options):
+    """打开了启动基准测试，或者设置了启动耗时预算（需要实测才能检查）"""
+    return options['benchmark'] or options['startup_budget_ms'] > 0
+
+def ensure_bench_hook():
+    """写出基准测试用的运行时钩子文件"""
+    try:
+        with open(BENCH_HOOK_PATH, 'r', encoding='utf-8') as f:
+            if f.read() == BENCH_HOOK_SOURCE:
+                return
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(BENCH_HOOK_PATH), exist_ok=True)
+    with open(BENCH_HOOK_PATH, 'w', encoding='utf-8') as f:
+        f.write(BENCH_HOOK_SOURCE)
+
+def evict_from_page_cache(path):
+    """尽量把文件移出操作系统的页缓存，用于模拟冷启动（仅支持posix_fadvise的系统）"""
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+    paths = [path] if os.path.isfile(path) else [
+        os.path.join(dirpath, name) for dirpath, _, names in os.walk(path) for name in names]
+    for file_path in paths:
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+    return True
+
+def percentile(values, pct):
+    """计算百分位数（最近秩法）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+def summarize_times(values):
+    """汇总一组耗时（毫秒）"""
+    if not values:
+        return None
+    return {'runs': len(values), 'min': min(values), 'p50': percentile(values, 50),
+            'p95': percentile(values, 95), 'max': max(values)}
+
+def benchmark_executable(exe_path, runs=10, args='', timeout=60, cold_runs=BENCH_COLD_RUNS):
+    """多次启动打包出的程序并测量启动耗时
+    
+    不指定启动参数时依赖内置钩子：程序在运行主脚本前记录时间并退出，
+    因此还能得到"启动到主脚本"的耗时（包括单文件模式的解压）。
+    """
+    exe_path = os.path.abspath(exe_path)
+    # 目录模式需要把整个程序目录移出缓存
+    app_dir = os.path.dirname(exe_path)
+    artifact = app_dir if os.path.isdir(os.path.join(app_dir, '_internal')) else exe_path
+    args = args.split() if args.strip() else []
+    use_hook = not args
+    results = {'cold': [], 'warm': [], 'pre_main': [], 'failed': 0}
+    
+    kwargs = {}
+    if sys.platform != 'win32':
+        kwargs['start_new_session'] = True
+    
+    with tempfile.TemporaryDirectory(prefix='pytoexe_bench_') as temp_dir:
+        marker = os.path.join(temp_dir, 'started')
+        env = dict(os.environ)
+        if use_hook:
+            env['PYTOEXE_BENCH'] = marker
+        
+        for i in range(cold_runs + runs):
+            cold = i < cold_runs
+            if cold and not evict_from_page_cache(artifact):
+                continue
+            if os.path.exists(marker):
+                os.remove(marker)
+            
+            start = time.time()
+            process = subprocess.Popen([exe_path] + args, cwd=temp_dir, env=env,
+                                       stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL, **kwargs)
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                kill_process_tree(process)
+                process.wait()
+                results['failed'] += 1
+                continue
+            elapsed_ms = (time.time() - start) * 1000
+            
+            if use_hook:
+                try:
+                    with open(marker, 'r') as f:
+                        started = float(f.read())
+                except (OSError, ValueError):
+                    # 没有执行到钩子，说明程序启动失败或钩子没有打包进去
+                    results['failed'] += 1
+                    continue
+                if not cold:
+                    results['pre_main'].append((started - start) * 1000)
+            results['cold' if cold else 'warm'].append(elapsed_ms)
+    
+    return {
+        'cold': summarize_times(results['cold']),
+        'warm': summarize_times(results['warm']),
+        'pre_main': summarize_times(results['pre_main']),
+        'failed': results['failed'],
+        'args': ' '.join(args)
+    }
+
+def load_bench_history(history_file):
+    """读取启动基准测试历史记录"""
+    try:
+        with open(history_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+# PyInstaller附加在可执行文件末尾的CArchive格式（见PyInstaller/archive/readers.py）
+CARCHIVE_MAGIC = b'MEI\014\013\012\013\016'
+CARCHIVE_COOKIE = struct.Struct('!8sIIII64s')
+CARCHIVE_TOC_ENTRY = struct.Struct('!IIIIBc')
+PYZ_MAGIC = b'PYZ\0'
+
+# 体积分析的类别
+SIZE_CATEGORIES = {
+    'python': 'Python模块',
+    'extension': '扩展模块',
+    'library': '共享库',
+    'data': '数据文件',
+    'bootstrap': '启动脚本',
+    'bootloader': '引导程序',
+}
+
+EXTENSION_MODULE_RE = re.compile(r'(\.(cpython|pypy)[^/]*|\.abi3)\.so$')
+SHARED_LIBRARY_RE = re.compile(r'(\.so(\.\d+)*|\.dll|\.dylib)$', re.IGNORECASE)
+PACKAGE_DIR_RE = re.compile(r'(-[^-]*\.(dist|egg)-info|\.libs|\.data)$')
+
+def read_pyz_toc(mm, start, length):
+    """读取PYZ归档的目录，返回[(模块名, 压缩后大小, 在文件中的偏移)]，Python版本不兼容时返回None"""
+    if mm[start:start + 4] != PYZ_MAGIC:
+        return None
+    toc_offset, = struct.unpack_from('!i', mm, start + 8)
+    try:
+        toc = marshal.loads(mm[start + toc_offset:start + length])
+    except (ValueError, EOFError, TypeError):
+        return None
+    # 旧版本是列表，新版本是字典；条目都是 (类型, 偏移, 长度)
+    if isinstance(toc, list):
+        toc = dict(toc)
+    return [(name, entry[2], start + entry[1]) for name, entry in toc.items()]
+
+def read_carchive(exe_path):
+    """用mmap读取可执行文件中CArchive的目录，不解压任何内容"""
+    with open(exe_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        cookie_pos = mm.rfind(CARCHIVE_MAGIC)
+        if cookie_pos < 0:
+            raise ValueError(f"{os.path.basename(exe_path)} 不是PyInstaller生成的程序")
+        _, archive_size, toc_offset, toc_size, _, _ = CARCHIVE_COOKIE.unpack_from(mm, cookie_pos)
+        start = cookie_pos + CARCHIVE_COOKIE.size - archive_size
+        
+        entries = []
+        pos, end = start + toc_offset, start + toc_offset + toc_size
+        while pos < end:
+            entry_size, offset, size, uncompressed, compressed, typecode = CARCHIVE_TOC_ENTRY.unpack_from(mm, pos)
+            name = mm[pos + CARCHIVE_TOC_ENTRY.size:pos + entry_size].rstrip(b'\0').decode('utf-8')
+            pos += entry_size
+            entry = {'name': name, 'typecode': typecode.decode('ascii'), 'offset': start + offset,
+                     'size': size, 'uncompressed': uncompressed, 'compressed': bool(compressed)}
+            if entry['typecode'] == 'z':
+                entry['pyz'] = read_pyz_toc(mm, start + offset, size)
+            entries.append(entry)
+    return {'archive_size': archive_size, 'entries': entries}
+
+def classify_bundle_file(name):
+    """根据打包文件的路径判断类别和所属的包"""
+    parts = name.replace('\\', '/').split('/')
+    base = parts[-1]
+    lower = base.lower()
+    if lower == 'base_library.zip':
+        return 'python', base
+    
+    # 标准库的扩展模块（lib-dynload）按模块名归类
+    if 'lib-dynload' in parts[:-1]:
+        return 'extension', base.split('.')[0]
+    
+    if lower.endswith('.pyd') or EXTENSION_MODULE_RE.search(lower):
+        category = 'extension'
+    elif SHARED_LIBRARY_RE.search(lower):
+        category = 'library'
+    elif lower.endswith(('.py', '.pyc')):
+        category = 'python'
+    else:
+        category = 'data'
+    
+    # 包目录下的文件归到包名（numpy.libs、xxx-1.0.dist-info 也归到对应的包）
+    if len(parts) > 1:
+        return category, PACKAGE_DIR_RE.sub('', parts[0])
+    if category == 'library':
+        return category, SHARED_LIBRARY_RE.sub('', base)
+    return category, base.split('.')[0]
+
+def analyze_bundle(artifact_path):
+    """分析打包产物的体积构成（单文件为可执行文件，目录模式为程序目录）"""
+    entries = []
+    
+    def add(name, category, package, size, uncompressed=None):
+        entries.append({'name': name, 'category': category, 'package': package, 'size': size,
+                        'uncompressed': size if uncompressed is None else uncompressed})
+    
+    if os.path.isdir(artifact_path):
+        app_dir = artifact_path
+        exe_path = os.path.join(app_dir, os.path.basename(app_dir) + EXE_SUFFIX)
+    else:
+        app_dir = None
+        exe_path = artifact_path
+    
+    # 可执行文件：引导程序 + 内嵌归档中的各个条目
+    archive = read_carchive(exe_path)
+    exe_size = os.path.getsize(exe_path)
+    add(os.path.basename(exe_path), 'bootloader', '引导程序', exe_size - archive['archive_size'])
+    overhead = archive['archive_size']
+    contents_dir = '.'
+    for entry in archive['entries']:
+        name, typecode, size = entry['name'], entry['typecode'], entry['size']
+        overhead -= size
+        if typecode == 'z' and entry['pyz'] is not None:
+            for module, length, _ in entry['pyz']:
+                add(module, 'python', module.split('.')[0], length)
+            overhead += size - sum(length for _, length, _ in entry['pyz'])
+        elif typecode in 'zZ':
+            add(name, 'python', name, size)
+        elif typecode in 'sMm':
+            package = 'PyInstaller' if name.startswith('pyi') or name == 'struct' else name
+            add(name, 'bootstrap', package, size, entry['uncompressed'])
+        elif typecode == 'o':
+            if name.startswith('pyi-contents-directory '):
+                contents_dir = name.split(' ', 1)[1]
+        else:
+            category, package = classify_bundle_file(name)
+            add(name, category, package, size, entry['uncompressed'])
+    # 归档目录、PYZ目录等结构开销
+    add('归档目录', 'bootstrap', 'PyInstaller', overhead)
+    
+    # 目录模式：程序目录中的其余文件
+    if app_dir:
+        contents_root = os.path.normpath(os.path.join(app_dir, contents_dir))
+        for root, _, files in os.walk(app_dir):
+            for file in files:
+                path = os.path.join(root, file)
+                if path == exe_path:
+                    continue
+                size = os.path.getsize(path)
+                rel = os.path.relpath(path, app_dir)
+                if path.startswith(contents_root + os.sep):
+                    category, package = classify_bundle_file(os.path.relpath(path, contents_root))
+                else:
+                    category, package = classify_bundle_file(rel)
+                add(rel.replace(os.sep, '/'), category, package, size)
+    
+    return {
+        'path': artifact_path,
+        'mode': 'onedir' if app_dir else 'onefile',
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'total_size': sum(e['size'] for e in entries),
+        'total_uncompressed': sum(e['uncompressed'] for e in entries),
+        'categories': summarize_bundle(entries),
+        'entries': sorted(entries, key=lambda e: e['size'], reverse=True)
+    }
+
+def measure_decompression(exe_path, repeat=3):
+    """测量解压可执行文件内嵌归档中全部压缩条目（包括PYZ中的每个模块）所需的时间，取最快的一次"""
+    archive = read_carchive(exe_path)
+    with open(exe_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        blocks = []
+        for entry in archive['entries']:
+            if entry['compressed']:
+                blocks.append(mm[entry['offset']:entry['offset'] + entry['size']])
+            if entry['typecode'] == 'z' and entry['pyz']:
+                blocks.extend(mm[offset:offset + length] for _, length, offset in entry['pyz'])
+    
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = sum(len(zlib.decompress(block)) for block in blocks)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {'seconds': best, 'blocks': len(blocks), 'bytes': size}
+
+def summarize_bundle(entries):
+    """按类别和包汇总体积，均按大小降序排列"""
+    categories = {}
+    for entry in entries:
+        category = categories.setdefault(entry['category'], {
+            'category': entry['category'], 'name': SIZE_CATEGORIES[entry['category']],
+            'size': 0, 'uncompressed': 0, 'count': 0, 'packages': {}})
+        package = category['packages'].setdefault(entry['package'], {
+            'name': entry['package'], 'size': 0, 'uncompressed': 0, 'count': 0})
+        for item in (category, package):
+            item['size'] += entry['size']
+            item['uncompressed'] += entry['uncompressed']
+            item['count'] += 1
+    
+    result = sorted(categories.values(), key=lambda c: c['size'], reverse=True)
+    for category in result:
+        category['packages'] = sorted(category['packages'].values(),
+                                      key=lambda p: p['size'], reverse=True)
+    return result
+
+def bundle_snapshot(report):
+    """保存用于下次比较的产物内容：{名称: [类别, 所属包, 大小]}"""
+    return {
+        'time': report['time'],
+        'total_size': report['total_size'],
+        'entries': {e['name']: [e['category'], e['package'], e['size']] for e in report['entries']}
+    }
+
+def diff_bundle_contents(previous, current):
+    """比较两次产物的内容：新增/移除的模块、各个包的体积变化、新增的二进制文件"""
+    old, new = previous['entries'], current['entries']
+    
+    def names(entries, categories):
+        return {name for name, (category, _, _) in entries.items() if category in categories}
+    
+    old_modules, new_modules = names(old, ('python',)), names(new, ('python',))
+    old_binaries, new_binaries = names(old, ('extension', 'library')), names(new, ('extension', 'library'))
+    
+    packages = {}
+    for sign, entries in ((-1, old), (1, new)):
+        for category, package, size in entries.values():
+            packages[package] = packages.get(package, 0) + sign * size
+    return {
+        'previous_time': previous['time'],
+        'total_delta': current['total_size'] - previous['total_size'],
+        'added_modules': sorted(new_modules - old_modules),
+        'removed_modules': sorted(old_modules - new_modules),
+        'added_binaries': sorted(new_binaries - old_binaries),
+        'removed_binaries': sorted(old_binaries - new_binaries),
+        'packages': sorted(((name, delta) for name, delta in packages.items() if delta),
+                           key=lambda item: abs(item[1]), reverse=True)
+    }
+
+# UPX参数与PyInstaller内置的UPX处理保持一致
+UPX_ARGS = ['--compress-icons=0', '--lzma', '-q'] + (['--strip-loadconf'] if sys.platform == 'win32' else [])
+UPX_TIMEOUT = 600
+
+def find_upx(upx_dir=''):
+    """查找upx可执行文件（指定目录优先，其次PATH）"""
+    if upx_dir:
+        return shutil.which('upx', path=upx_dir)
+    return shutil.which('upx')
+
+_upx_versions = {}
+
+def get_upx_version(upx):
+    """获取UPX版本（结果会缓存）"""
+    if upx not in _upx_versions:
+        try:
+            result = subprocess.run([upx, '--version'], capture_output=True, text=True, timeout=30)
+            _upx_versions[upx] = (result.stdout.splitlines() or ['未知'])[0].strip()
+        except Exception:
+            _upx_versions[upx] = '未知'
+    return _upx_versions[upx]
+
+class UpxStage:
+    """并行压缩程序目录中的二进制文件，按输入内容哈希缓存压缩结果
+    
+    缓存目录中：<哈希> 为压缩后的文件，<哈希>.skip 记录无法压缩的文件，
+    <哈希>.out 标记本阶段的输出（增量构建复用了上次的文件时不会重复压缩）。
+    容量由SharedCache统一按最近使用时间淘汰。
+    """
+    
+    def __init__(self, upx, exclude=(), root=None, max_workers=None):
+        self.upx = upx
+        self.exclude = list(exclude)
+        self.root = root or os.path.join(CACHE_ROOT, 'upx')
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.salt = f"{get_upx_version(upx)}|{' '.join(UPX_ARGS)}\n".encode('utf-8')
+    
+    def skip_reason(self, path, rel):
+        """返回不压缩该文件的原因，需要压缩时返回None"""
+        for pattern in self.exclude:
+            if fnmatch.fnmatch(rel, pattern) or fnmatch.fnmatch(os.path.basename(rel), pattern):
+                return f"排除规则 {pattern}"
+        # 与PyInstaller相同的自动排除：Qt插件、带完整性校验文件的库
+        lower = rel.lower()
+        if 'qt' in lower and '/plugins/' in f"/{lower}":
+            return "Qt插件"
+        directory, name = os.path.split(path)
+        if (os.path.isfile(os.path.join(directory, f".{name}.hmac"))
+                or os.path.isfile(os.path.splitext(path)[0] + '.chk')):
+            return "带完整性校验文件"
+        return None
+    
+    def compress(self, path, rel):
+        """压缩单个文件（优先使用缓存），返回报告条目"""
+        start = time.time()
+        original = os.path.getsize(path)
+        record = {'name': rel, 'original': original, 'compressed': original, 'seconds': 0.0}
+        
+        digest = hash_file(path, hashlib.sha256(self.salt)).hexdigest()
+        cached = os.path.join(self.root, digest)
+        if os.path.exists(cached + '.out'):
+            record['status'] = 'packed'
+        elif os.path.exists(cached):
+            shutil.copyfile(cached, path)
+            os.utime(cached)
+            record['status'] = 'cached'
+        elif os.path.exists(cached + '.skip'):
+            record['status'] = 'failed'
+        else:
+            temp = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+            shutil.copyfile(path, temp)
+            try:
+                result = subprocess.run([self.upx, *UPX_ARGS, temp], capture_output=True,
+                                        text=True, errors='replace', timeout=UPX_TIMEOUT)
+                if result.returncode != 0:
+                    with open(cached + '.skip', 'w', encoding='utf-8') as f:
+                        f.write(result.stdout + result.stderr)
+                    record['status'] = 'failed'
+                else:
+                    os.replace(temp, cached)
+                    shutil.copyfile(cached, path)
+                    record['status'] = 'compressed'
+            finally:
+                if os.path.exists(temp):
+                    os.remove(temp)
+        
+        if record['status'] in ('cached', 'compressed'):
+            open(os.path.join(self.root, hash_file(path, hashlib.sha256(self.salt)).hexdigest() + '.out'),
+                 'w').close()
+        record['compressed'] = os.path.getsize(path)
+        record['seconds'] = time.time() - start
+        return record
+    
+    def run(self, app_dir, exe_path):
+        """压缩程序目录中的扩展模块和共享库，返回压缩报告"""
+        os.makedirs(self.root, exist_ok=True)
+        start = time.time()
+        targets, excluded = [], []
+        for dirpath, _, filenames in os.walk(app_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if path == exe_path or os.path.islink(path):
+                    continue
+                rel = os.path.relpath(path, app_dir).replace(os.sep, '/')
+                if classify_bundle_file(rel)[0] not in ('extension', 'library'):
+                    continue
+                reason = self.skip_reason(path, rel)
+                if reason:
+                    excluded.append({'name': rel, 'reason': reason})
+                else:
+                    targets.append((path, rel))
+        
+        files = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self.compress, path, rel) for path, rel in targets]
+            for future in as_completed(futures):
+                files.append(future.result())
+        files.sort(key=lambda r: r['original'], reverse=True)
+        
+        return {
+            'upx': get_upx_version(self.upx),
+            'seconds': time.time() - start,
+            'original': sum(r['original'] for r in files),
+            'compressed': sum(r['compressed'] for r in files),
+            'files': files,
+            'excluded': excluded
+        }
+    
+    @staticmethod
+    def cached_files(root=None):
+        """返回缓存中的压缩结果 [(路径, 大小, 最近使用时间)]"""
+        root = root or os.path.join(CACHE_ROOT, 'upx')
+        if not os.path.isdir(root):
+            return []
+        entries = []
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if '.' not in name and os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+_site_distributions = {}
+_site_lock = threading.Lock()
+
+def load_site_distributions(site_dir):
+    """读取site-packages中所有发行包的RECORD，返回 {文件路径: (包名, 版本)}（结果会缓存）"""
+    with _site_lock:
+        if site_dir in _site_distributions:
+            return _site_distributions[site_dir]
+    files = {}
+    for dist in importlib.metadata.distributions(path=[site_dir]):
+        name, version = dist.metadata['Name'], dist.version
+        for file in dist.files or ():
+            files[os.path.normcase(os.path.normpath(os.path.join(site_dir, str(file))))] = (name, version)
+    with _site_lock:
+        _site_distributions[site_dir] = files
+    return files
+
+def find_distribution(path):
+    """根据文件路径找到所属的第三方发行包 (包名, 版本)，不在site-packages中时返回None"""
+    path = os.path.normcase(os.path.normpath(path))
+    marker = os.sep + 'site-packages' + os.sep
+    index = path.find(marker)
+    if index < 0:
+        return None
+    return load_site_distributions(path[:index + len(marker) - 1]).get(path)
+
+def read_analysis_toc(work_dir):
+    """读取PyInstaller的Analysis-00.toc，返回 (Python版本, [(目标名, 源文件, 类型)])"""
+    with open(os.path.join(work_dir, 'Analysis-00.toc'), 'r', encoding='utf-8') as f:
+        data = ast.literal_eval(f.read())
+    version = next((item.split()[0] for item in data
+                    if isinstance(item, str) and re.match(r'\d+\.\d+', item)), platform.python_version())
+    entries = [entry for item in data if isinstance(item, list) for entry in item
+               if isinstance(entry, tuple) and len(entry) == 3 and isinstance(entry[2], str)
+               and isinstance(entry[1], str)]
+    return version, entries
+
+# 体积预测：各发行包RECORD统计结果的缓存；单文件模式的压缩率（按常见程序的经验值估算）
+SIZE_ESTIMATE_FILE = os.path.join(CACHE_ROOT, 'dist_sizes.json')
+SIZE_ESTIMATE_ONEFILE_RATIO = 0.45
+
+_interpreter_info = {}
+
+def get_interpreter_info(python):
+    """读取解释器的模块搜索路径和Python共享库位置（结果会缓存）"""
+    if python not in _interpreter_info:
+        script = ("import json, sys, sysconfig; print(json.dumps({'path': sys.path, "
+                  "'version': '%d.%d' % sys.version_info[:2], 'libdir': sysconfig.get_config_var('LIBDIR'), "
+                  "'ldlibrary': sysconfig.get_config_var('LDLIBRARY'), 'base': sys.base_prefix}))")
+        result = subprocess.run([python, '-c', script], capture_output=True, text=True, timeout=30)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"无法运行 {python}")
+        _interpreter_info[python] = json.loads(result.stdout)
+    return _interpreter_info[python]
+
+def find_python_library(info):
+    """找到解释器的Python共享库（libpython / pythonXY.dll），找不到时返回None"""
+    candidates = []
+    if info.get('libdir') and info.get('ldlibrary'):
+        candidates.append(os.path.join(info['libdir'], info['ldlibrary']))
+    candidates.append(os.path.join(info['base'], f"python{info['version'].replace('.', '')}.dll"))
+    return next((path for path in candidates if os.path.isfile(path)), None)
+
+def get_interpreter_tag(version):
+    """解释器标识，如 py3.11-x86_64"""
+    return f"py{'.'.join(version.split('.')[:2])}-{platform.machine().lower()}"
+
+def normalize_dist_name(name):
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+class SizeEstimator:
+    """打包前根据已安装发行包的RECORD估算产物体积
+    
+    把扫描到的第三方导入映射到发行包，沿Requires-Dist找出间接依赖，按RECORD统计各包的文件大小；
+    共享缓存中有实际打包记录的包优先使用实测大小（只包含真正收集的文件）。
+    """
+    
+    _lock = threading.Lock()
+    
+    def __init__(self, python, cache_file=SIZE_ESTIMATE_FILE):
+        self.python = python
+        self.cache_file = cache_file
+    
+    def _load_cache(self):
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_cache(self, cache):
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        tmp_file = self.cache_file + f'.tmp{os.getpid()}_{threading.get_ident()}'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.cache_file)
+    
+    @staticmethod
+    def measure(dist):
+        """按RECORD统计一个发行包：顶层模块、依赖和各类文件的大小"""
+        totals = {'python': 0, 'native': 0, 'data': 0}
+        top_level = set()
+        for file in dist.files or ():
+            parts = file.parts
+            if not parts or parts[0] == '..' or PACKAGE_DIR_RE.search(parts[0]) or '__pycache__' in parts:
+                continue
+            name = file.name
+            if len(parts) == 1:
+                if not name.endswith(('.py', '.so', '.pyd')):
+                    continue
+                top_level.add(name.split('.')[0])
+            else:
+                top_level.add(parts[0])
+            
+            size = file.size
+            if size is None:
+                try:
+                    size = os.path.getsize(dist.locate_file(file))
+                except OSError:
+                    size = 0
+            if name.endswith('.py'):
+                totals['python'] += size
+            elif SHARED_LIBRARY_RE.search(name) or name.endswith('.pyd'):
+                totals['native'] += size
+            elif not name.endswith('.pyc'):
+                totals['data'] += size
+        
+        declared = (dist.read_text('top_level.txt') or '').split()
+        requires = []
+        for requirement in dist.requires or ():
+            # 只有安装了对应extra才需要的依赖不计入
+            if 'extra' in requirement.partition(';')[2]:
+                continue
+            match = re.match(r'\s*([A-Za-z0-9][A-Za-z0-9._-]*)', requirement)
+            if match:
+                requires.append(normalize_dist_name(match.group(1)))
+        return dict(totals, top_level=sorted(set(declared) | top_level), requires=requires)
+    
+    def load_distributions(self, site_dirs):
+        """读取所有发行包的统计结果（按 包名+版本+路径 缓存），返回 {规范化包名: 记录}"""
+        with self._lock:
+            cache = self._load_cache()
+        changed = False
+        dists = {}
+        for dist in importlib.metadata.distributions(path=site_dirs):
+            name = dist.metadata['Name']
+            if not name:
+                continue
+            key = f"{name}|{dist.version}|{dist.locate_file('')}"
+            if key not in cache:
+                cache[key] = self.measure(dist)
+                changed = True
+            # 同名包以搜索路径中靠前的为准
+            dists.setdefault(normalize_dist_name(name), dict(cache[key], name=name, version=dist.version))
+        if changed:
+            with self._lock:
+                self._save_cache(dict(self._load_cache(), **cache))
+        return dists
+    
+    @staticmethod
+    def runtime_size(info, stdlib_modules):
+        """Python共享库加上用到的标准库扩展模块（如 json -> _json、hashlib -> _hashlib）的大小"""
+        library = find_python_library(info)
+        size = os.path.getsize(library) if library else 0
+        tops = {module.split('.')[0].lstrip('_') for module in stdlib_modules}
+        for directory in info['path']:
+            if os.path.basename(directory) not in ('lib-dynload', 'DLLs') or not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name.split('.')[0].lstrip('_') in tops:
+                    size += os.path.getsize(os.path.join(directory, name))
+        return size
+    
+    def calibrate(self, interpreter, runtime, onefile_ratio=None):
+        """记录实际打包得到的运行时基础大小（取最小值，即最精简的程序）和单文件压缩率"""
+        with self._lock:
+            cache = self._load_cache()
+            entry = cache.setdefault(f"runtime|{interpreter}", {})
+            if runtime > 0:
+                entry['runtime'] = min(runtime, entry.get('runtime', runtime))
+            if onefile_ratio:
+                entry['onefile_ratio'] = onefile_ratio
+            self._save_cache(cache)
+    
+    def estimate(self, graph, hidden_imports=''):
+        """估算产物体积，返回 {'runtime', 'calibrated', 'dists', 'missing', 'total', 'onefile', 'seconds'}"""
+        start = time.perf_counter()
+        info = get_interpreter_info(self.python)
+        site_dirs = [path for path in info['path'] if path and os.path.isdir(path)
+                     and os.path.basename(path) in ('site-packages', 'dist-packages')]
+        dists = self.load_distributions(site_dirs)
+        
+        owners = {}
+        for key, dist in dists.items():
+            for top in dist['top_level']:
+                owners.setdefault(top, key)
+        
+        # 第三方导入和隐藏导入 -> 发行包，再沿依赖关系展开
+        modules = set(graph.third_party) | {m.strip() for m in hidden_imports.split(',') if m.strip()}
+        tops = sorted({module.split('.')[0] for module in modules} - set(graph.local))
+        imported_by = {}
+        missing = []
+        for top in tops:
+            key = owners.get(top)
+            if key:
+                imported_by.setdefault(key, []).append(top)
+            elif top not in STDLIB_MODULES:
+                missing.append(top)
+        
+        required = {}
+        pending = [(key, None) for key in imported_by]
+        while pending:
+            key, parent = pending.pop()
+            if key in required or key not in dists or key in ('pyinstaller', 'pyinstaller-hooks-contrib'):
+                continue
+            required[key] = parent
+            pending.extend((dep, key) for dep in dists[key]['requires'])
+        
+        # 共享缓存中的实测结果（同一解释器、同一版本）
+        interpreter = get_interpreter_tag(info['version'])
+        measured = {(normalize_dist_name(d['name']), d['version']): d['size']
+                    for d in SharedCache().load_distributions() if d.get('interpreter') == interpreter}
+        
+        results = []
+        for key, parent in required.items():
+            dist = dists[key]
+            record_size = dist['python'] + dist['native'] + dist['data']
+            actual = measured.get((key, dist['version']))
+            results.append({
+                'name': dist['name'], 'version': dist['version'],
+                'size': actual if actual is not None else record_size,
+                'record_size': record_size, 'native': dist['native'],
+                'source': 'measured' if actual is not None else 'record',
+                'via': ', '.join(imported_by.get(key, [])) or f"{dists[parent]['name']} 的依赖",
+            })
+        results.sort(key=lambda r: r['size'], reverse=True)
+        
+        # 打包过的解释器使用实测的运行时大小和压缩率，否则按Python共享库和标准库扩展模块估算
+        with self._lock:
+            calibration = self._load_cache().get(f"runtime|{interpreter}", {})
+        runtime = calibration.get('runtime') or self.runtime_size(info, graph.stdlib)
+        total = runtime + sum(r['size'] for r in results)
+        ratio = calibration.get('onefile_ratio', SIZE_ESTIMATE_ONEFILE_RATIO)
+        return {'runtime': runtime, 'calibrated': 'runtime' in calibration, 'dists': results,
+                'missing': missing, 'total': total, 'onefile': total * ratio,
+                'seconds': time.perf_counter() - start}
+
+class SharedCache:
+    """本机所有项目共用的构建缓存：统一容量上限、按最近使用时间（LRU）淘汰、统计命中情况
+    
+    包括构建产物（builds）、UPX压缩结果（upx）、PyInstaller的二进制缓存（pyinstaller），
+    以及按 发行包名+版本+解释器 记录的第三方包分析结果（dists）。
+    """
+    
+    AREAS = {
+        'builds': '构建产物',
+        'upx': 'UPX压缩',
+        'pyinstaller': 'PyInstaller缓存',
+        'dists': '第三方包',
+    }
+    
+    _lock = threading.Lock()
+    
+    def __init__(self, root=None, max_bytes=2048 * 1024 * 1024):
+        self.root = root or CACHE_ROOT
+        self.max_bytes = max_bytes
+        self.stats_file = os.path.join(self.root, 'stats.json')
+        self.dists_root = os.path.join(self.root, 'dists')
+    
+    def _load_stats(self):
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def record(self, area, hits=0, misses=0):
+        """累计某个缓存区域的命中/未命中次数"""
+        with self._lock:
+            stats = self._load_stats()
+            counters = stats.setdefault(area, {'hits': 0, 'misses': 0})
+            counters['hits'] += hits
+            counters['misses'] += misses
+            os.makedirs(self.root, exist_ok=True)
+            tmp_file = self.stats_file + f'.tmp{os.getpid()}_{threading.get_ident()}'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(stats, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.stats_file)
+    
+    def record_distributions(self, work_dir, project):
+        """根据Analysis结果按发行包记录收集的模块和二进制文件
+        
+        返回 (解释器标识, {(包名, 版本): 记录}, 其他项目已记录过的包)。
+        """
+        version, entries = read_analysis_toc(work_dir)
+        interpreter = get_interpreter_tag(version)
+        
+        collected = {}
+        for dest, src, typecode in entries:
+            dist = find_distribution(src)
+            # PyInstaller自身的运行时钩子不算项目依赖
+            if not dist or dist[0].lower() in ('pyinstaller', 'pyinstaller-hooks-contrib'):
+                continue
+            record = collected.setdefault(dist, {'modules': [], 'binaries': [], 'datas': [], 'size': 0})
+            size = os.path.getsize(src) if os.path.isfile(src) else 0
+            record['size'] += size
+            if typecode in ('BINARY', 'EXTENSION'):
+                record['binaries'].append({'name': dest, 'size': size})
+            elif typecode.startswith('PY'):
+                record['modules'].append(dest)
+            else:
+                record['datas'].append({'name': dest, 'size': size})
+        
+        shared = []
+        now = time.time()
+        for (name, dist_version), record in collected.items():
+            key = re.sub(r'[^\w.+-]', '_', f"{name}-{dist_version}-{interpreter}")
+            entry_file = os.path.join(self.dists_root, key, 'entry.json')
+            with self._lock:
+                try:
+                    with open(entry_file, 'r', encoding='utf-8') as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    entry = {'name': name, 'version': dist_version, 'interpreter': interpreter,
+                             'projects': [], 'builds': 0}
+                if any(p != project for p in entry['projects']):
+                    shared.append(key)
+                entry.update(record, last_used=now, builds=entry['builds'] + 1)
+                if project not in entry['projects']:
+                    entry['projects'].append(project)
+                os.makedirs(os.path.dirname(entry_file), exist_ok=True)
+                with open(entry_file, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f, ensure_ascii=False, indent=2)
+        return interpreter, collected, shared
+    
+    def load_distributions(self):
+        """读取所有第三方包记录"""
+        dists = []
+        if os.path.isdir(self.dists_root):
+            for key in os.listdir(self.dists_root):
+                try:
+                    with open(os.path.join(self.dists_root, key, 'entry.json'), 'r', encoding='utf-8') as f:
+                        dists.append(dict(json.load(f), key=key))
+                except (OSError, ValueError):
+                    pass
+        return dists
+    
+    def entries(self):
+        """列出可淘汰的缓存条目 {'area', 'key', 'name', 'size', 'last_used'}"""
+        entries = []
+        for key, entry in BuildCache(os.path.join(self.root, 'builds')).entries().items():
+            entries.append({'area': 'builds', 'key': key, 'name': entry.get('name') or key[:12],
+                            'size': entry['size'], 'last_used': entry['last_used']})
+        for path, size, last_used in UpxStage.cached_files(os.path.join(self.root, 'upx')):
+            entries.append({'area': 'upx', 'key': path, 'name': os.path.basename(path)[:12],
+                            'size': size, 'last_used': last_used})
+        # PyInstaller的二进制缓存带有自己的索引，只能整个目录淘汰
+        pyinstaller_root = os.path.join(self.root, 'pyinstaller')
+        if os.path.isdir(pyinstaller_root):
+            for name in os.listdir(pyinstaller_root):
+                path = os.path.join(pyinstaller_root, name)
+                if os.path.isdir(path):
+                    entries.append({'area': 'pyinstaller', 'key': path, 'name': name,
+                                    'size': get_path_size(path), 'last_used': os.path.getmtime(path)})
+        for dist in self.load_distributions():
+            entries.append({'area': 'dists', 'key': os.path.join(self.dists_root, dist['key']),
+                            'name': f"{dist['name']} {dist['version']} ({dist['interpreter']})",
+                            'size': get_path_size(os.path.join(self.dists_root, dist['key'])),
+                            'last_used': dist.get('last_used', 0)})
+        return entries
+    
+    def remove(self, entry):
+        """删除一个缓存条目"""
+        if entry['area'] == 'builds':
+            BuildCache(os.path.join(self.root, 'builds')).remove(entry['key'])
+        elif os.path.isdir(entry['key']):
+            shutil.rmtree(entry['key'], ignore_errors=True)
+        elif os.path.exists(entry['key']):
+            os.remove(entry['key'])
+    
+    def evict(self):
+        """总大小超过上限时淘汰最久未使用的条目，返回被淘汰的条目名称"""
+        entries = self.entries()
+        total = sum(entry['size'] for entry in entries)
+        evicted = []
+        for entry in sorted(entries, key=lambda e: e['last_used']):
+            if total <= self.max_bytes:
+                break
+            try:
+                self.remove(entry)
+            except OSError:
+                continue
+            total -= entry['size']
+            evicted.append(f"{self.AREAS[entry['area']]}: {entry['name']}")
+        return evicted
+    
+    def stats(self):
+        """按区域汇总大小、条目数和命中率"""
+        counters = self._load_stats()
+        entries = self.entries()
+        areas = []
+        for area, title in self.AREAS.items():
+            items = [entry for entry in entries if entry['area'] == area]
+            hits = counters.get(area, {}).get('hits', 0)
+            misses = counters.get(area, {}).get('misses', 0)
+            areas.append({'area': area, 'name': title, 'size': sum(e['size'] for e in items),
+                          'count': len(items), 'hits': hits, 'misses': misses,
+                          'entries': sorted(items, key=lambda e: e['last_used'], reverse=True)})
+        return {'total': sum(a['size'] for a in areas), 'max_bytes': self.max_bytes, 'areas': areas}
+    
+    def clear(self):
+        """清空共享缓存"""
+        for entry in self.entries():
+            self.remove(entry)
+
+# 日志界面：每次最多处理的行数、界面保留的行数、刷新间隔（毫秒）
+LOG_DRAIN_PER_TICK = 20000
+LOG_MAX_LINES = 5000
+LOG_POLL_MS = 100
+
+# 完整日志文件目录和保留数量
+LOG_DIR = os.path.join(os.path.expanduser('~'), '.pytoexe_logs')
+LOG_KEEP_FILES = 30
+
+LOG_TIMESTAMP_RE = re.compile(r'^\[\d{2}:\d{2}:\d{2}\] ')
+
+# 追踪运行的时间、步数和内存上限
+TRACE_TIMEOUT = 20
+TRACE_MAX_STEPS = 5000000
+TRACE_MEMORY_LIMIT_MB = 2048
+
+# 追踪运行时指向临时目录的环境变量（用户目录和临时文件目录）
+TRACE_REDIRECTED_ENV = ('HOME', 'USERPROFILE', 'TMP', 'TEMP', 'TMPDIR')
+
+# 在子进程中运行的导入追踪脚本：参数为 输出文件 最大步数 主程序 [程序参数...]
+TRACER_SCRIPT = r"""
+import sys, os, json, runpy, dis, threading
+out_path, max_steps, script = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+out = open(out_path, 'w', encoding='utf-8', buffering=1)
+STATIC_OPS = {dis.opmap['IMPORT_NAME'], dis.opmap['IMPORT_FROM']}
+
+class TraceFinder:
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        # 找到第一个不属于导入系统的调用帧，判断是import语句还是动态导入
+        frame, dynamic, caller = sys._getframe(1), False, ''
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if filename.startswith('<frozen importlib'):
+                frame = frame.f_back
+                continue
+            if frame.f_code.co_name == 'import_module' and filename.endswith(os.path.join('importlib', '__init__.py')):
+                dynamic, frame = True, frame.f_back
+                continue
+            if not dynamic and frame.f_code.co_code[frame.f_lasti] not in STATIC_OPS:
+                dynamic = True
+            caller = frame.f_globals.get('__name__', '')
+            break
+        out.write(json.dumps({'name': fullname, 'dynamic': dynamic, 'by': caller}) + '\n')
+        return spec
+
+steps = 0
+def count_calls(frame, event, arg):
+    global steps
+    steps += 1
+    if steps > max_steps:
+        out.write(json.dumps({'limit': 'steps'}) + '\n')
+        out.flush()
+        os._exit(0)
+
+sys.meta_path.insert(0, TraceFinder())
+sys.argv = sys.argv[3:]
+sys.path[0] = os.path.dirname(os.path.abspath(script))
+sys.settrace(count_calls)
+threading.settrace(count_calls)
+try:
+    runpy.run_path(script, run_name='__main__')
+finally:
+    sys.settrace(None)
+    out.close()
+"""
+
+def limited_popen_kwargs(low_priority=False, memory_limit_mb=0):
+    """在独立进程组中启动子进程的参数，可降低优先级并限制内存（内存限制只在非Windows系统上生效）"""
+    kwargs = {}
+    if sys.platform == 'win32':
+        flags = subprocess.CREATE_NEW_PROCESS_GROUP
+        if low_priority:
+            flags |= subprocess.BELOW_NORMAL_PRIORITY_CLASS
+        kwargs['creationflags'] = flags
+    else:
+        kwargs['start_new_session'] = True
+        if low_priority or memory_limit_mb:
+            def limit_resources():
+                if low_priority:
+                    os.nice(10)
+                if memory_limit_mb:
+                    import resource
+                    limit = memory_limit_mb * 1024 * 1024
+                    kind = getattr(resource, 'RLIMIT_DATA', resource.RLIMIT_AS)
+                    resource.setrlimit(kind, (limit, limit))
+            
+            kwargs['preexec_fn'] = limit_resources
+    return kwargs
+
+def kill_process_tree(process):
+    """结束进程及其所有子进程（进程需要在独立的进程组中启动）"""
+    running = process.poll() is None if hasattr(process, 'poll') else process.returncode is None
+    if not running:
+        return
+    try:
+        if sys.platform == 'win32':
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                           capture_output=True, timeout=10)
+        else:
+            import signal
+            os.killpg(process.pid, signal.SIGKILL)
+    except Exception:
+        process.kill()
+
+class AsyncBuildRunner:
+    """基于asyncio的子进程运行器
+    
+    并发读取输出，支持总超时、无输出超时和取消，结束时终止整个进程组；
+    可选降低CPU优先级和限制内存（内存限制只在Linux/macOS上有效）。
+    """
+    
+    # 终止进程组后等待退出的时间（秒）
+    KILL_GRACE = 5
+    
+    def __init__(self, cmd, on_line, timeout=300, idle_timeout=0, low_priority=False,
+                 memory_limit_mb=0, cwd=None, env=None):
+        self.cmd = cmd
+        self.on_line = on_line
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.low_priority = low_priority
+        self.memory_limit_mb = memory_limit_mb
+        self.cwd = cwd
+        self.env = env
+        self.process = None
+        self.reason = None  # 'timeout' / 'idle' / 'cancelled'，正常结束为None
+        self._loop = None
+        self._stop = None
+    
+    def run(self):
+        """在当前线程中运行子进程直到结束，返回退出码"""
+        return asyncio.run(self._run())
+    
+    def cancel(self):
+        """从任意线程取消运行"""
+        if self._loop and self._stop:
+            self._loop.call_soon_threadsafe(self._request_stop, 'cancelled')
+        else:
+            self.reason = 'cancelled'
+    
+    def _request_stop(self, reason):
+        if self.reason is None:
+            self.reason = reason
+        self._stop.set()
+    
+    def _popen_kwargs(self):
+        return limited_popen_kwargs(self.low_priority, self.memory_limit_mb)
+    
+    async def _read_output(self):
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                break
+            self._last_output = time.monotonic()
+            text = line.decode('utf-8', errors='ignore').rstrip()
+            if text.strip():
+                self.on_line(text)
+    
+    async def _watchdog(self, task):
+        """等待任务结束，期间检查总超时、无输出超时和取消请求；返回是否需要强制结束"""
+        start = self._last_output = time.monotonic()
+        stopper = asyncio.ensure_future(self._stop.wait())
+        while not task.done():
+            await asyncio.wait({task, stopper}, timeout=0.5, return_when=asyncio.FIRST_COMPLETED)
+            now = time.monotonic()
+            if stopper.done():
+                break
+            if self.timeout and now - start > self.timeout:
+                self.reason = 'timeout'
+                break
+            if self.idle_timeout and now - self._last_output > self.idle_timeout:
+                self.reason = 'idle'
+                break
+        stopper.cancel()
+        return not task.done()
+    
+    async def _run(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        if self.reason == 'cancelled':
+            return None
+        
+        self.process = await asyncio.create_subprocess_exec(
+            *self.cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,  # 合并输出
+            cwd=self.cwd, env=self.env,
+            limit=1024 * 1024,
+            **self._popen_kwargs())
+        
+        reader = asyncio.ensure_future(self._read_output())
+        waiter = asyncio.ensure_future(self.process.wait())
+        
+        if await self._watchdog(waiter):
+            kill_process_tree(self.process)
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), self.KILL_GRACE)
+            except asyncio.TimeoutError:
+                pass
+        
+        # 子进程的子进程可能仍然持有输出管道，不要无限等待
+        try:
+            await asyncio.wait_for(reader, self.KILL_GRACE)
+        except asyncio.TimeoutError:
+            pass
+        return await waiter
+
+# 打包前导入预检：结果缓存文件、解析超时（秒）
+PREFLIGHT_CACHE_FILE = os.path.join(CACHE_ROOT, 'preflight.json')
+PREFLIGHT_TIMEOUT = 60
+
+# 在目标解释器中运行：从标准输入读取模块名列表，用线程池逐个定位，输出JSON
+# 子模块在父包的搜索路径中查找，不执行任何包的__init__.py
+PREFLIGHT_SCRIPT = r"""
+import importlib.machinery, importlib.util, json, sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path[:] = [p for p in sys.path if p not in ('', '.')]
+EXTENSION_SUFFIXES = tuple(importlib.machinery.EXTENSION_SUFFIXES)
+
+def describe(spec):
+    origin = spec.origin
+    locations = list(spec.submodule_search_locations or ())
+    if origin in (None, 'namespace'):
+        kind = 'namespace'
+    elif origin in ('built-in', 'frozen'):
+        kind = origin
+    elif origin.endswith(EXTENSION_SUFFIXES):
+        kind = 'extension'
+    else:
+        kind = 'source'
+    return {'status': 'ok', 'kind': kind, 'origin': origin, 'locations': len(locations)}
+
+def resolve(name):
+    try:
+        parts = name.split('.')
+        spec = importlib.util.find_spec(parts[0])
+        for i in range(1, len(parts)):
+            if spec is None or not spec.submodule_search_locations:
+                # os.path 这类由父模块在启动时注册的别名
+                spec = sys.modules[name].__spec__ if name in sys.modules else None
+                break
+            spec = importlib.machinery.PathFinder.find_spec('.'.join(parts[:i + 1]),
+                                                            list(spec.submodule_search_locations))
+        return name, describe(spec) if spec else {'status': 'missing'}
+    except Exception as e:
+        return name, {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+
+names = json.load(sys.stdin)
+with ThreadPoolExecutor(max_workers=min(32, len(names) or 1)) as executor:
+    print(json.dumps(dict(executor.map(resolve, names))))
+"""
+
+class PreflightCheck:
+    """打包前在目标解释器中解析所有导入：找出缺失的模块、只有C扩展的模块和命名空间包
+    
+    结果按解释器缓存，sys.path中任一目录的修改时间变化（安装或卸载了包）时失效。
+    """
+    
+    _lock = threading.Lock()
+    
+    def __init__(self, python, cache_file=PREFLIGHT_CACHE_FILE):
+        self.python = python
+        self.cache_file = cache_file
+    
+    def fingerprint(self):
+        info = get_interpreter_info(self.python)
+        digest = hashlib.sha256(os.path.realpath(self.python).encode('utf-8'))
+        for path in info['path']:
+            try:
+                digest.update(f"{path}|{os.stat(path).st_mtime_ns}\n".encode('utf-8'))
+            except OSError:
+                digest.update(f"{path}|-\n".encode('utf-8'))
+        return digest.hexdigest()
+    
+    def resolve(self, modules):
+        """解析模块，返回 ({模块名: 结果}, 命中缓存的数量)"""
+        fingerprint = self.fingerprint()
+        with self._lock:
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                cache = {}
+        entry = cache.get(self.python)
+        if not entry or entry.get('fingerprint') != fingerprint:
+            entry = {'fingerprint': fingerprint, 'modules': {}}
+        
+        known = entry['modules']
+        pending = sorted(set(modules) - set(known))
+        if pending:
+            result = subprocess.run([self.python, '-c', PREFLIGHT_SCRIPT], input=json.dumps(pending),
+                                    capture_output=True, text=True, timeout=PREFLIGHT_TIMEOUT,
+                                    cwd=tempfile.gettempdir())
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip()
+                                   else f"返回码 {result.returncode}")
+            resolved = json.loads(result.stdout)
+            known.update({name: info for name, info in resolved.items() if info['status'] != 'error'})
+            with self._lock:
+                try:
+                    with open(self.cache_file, 'r', encoding='utf-8') as f:
+                        cache = json.load(f)
+                except (OSError, ValueError):
+                    cache = {}
+                cache[self.python] = entry
+                os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+                tmp_file = self.cache_file + f'.tmp{os.getpid()}_{threading.get_ident()}'
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(cache, f, ensure_ascii=False)
+                os.replace(tmp_file, self.cache_file)
+        else:
+            resolved = {}
+        results = {name: resolved.get(name) or known[name] for name in modules}
+        return results, len(modules) - len(pending)
+    
+    def check(self, graph, hidden_imports=''):
+        """检查导入闭包中的非本地模块和隐藏导入，返回问题列表和统计"""
+        start = time.perf_counter()
+        hidden = {m.strip() for m in hidden_imports.split(',') if m.strip()}
+        modules = set()
+        for name in (graph.stdlib | graph.third_party | hidden) - set(graph.local):
+            parts = name.split('.')
+            modules.update('.'.join(parts[:i]) for i in range(1, len(parts) + 1))
+        modules = sorted(modules)
+        results, cached = self.resolve(modules)
+        
+        report = {'modules': len(modules), 'cached': cached, 'missing': [], 'optional': [],
+                  'extensions': [], 'namespace': [], 'shadowed': [], 'errors': []}
+        for name, info in results.items():
+            top = name.split('.')[0]
+            if info['status'] == 'missing':
+                (report['optional'] if name in graph.optional else report['missing']).append(name)
+            elif info['status'] == 'error':
+                report['errors'].append(f"{name}: {info['error']}")
+            elif info['kind'] == 'extension' and top not in STDLIB_MODULES:
+                report['extensions'].append(name)
+            elif info['kind'] == 'namespace':
+                report['namespace'].append(f"{name}（{info['locations']} 个位置）")
+        
+        # 本地模块与标准库或已安装的包同名时会遮蔽它们
+        for name in graph.local:
+            if name != '__main__' and '.' not in name and (name in STDLIB_MODULES or name in hidden):
+                report['shadowed'].append(name)
+        report['seconds'] = time.perf_counter() - start
+        return report
+    
+    @staticmethod
+    def format(report):
+        """把预检结果整理成日志行，返回 (是否有必须处理的问题, 日志行)"""
+        lines = [f"🛫 导入预检: {report['modules']} 个模块（缓存 {report['cached']} 个），"
+                 f"用时 {report['seconds']:.2f} 秒"]
+        sections = [
+            ('missing', "❌ 无法解析的导入"),
+            ('shadowed', "❌ 本地文件与标准库同名（会遮蔽标准库）"),
+            ('optional', "⚠️  无法解析的可选导入（在try块中）"),
+            ('extensions', "⚠️  只有C扩展的模块（PyInstaller无法分析其内部导入，可能需要隐藏导入）"),
+            ('namespace', "⚠️  命名空间包（没有__init__.py，PyInstaller可能漏收子模块或数据文件）"),
+            ('errors', "⚠️  解析出错"),
+        ]
+        for key, title in sections:
+            if report[key]:
+                lines.append(f"{title}: {', '.join(report[key][:20])}"
+                             f"{f' 等 {len(report[key])} 个' if len(report[key]) > 20 else ''}")
+        if len(lines) == 1:
+            lines.append("✅ 所有导入都能解析")
+        return bool(report['missing'] or report['shadowed']), lines
+
+# 常驻构建进程：私有目录（0700，存放状态文件和Unix套接字）、回收条件（任务数、内存）、
+# 空闲退出时间（秒）、启动等待时间（秒）
+DAEMON_DIR = os.path.join(CACHE_ROOT, 'daemon')
+DAEMON_STATE_FILE = os.path.join(DAEMON_DIR, 'daemon.json')
+DAEMON_MAX_JOBS = 50
+DAEMON_MAX_RSS_MB = 1536
+DAEMON_IDLE_EXIT = 1800
+DAEMON_START_TIMEOUT = 120
+DAEMON_EXIT_MARKER = '__PYTOEXE_DAEMON_EXIT__'
+
+# 在安装了PyInstaller的解释器中运行的常驻进程脚本：参数为 状态文件 令牌 最多任务数 内存上限MB 空闲退出秒数
+# 启动时预先导入PyInstaller并构建基础模块依赖图；每个任务fork出独立的子进程（独立进程组），
+# 输出直接写入客户端连接，客户端断开时终止该任务的整个进程组
+DAEMON_SCRIPT = r"""
+import json, os, select, signal, socket, sys, time, traceback
+import PyInstaller
+import PyInstaller.__main__
+from PyInstaller.depend import analysis
+
+state_file, token = sys.argv[1], sys.argv[2]
+max_jobs, max_rss_mb, idle_exit = int(sys.argv[3]), int(sys.argv[4]), int(sys.argv[5])
+EXIT_MARKER = '__PYTOEXE_DAEMON_EXIT__'
+
+# 套接字和状态文件只允许当前用户访问；打包任务恢复原来的umask
+job_umask = os.umask(0o077)
+
+analysis.initialize_modgraph()
+
+socket_path = os.path.join(os.path.dirname(state_file), f'daemon-{os.getpid()}.sock')
+server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+server.bind(socket_path)
+os.chmod(socket_path, 0o600)
+server.listen(16)
+state = {'pid': os.getpid(), 'socket': socket_path, 'token': token,
+         'python': sys.executable, 'version': PyInstaller.__version__, 'jobs': 0}
+
+def write_state():
+    fd = os.open(state_file + '.tmp', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.fchmod(fd, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(state, f)
+    os.replace(state_file + '.tmp', state_file)
+
+def remove_state():
+    try:
+        os.remove(socket_path)
+    except OSError:
+        pass
+    try:
+        with open(state_file) as f:
+            if json.load(f).get('token') == token:
+                os.remove(state_file)
+    except (OSError, ValueError):
+        pass
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+def start_job(conn, request):
+    pid = os.fork()
+    if pid:
+        return pid
+    code = 1
+    try:
+        os.setsid()
+        os.umask(job_umask)
+        server.close()
+        for other in active.values():
+            other.close()
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(conn.fileno(), 1)
+        os.dup2(conn.fileno(), 2)
+        os.environ.clear()
+        os.environ.update(request['env'])
+        os.chdir(request['cwd'])
+        if request.get('low_priority'):
+            os.nice(10)
+        if request.get('memory_limit_mb'):
+            import resource
+            limit = request['memory_limit_mb'] * 1024 * 1024
+            resource.setrlimit(getattr(resource, 'RLIMIT_DATA', resource.RLIMIT_AS), (limit, limit))
+        sys.argv = ['pyinstaller'] + request['args']
+        PyInstaller.__main__.run(request['args'])
+        code = 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+write_state()
+active = {}
+accepting = True
+last_active = time.time()
+while accepting or active:
+    sockets = list(active.values()) + ([server] if accepting else [])
+    readable, _, _ = select.select(sockets, [], [], 0.2)
+    for sock in readable:
+        if sock is server:
+            conn, _ = server.accept()
+            try:
+                conn.settimeout(10)
+                with conn.makefile('rb') as f:
+                    request = json.loads(f.readline())
+                conn.settimeout(None)
+            except (OSError, ValueError):
+                conn.close()
+                continue
+            if request.get('token') != token:
+                conn.close()
+            elif request.get('command') == 'stop':
+                conn.close()
+                accepting = False
+            elif request.get('command') == 'ping':
+                conn.sendall(json.dumps(state).encode() + b'\n')
+                conn.close()
+            else:
+                active[start_job(conn, request)] = conn
+        else:
+            # 客户端在任务结束前断开（取消或超时）：终止该任务的进程组
+            try:
+                closed = not sock.recv(1, socket.MSG_PEEK)
+            except OSError:
+                closed = True
+            if closed:
+                for pid, conn in active.items():
+                    if conn is sock:
+                        try:
+                            os.killpg(pid, signal.SIGKILL)
+                        except OSError:
+                            pass
+    
+    for pid, conn in list(active.items()):
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if not done:
+            continue
+        try:
+            conn.sendall(f"\n{EXIT_MARKER} {os.waitstatus_to_exitcode(status)}\n".encode())
+        except OSError:
+            pass
+        conn.close()
+        del active[pid]
+        state['jobs'] += 1
+        last_active = time.time()
+        write_state()
+    
+    # 达到回收条件后不再接受新任务（新的客户端会启动新的常驻进程），等现有任务结束后退出
+    if accepting and (state['jobs'] >= max_jobs or rss_mb() > max_rss_mb
+                      or (not active and time.time() - last_active > idle_exit)):
+        accepting = False
+    if not accepting and server.fileno() >= 0:
+        remove_state()
+        server.close()
+remove_state()
+"""
+
+def daemon_supported():
+    """常驻构建进程依赖fork隔离每个任务，Windows上不可用"""
+    return hasattr(os, 'fork')
+
+def ensure_private_dir(path):
+    """创建只有当前用户能访问的目录（0700）；已存在时收紧权限，不是当前用户的目录时拒绝使用"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if os.path.islink(path) or not os.path.isdir(path):
+        raise RuntimeError(f"{path} 不是目录")
+    info = os.stat(path)
+    if hasattr(os, 'getuid') and info.st_uid != os.getuid():
+        raise RuntimeError(f"{path} 不属于当前用户，拒绝使用")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+
+class BuildDaemon:
+    """管理常驻构建进程：按需启动，版本或解释器不一致时重启
+    
+    通过私有目录中的Unix套接字通信，状态文件（含令牌）只有当前用户可读。
+    """
+    
+    _lock = threading.Lock()
+    
+    def __init__(self, python, state_file=DAEMON_STATE_FILE):
+        self.python = python
+        self.state_file = state_file
+    
+    def _request(self, state, request, timeout=5):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.settimeout(timeout)
+            conn.connect(state['socket'])
+            conn.sendall(json.dumps(dict(request, token=state['token'])).encode('utf-8') + b'\n')
+            return conn.makefile('rb').readline()
+    
+    def status(self):
+        """返回正在运行的常驻进程的状态，没有时返回None"""
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return json.loads(self._request(state, {'command': 'ping'}))
+        except (OSError, ValueError, KeyError):
+            return None
+    
+    def stop(self):
+        """请求常驻进程在当前任务结束后退出"""
+        state = self.status()
+        if state:
+            try:
+                self._request(state, {'command': 'stop'})
+            except OSError:
+                pass
+        return state
+    
+    def ensure(self):
+        """返回可用的常驻进程状态，必要时启动新的常驻进程"""
+        with self._lock:
+            state = self.status()
+            if state:
+                if (os.path.realpath(state['python']) == os.path.realpath(self.python)
+                        and state['version'] == get_pyinstaller_version()):
+                    return state
+                self.stop()
+            
+            ensure_private_dir(os.path.dirname(self.state_file))
+            os.makedirs(LOG_DIR, exist_ok=True)
+            token = os.urandom(16).hex()
+            with open(os.path.join(LOG_DIR, 'daemon.log'), 'ab') as log_file:
+                process = subprocess.Popen(
+                    [self.python, '-c', DAEMON_SCRIPT, self.state_file, token,
+                     str(DAEMON_MAX_JOBS), str(DAEMON_MAX_RSS_MB), str(DAEMON_IDLE_EXIT)],
+                    stdin=subprocess.DEVNULL, stdout=log_file, stderr=log_file,
+                    start_new_session=True)
+            
+            deadline = time.monotonic() + DAEMON_START_TIMEOUT
+            while time.monotonic() < deadline:
+                if process.poll() is not None:
+                    raise RuntimeError(f"常驻构建进程启动失败（返回码 {process.returncode}），"
+                                       f"详见 {os.path.join(LOG_DIR, 'daemon.log')}")
+                try:
+                    with open(self.state_file, 'r', encoding='utf-8') as f:
+                        state = json.load(f)
+                    if state.get('token') == token:
+                        return state
+                except (OSError, ValueError):
+                    pass
+                time.sleep(0.1)
+            kill_process_tree(process)
+            raise RuntimeError("常驻构建进程启动超时")
+
+class DaemonBuildRunner(AsyncBuildRunner):
+    """通过常驻构建进程执行打包命令，接口与AsyncBuildRunner相同
+    
+    取消或超时时关闭写端，由常驻进程终止该任务的进程组，并等到它回传结束标记（即进程组已退出）
+    再返回，避免下一个任务在同一工作目录中与尚未退出的进程重叠；连接失败时connect_failed为True。
+    """
+    
+    def __init__(self, state, cmd, on_line, **kwargs):
+        super().__init__(cmd, on_line, **kwargs)
+        self.state = state
+        self.returncode = None
+        self.connect_failed = False
+    
+    async def _read_output(self):
+        while True:
+            line = await self.stream.readline()
+            if not line:
+                break
+            self._last_output = time.monotonic()
+            text = line.decode('utf-8', errors='ignore').rstrip()
+            if text.startswith(DAEMON_EXIT_MARKER):
+                self.returncode = int(text.split()[1])
+                break
+            if text.strip():
+                self.on_line(text)
+    
+    async def _run(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        if self.reason == 'cancelled':
+            return None
+        
+        try:
+            self.stream, writer = await asyncio.open_unix_connection(
+                self.state['socket'], limit=1024 * 1024)
+        except OSError:
+            self.connect_failed = True
+            return None
+        
+        request = {
+            'token': self.state['token'],
+            'args': self.cmd[1:],
+            'cwd': self.cwd or os.getcwd(),
+            'env': dict(self.env if self.env is not None else os.environ),
+            'low_priority': self.low_priority,
+            'memory_limit_mb': self.memory_limit_mb,
+        }
+        writer.write(json.dumps(request).encode('utf-8') + b'\n')
+        await writer.drain()
+        
+        reader = asyncio.ensure_future(self._read_output())
+        if await self._watchdog(reader):
+            try:
+                writer.write_eof()
+                await asyncio.wait_for(reader, self.KILL_GRACE)
+            except (asyncio.TimeoutError, OSError):
+                reader.cancel()
+        writer.close()
+        try:
+            await asyncio.wait_for(writer.wait_closed(), self.KILL_GRACE)
+        except (asyncio.TimeoutError, OSError):
+            pass
+        return self.returncode
+
+def trace_imports(py_file, python=None, timeout=TRACE_TIMEOUT, max_steps=TRACE_MAX_STEPS,
+                  memory_limit_mb=TRACE_MEMORY_LIMIT_MB):
+    """试运行程序并记录实际加载的模块
+    
+    返回 (记录列表, 结束原因)，每条记录为 {'name', 'dynamic', 'by'}。
+    程序在脚本所在目录中以低优先级运行并限制内存，超时或超过步数上限会被强制结束。
+    用户目录和临时文件目录指向一个用完即删的临时目录，避免改动用户的配置和数据；
+    这不是安全沙箱，程序仍能访问文件系统和网络，只应追踪可信的程序。
+    """
+    py_file = os.path.abspath(py_file)
+    with tempfile.TemporaryDirectory(prefix='pytoexe_trace_') as sandbox:
+        out_path = os.path.join(sandbox, 'imports.jsonl')
+        scratch = os.path.join(sandbox, 'home')
+        os.mkdir(scratch)
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1', PYTOEXE_TRACE='1')
+        env.update((name, scratch) for name in TRACE_REDIRECTED_ENV)
+        process = subprocess.Popen(
+            [python or sys.executable, "-c", TRACER_SCRIPT, out_path, str(max_steps), py_file],
+            cwd=os.path.dirname(py_file), env=env, stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            **limited_popen_kwargs(low_priority=True, memory_limit_mb=memory_limit_mb))
+        try:
+            process.wait(timeout=timeout)
+            reason = "程序已退出" if process.returncode == 0 else f"程序退出，返回码 {process.returncode}"
+        except subprocess.TimeoutExpired:
+            kill_process_tree(process)
+            process.wait()
+            reason = f"达到时间上限 {timeout} 秒"
+        
+        records = []
+        seen = set()
+        if os.path.exists(out_path):
+            with open(out_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if 'limit' in record:
+                        reason = f"达到步数上限 {max_steps}"
+                    elif record['name'] not in seen:
+                        seen.add(record['name'])
+                        records.append(record)
+    return records, reason
+
+def find_hidden_import_candidates(records, graph):
+    """从追踪记录中找出动态导入、且静态分析没有发现的模块"""
+    known = set(graph.local) | graph.stdlib | graph.third_party
+    dynamic = {r['name'] for r in records if r['dynamic'] and not r['name'].startswith('__')}
+    names = known | dynamic
+    candidates = []
+    for name in dynamic - known:
+        # 父包会随子模块一起打包，不需要单独列出
+        if any(other.startswith(name + '.') for other in names):
+            continue
+        candidates.append(name)
+    return sorted(candidates)
+
+def merge_hidden_imports(current, modules):
+    """把模块合并到逗号分隔的隐藏导入列表中（去重，保持原有顺序）"""
+    merged = []
+    for module in current.split(',') + list(modules):
+        module = module.strip()
+        if module and module not in merged:
+            merged.append(module)
+    return ','.join(merged)
+
+class PackJob:
+    """单个打包任务，不依赖界面，可以在任意线程中运行"""
+    
+    def __init__(self, options, log=print, output=None):
+        self.options = dict(DEFAULT_OPTIONS, **options)
+        if not self.options['app_name']:
+            self.options['app_name'] = os.path.splitext(
+                os.path.basename(self.options['py_file']))[0]
+        if not self.options['output_dir']:
+            self.options['output_dir'] = os.path.join(
+                os.path.dirname(os.path.abspath(self.options['py_file'])), 'dist')
+        
+        self.log = log
+        self.output = output or log
+        self.runner = None
+        self.cancelled = False
+        self.reused = False     # 直接复用了上次的产物（增量跳过或缓存命中）
+        self.seed_dir = None    # 多变体构建：从这里复制模块分析结果
+        self.children = []      # 多变体构建：各变体的任务
+        self.third_party = None # (解释器标识, 本次收集的第三方包总大小)，用于校准体积预测
+        
+        # 构建阶段时间线
+        self.timeline = BuildTimeline()
+        
+        # 每个任务使用独立的工作目录和spec目录，并行打包时互不干扰
+        self.job_dir = os.path.join(self.options['output_dir'], 'build', self.options['app_name'])
+    
+    def run(self):
+        """执行打包，返回结果字典"""
+        options = self.options
+        py_file = options['py_file']
+        output_dir = options['output_dir']
+        start_time = time.time()
+        
+        if options['preflight'] and not self.run_preflight():
+            return self.finish(-1, start_time)
+        if options['backend'] == 'zipapp':
+            return self.run_zipapp(start_time)
+        if options['compress_bench']:
+            return self.run_compress_bench(start_time)
+        if options['variants']:
+            return self.run_matrix(start_time)
+        
+        # 确保输出目录存在
+        os.makedirs(self.job_dir, exist_ok=True)
+        if wants_benchmark(options):
+            ensure_bench_hook()
+        
+        # 增量构建：保留工作目录和spec文件，只有源码或选项变化时才重新构建
+        state = None
+        full_rebuild = True
+        if options['incremental']:
+            state = IncrementalState(self.job_dir, options,
+                                     build_pyinstaller_command(options, self.job_dir, self.job_dir, clean=False))
+            options_changed, changed_files = state.check()
+            if options_changed:
+                self.log("🔄 增量构建：首次构建或打包选项已变化，重新完整分析")
+            elif not changed_files and os.path.exists(self.artifact_path):
+                self.log("⚡ 增量构建：源码和选项都没有变化，跳过构建")
+                self.reused = True
+                return self.finish(0, start_time)
+            else:
+                full_rebuild = False
+                state.invalidate_stale_tocs(changed_files)
+                base_dir = os.path.dirname(os.path.abspath(py_file))
+                names = [os.path.relpath(path, base_dir) for path in changed_files]
+                self.log(f"🔄 增量构建：{len(names)} 个文件有变化: {', '.join(names[:10]) or '(产物缺失)'}")
+        
+        # 完整重建只清理本任务的工作目录；--clean会清空所有项目共用的PyInstaller缓存，不再使用
+        if full_rebuild:
+            discard_tree(self.job_dir)
+            os.makedirs(self.job_dir, exist_ok=True)
+            if self.seed_dir:
+                self.seed_analysis()
+        
+        cmd = build_pyinstaller_command(options, self.job_dir, self.job_dir, clean=False)
+        
+        self.log("="*70)
+        self.log(f"🚀 开始打包: {os.path.basename(py_file)}")
+        self.log(f"📁 输出目录: {output_dir}")
+        self.log(f"⚙️  打包命令: {' '.join(cmd)}")
+        self.log("="*70)
+        
+        # 构建缓存：源码和选项都没有变化时直接复用上次的产物
+        shared = SharedCache(max_bytes=int(options['cache_max_mb']) * 1024 * 1024)
+        cache = None
+        cache_key = None
+        if options['use_cache']:
+            cache = BuildCache()
+            try:
+                cache_key = compute_build_key(options, cmd)
+                if cache.restore(cache_key, self.artifact_path):
+                    shared.record('builds', hits=1)
+                    self.log(f"⚡ 构建缓存命中 ({cache_key[:12]})，已直接复用上次的打包结果")
+                    self.reused = True
+                    return self.finish(0, start_time)
+                shared.record('builds', misses=1)
+                self.log(f"📦 构建缓存未命中 ({cache_key[:12]})，开始完整打包")
+            except Exception as e:
+                self.log(f"⚠️  读取构建缓存失败: {e}")
+                cache_key = None
+        
+        # 执行打包命令（超时、无输出超时、资源限制）
+        tracker = self.timeline
+        
+        def on_line(line):
+            tracker.feed(line)
+            self.output(line.strip())
+        
+        return_code = self.run_build(cmd, on_line)
+        
+        if self.runner.reason == 'timeout':
+            self.log(f"⏰ 打包超时（{options['timeout']}秒），已终止整个进程树")
+        elif self.runner.reason == 'idle':
+            self.log(f"⏰ 打包进程 {options['idle_timeout']} 秒没有输出，已终止整个进程树")
+        if return_code is None:
+            return_code = -1
+        
+        reused, rebuilt = tracker.summary()
+        if tracker.checks:
+            self.log(f"♻️  复用的阶段: {', '.join(reused) or '无'}")
+            self.log(f"🔨 重新计算的阶段: {', '.join(rebuilt) or '无'}")
+        
+        if return_code == 0 and not self.cancelled:
+            self.record_distributions(shared)
+            if options['use_upx']:
+                self.run_upx_stage(shared)
+        
+        if return_code == 0 and state and not self.cancelled:
+            try:
+                state.save()
+            except OSError as e:
+                self.log(f"⚠️  保存增量构建状态失败: {e}")
+        
+        if return_code == 0 and cache_key and not self.cancelled and os.path.exists(self.artifact_path):
+            try:
+                cache.store(cache_key, self.artifact_path, options['app_name'])
+                self.log(f"💾 已写入构建缓存 ({cache_key[:12]})")
+            except Exception as e:
+                self.log(f"⚠️  写入构建缓存失败: {e}")
+        
+        try:
+            evicted = shared.evict()
+            if evicted:
+                self.log(f"🗑️  共享缓存超出上限，已淘汰: {', '.join(evicted)}")
+        except Exception as e:
+            self.log(f"⚠️  清理共享缓存失败: {e}")
+        
+        return self.finish(return_code, start_time)
+    
+    def run_preflight(self):
+        """打包前解析所有导入，有必须处理的问题时返回False"""
+        try:
+            report = PreflightCheck(find_pyinstaller_python()).check(
+                scan_imports(self.options['py_file']), self.options['hidden_imports'])
+        except Exception as e:
+            self.log(f"⚠️  导入预检失败，跳过: {e}")
+            return True
+        blocking, lines = PreflightCheck.format(report)
+        for line in lines:
+            self.log(line)
+        if blocking:
+            self.log("❌ 导入预检未通过，已取消打包（安装缺失的模块或在选项中关闭导入预检）")
+        return not blocking
+    
+    def seed_analysis(self):
+        """复制其他变体的模块分析结果，PyInstaller检查后直接复用，不再重新分析"""
+        work_dir = os.path.join(self.job_dir, self.options['app_name'])
+        os.makedirs(work_dir, exist_ok=True)
+        for name in ANALYSIS_SEED_FILES:
+            source = os.path.join(self.seed_dir, name)
+            try:
+                if os.path.isdir(source):
+                    shutil.copytree(source, os.path.join(work_dir, name), dirs_exist_ok=True)
+                elif os.path.exists(source):
+                    shutil.copy2(source, work_dir)
+            except OSError as e:
+                self.log(f"⚠️  复制模块分析结果失败: {e}")
+    
+    def run_matrix(self, start_time):
+        """多变体构建：第一个变体完成模块分析，其余变体复用分析结果并行打包"""
+        options = self.options
+        variants = []
+        for key in options['variants']:
+            if key not in BUILD_VARIANTS:
+                self.log(f"⚠️  未知的构建变体: {key}")
+                continue
+            label, overrides = BUILD_VARIANTS[key]
+            variants.append((label, dict(options, **overrides, variants=[], clean_build=False, preflight=False,
+                                         app_name=f"{options['app_name']}_{key}")))
+        self.log(f"🧩 多变体构建: {', '.join(label for label, _ in variants)}")
+        
+        # 变体并行构建，输出同样按行加上变体名称，每行一次写完，便于在同一个日志中区分
+        self.children = [PackJob(variant, log=lambda message, label=label: self.log(f"({label}) {message}"),
+                                 output=lambda line, label=label: self.output(f"({label}) {line}"))
+                         for label, variant in variants]
+        if not self.children:
+            return self.finish(1, start_time)
+        # 目录模式不需要打包成单个文件，最快完成，优先用它做模块分析
+        first_index = next((i for i, (_, variant) in enumerate(variants) if not variant['single_file']), 0)
+        first = self.children[first_index]
+        self.timeline = first.timeline
+        
+        first_result = first.run() if not self.cancelled else None
+        others = [job for job in self.children if job is not first]
+        results = {first: first_result}
+        if others and first_result and first_result['returncode'] == 0 and not self.cancelled:
+            seed_dir = os.path.join(first.job_dir, first.options['app_name'])
+            if os.path.exists(os.path.join(seed_dir, ANALYSIS_SEED_FILES[0])):
+                for job in others:
+                    job.seed_dir = seed_dir
+                self.log(f"♻️  模块分析完成，其余 {len(others)} 个变体复用分析结果并行打包")
+            else:
+                self.log("⚠️  第一个变体没有留下模块分析结果（直接复用了缓存），其余变体各自分析")
+            with ThreadPoolExecutor(max_workers=len(others)) as executor:
+                results.update(zip(others, executor.map(lambda job: job.run(), others)))
+        results = [results.get(job) for job in self.children]
+        
+        # 所有变体结束后才能清理：其他变体的分析结果引用了第一个变体工作目录中的文件
+        if options['clean_build'] and not options['incremental']:
+            for job in self.children:
+                discard_tree(job.job_dir)
+        
+        self.log("="*70)
+        self.log(f"📊 多变体构建汇总（{variants[first_index][0]}的耗时包含模块分析）:")
+        succeeded = 0
+        for (label, variant), result in zip(variants, results):
+            if result is None:
+                self.log(f"  {label:<12} 未运行")
+            elif result['returncode'] == 0 and result['exe_size'] is not None:
+                succeeded += 1
+                self.log(f"  {label:<12} {result['exe_size']:>8.2f} MB {result['seconds']:>7.1f}s  {result['exe_path']}")
+            else:
+                self.log(f"  {label:<12} 失败（返回码 {result['returncode']}） {result['seconds']:>7.1f}s")
+        self.log(f"✅ 成功 {succeeded}/{len(variants)} 个变体，总耗时 {time.time() - start_time:.1f} 秒")
+        self.log("="*70)
+        
+        ok = succeeded == len(variants)
+        return {
+            'name': options['app_name'],
+            'returncode': 0 if ok else next((r['returncode'] for r in results if r and r['returncode']), 1),
+            'exe_path': first_result['exe_path'] if first_result else None,
+            'exe_size': first_result['exe_size'] if ok else None,
+            'seconds': time.time() - start_time,
+            'reused': False,
+            'variants': [dict(r, variant=label) for (label, _), r in zip(variants, results) if r]
+        }
+    
+    def run_compress_bench(self, start_time):
+        """依次用各个压缩级别构建，比较产物大小、解压耗时和启动耗时
+        
+        第一个候选完成模块分析，其余候选复用分析结果，只重新生成归档。
+        候选依次构建和测试，避免并行运行影响启动耗时的测量。
+        """
+        options = self.options
+        if not compress_level_supported():
+            self.log(f"❌ PyInstaller {get_pyinstaller_version()} 不支持设置归档压缩级别"
+                     f"（需要 {ZLIB_LEVEL_MIN_PYINSTALLER} 及以上），无法对比压缩级别")
+            return self.finish(1, start_time)
+        levels = list(COMPRESS_BENCH_LEVELS)
+        self.log(f"🗜️ 压缩级别对比: zlib {', '.join(str(level) for level in levels)}"
+                 f"（{'单文件' if options['single_file'] else '目录模式'}）")
+        
+        candidates = [dict(options, compress_level=level, compress_bench=False, variants=[], preflight=False,
+                           benchmark=True, use_cache=False, incremental=False, clean_build=False,
+                           size_budget_mb=0, startup_budget_ms=0, app_name=f"{options['app_name']}_z{level}")
+                      for level in levels]
+        self.children = [PackJob(candidate, log=lambda message, level=level: self.log(f"(zlib {level}) {message}"),
+                                 output=self.output)
+                         for level, candidate in zip(levels, candidates)]
+        self.timeline = self.children[0].timeline
+        
+        results = []
+        for job in self.children:
+            if self.cancelled:
+                break
+            if results and results[0]['returncode'] == 0:
+                seed_dir = os.path.join(self.children[0].job_dir, self.children[0].options['app_name'])
+                if os.path.exists(os.path.join(seed_dir, ANALYSIS_SEED_FILES[0])):
+                    job.seed_dir = seed_dir
+            result = job.run()
+            if result['returncode'] == 0 and result['exe_size'] is not None:
+                try:
+                    exe_path = get_exe_path(job.options)
+                    result['decompression'] = measure_decompression(exe_path)
+                except Exception as e:
+                    self.log(f"⚠️  测量解压耗时失败: {e}")
+            results.append(result)
+        
+        # 其他候选的分析结果引用了第一个候选工作目录中的文件，全部结束后才能清理
+        for job in self.children:
+            discard_tree(job.job_dir)
+        
+        rows = []
+        for level, result in zip(levels, results):
+            if result['returncode'] != 0 or result['exe_size'] is None:
+                continue
+            contents = result.get('contents')
+            warm = (result.get('benchmark') or {}).get('warm')
+            pre_main = (result.get('benchmark') or {}).get('pre_main')
+            rows.append({
+                'level': level,
+                'size_mb': contents['total_size'] / (1024*1024) if contents else result['exe_size'],
+                'decompress_ms': result['decompression']['seconds'] * 1000 if result.get('decompression') else None,
+                'startup_ms': warm['p50'] if warm else None,
+                'pre_main_ms': pre_main['p50'] if pre_main else None,
+                'exe_path': result['exe_path'],
+            })
+        
+        def ms(value):
+            return f"{value:.0f}" if value is not None else "-"
+        
+        self.log("="*70)
+        self.log(f"📊 压缩级别对比结果:")
+        self.log(f"  {'级别':<8}{'大小(MB)':>10}{'解压(ms)':>10}{'热启动p50(ms)':>16}{'启动到主脚本(ms)':>18}")
+        for row in rows:
+            self.log(f"  zlib {row['level']:<3}{row['size_mb']:>10.2f}{ms(row['decompress_ms']):>10}"
+                     f"{ms(row['startup_ms']):>16}{ms(row['pre_main_ms']):>18}")
+        # 各级别的产物完全一样大说明级别没有生效，此时耗时的差别只是测量误差
+        no_effect = len(rows) > 1 and len({row['size_mb'] for row in rows}) == 1
+        if no_effect:
+            self.log("⚠️  各级别的产物大小完全相同，压缩级别没有生效，不比较体积和启动耗时")
+        elif rows:
+            smallest = min(rows, key=lambda row: row['size_mb'])
+            timed = [row for row in rows if row['startup_ms'] is not None]
+            self.log(f"📦 体积最小: zlib {smallest['level']}（{smallest['size_mb']:.2f} MB）")
+            if timed:
+                fastest = min(timed, key=lambda row: row['startup_ms'])
+                self.log(f"⚡ 启动最快: zlib {fastest['level']}（p50 {fastest['startup_ms']:.0f} ms）")
+        if rows:
+            report_file = os.path.join(options['output_dir'], f"{options['app_name']}_compress.json")
+            try:
+                with open(report_file, 'w', encoding='utf-8') as f:
+                    json.dump({'time': datetime.now().isoformat(timespec='seconds'),
+                               'mode': 'onefile' if options['single_file'] else 'onedir',
+                               'no_effect': no_effect,
+                               'candidates': rows}, f, ensure_ascii=False, indent=2)
+                self.log(f"📝 对比结果已保存: {report_file}")
+            except OSError as e:
+                self.log(f"⚠️  保存对比结果失败: {e}")
+        self.log("="*70)
+        
+        ok = len(rows) == len(levels)
+        first = results[0] if results else None
+        return {
+            'name': options['app_name'],
+            'returncode': 0 if ok else next((r['returncode'] for r in results if r['returncode']), 1),
+            'exe_path': first['exe_path'] if first else None,
+            'exe_size': first['exe_size'] if ok else None,
+            'seconds': time.time() - start_time,
+            'reused': False,
+            'variants': [dict(r, variant=f"zlib {level}") for level, r in zip(levels, results)],
+            'compression': rows
+        }
+    
+    def run_zipapp(self, start_time):
+        """开发构建：只打包源码，几秒内生成可运行的zipapp"""
+        options = self.options
+        self.log("="*70)
+        self.log(f"🚀 开发构建(zipapp): {os.path.basename(options['py_file'])}")
+        self.log(f"📁 输出目录: {options['output_dir']}")
+        self.log("="*70)
+        
+        self.timeline.mark('扫描依赖')
+        try:
+            report = build_zipapp(options, log=self.log, mark=self.timeline.mark)
+        except (OSError, SyntaxError, ValueError, zipfile.BadZipFile) as e:
+            self.log(f"❌ 生成zipapp失败: {e}")
+            return self.finish(1, start_time)
+        
+        self.log(f"⏱️ 扫描依赖 {report['scan_seconds'] * 1000:.0f} ms | 写入归档 {report['write_seconds'] * 1000:.0f} ms，"
+                 f"共 {report['files']} 个源码文件")
+        if report['external']:
+            names = ', '.join(report['external'][:15])
+            more = f" 等 {len(report['external'])} 个" if len(report['external']) > 15 else ""
+            self.log(f"📚 以下模块由运行时的Python环境提供: {names}{more}")
+        return self.finish(0, start_time)
+    
+    def run_build(self, cmd, on_line):
+        """运行打包命令：优先交给常驻构建进程，不可用时启动新的pyinstaller进程"""
+        options = self.options
+        env = dict(os.environ, PYINSTALLER_CONFIG_DIR=PYINSTALLER_CACHE_DIR)
+        # PyInstaller在导入归档模块时读取压缩级别；常驻构建进程没有预先导入该模块，每个任务都会重新读取
+        if int(options['compress_level']) >= 0:
+            if compress_level_supported():
+                env['PYINSTALLER_ZLIB_COMPRESSION_LEVEL'] = str(int(options['compress_level']))
+            else:
+                self.log(f"⚠️  PyInstaller {get_pyinstaller_version()} 不支持设置归档压缩级别"
+                         f"（需要 {ZLIB_LEVEL_MIN_PYINSTALLER} 及以上），使用默认级别")
+        kwargs = dict(timeout=int(options['timeout']),
+                      idle_timeout=int(options['idle_timeout']),
+                      low_priority=options['low_priority'],
+                      memory_limit_mb=int(options['memory_limit']),
+                      env=env)
+        
+        if options['use_daemon'] and not self.cancelled:
+            if not daemon_supported():
+                self.log("⚠️  当前系统不支持常驻构建进程，改为启动新的打包进程")
+            else:
+                try:
+                    state = BuildDaemon(find_pyinstaller_python()).ensure()
+                    self.log(f"🔥 使用常驻构建进程 (PID {state['pid']}，已完成 {state['jobs']} 个任务)")
+                    self.runner = DaemonBuildRunner(state, cmd, on_line, **kwargs)
+                    if self.cancelled:
+                        self.runner.cancel()
+                    return_code = self.runner.run()
+                    if not self.runner.connect_failed:
+                        return return_code
+                    self.log("⚠️  连接常驻构建进程失败，改为启动新的打包进程")
+                except Exception as e:
+                    self.log(f"⚠️  常驻构建进程不可用: {e}，改为启动新的打包进程")
+        
+        self.runner = AsyncBuildRunner(cmd, on_line, **kwargs)
+        if self.cancelled:
+            self.runner.cancel()
+        return self.runner.run()
+    
+    @property
+    def artifact_path(self):
+        """打包产物路径：单文件模式为可执行文件，否则为程序目录"""
+        return get_artifact_path(self.options)
+    
+    def finish(self, return_code, start_time):
+        """检查打包结果并生成结果字典"""
+        options = self.options
+        result = {
+            'name': options['app_name'],
+            'returncode': return_code,
+            'exe_path': get_exe_path(options),
+            'exe_size': None,
+            'seconds': 0.0,
+            'reused': self.reused
+        }
+        
+        # 检查打包结果
+        if self.cancelled:
+            self.log("⛔ 打包已取消")
+        elif return_code == 0:
+            exe_path = result['exe_path']
+            if os.path.exists(exe_path):
+                result['exe_size'] = os.path.getsize(exe_path) / (1024*1024)  # MB
+                self.log("="*70)
+                self.log(f"✅ 打包成功！")
+                self.log(f"📄 EXE文件: {exe_path}")
+                self.log(f"📏 文件大小: {result['exe_size']:.2f} MB")
+                
+                # 清理本任务的工作目录（增量构建需要保留）
+                if options['clean_build'] and not options['incremental'] and os.path.exists(self.job_dir):
+                    discard_tree(self.job_dir)
+                    self.log(f"🗑️  已清理build文件夹（后台删除）")
+                
+                self.log("="*70)
+                
+                self.save_timeline()
+                if options['backend'] == 'zipapp':
+                    self.log(f"⚡ 开发构建用时 {time.time() - start_time:.2f} 秒"
+                             f"（运行: python {os.path.basename(exe_path)}）")
+                else:
+                    result['contents'] = self.analyze_size()
+                    self.calibrate_size_estimate(result['contents'], exe_path)
+                    if result['contents']:
+                        result['diff'] = self.diff_contents(result['contents'])
+                
+                if wants_benchmark(options) and options['backend'] != 'zipapp':
+                    result['benchmark'] = self.run_benchmark(exe_path, result['exe_size'])
+                
+                result['over_budget'] = self.check_budgets(result)
+                if result['over_budget'] and options['budget_action'] == 'fail':
+                    result['returncode'] = 1
+                    self.log("❌ 超出预算，本次构建标记为失败")
+            else:
+                self.log("❌ EXE文件未生成，请检查错误信息")
+        else:
+            self.log(f"❌ 打包失败，返回码: {return_code}")
+        
+        result['seconds'] = time.time() - start_time
+        if not self.cancelled:
+            self.record_history(result)
+        return result
+    
+    def record_history(self, result):
+        """写入构建历史，并与之前几次构建比较，提示构建时间或产物大小的退化"""
+        options = self.options
+        history = BuildHistory()
+        try:
+            history.record(options, result, self.timeline.snapshot())
+            builds = history.recent(JobQueue.project_key(options), HISTORY_BASELINE + 1)
+        except (sqlite3.Error, OSError) as e:
+            self.log(f"⚠️  写入构建历史失败: {e}")
+            return
+        latest = BuildHistory.find_regressions(builds, int(options['regression_percent']))[-1]
+        for name, change in latest['regressions']:
+            self.log(f"📉 {name}比最近 {HISTORY_BASELINE} 次构建的中位数增加了 {change:.0f}%"
+                     f"（阈值 {options['regression_percent']}%）")
+    
+    def save_timeline(self):
+        """在产物旁边保存构建时间线（JSON）并在日志中汇总"""
+        self.timeline.finish()
+        timeline = self.timeline.snapshot()
+        if not timeline['phases']:
+            return
+        
+        parts = [f"{phase['name']} {phase['end'] - phase['start']:.1f}s" for phase in timeline['phases']]
+        self.log(f"🕒 构建阶段: {' | '.join(parts)}")
+        if timeline['warning_count']:
+            counts = ', '.join(f"{BuildTimeline.WARNING_NAMES[c]} {len(items)}"
+                               for c, items in timeline['warnings'].items())
+            self.log(f"⚠️  警告 {timeline['warning_count']} 条: {counts}")
+        
+        path = os.path.join(self.options['output_dir'], f"{self.options['app_name']}_timeline.json")
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(timeline, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            self.log(f"⚠️  保存构建时间线失败: {e}")
+    
+    def record_distributions(self, shared):
+        """把本次收集的第三方包按 包名+版本+解释器 记入共享缓存"""
+        try:
+            interpreter, collected, reused = shared.record_distributions(
+                os.path.join(self.job_dir, self.options['app_name']), os.path.abspath(self.options['py_file']))
+        except Exception as e:
+            self.log(f"⚠️  记录第三方包失败: {e}")
+            return
+        self.third_party = (interpreter, sum(record['size'] for record in collected.values()))
+        count = len(collected)
+        shared.record('dists', hits=len(reused), misses=count - len(reused))
+        if count:
+            self.log(f"📚 收集了 {count} 个第三方包，其中 {len(reused)} 个在共享缓存中已有其他项目的记录")
+    
+    def run_upx_stage(self, shared):
+        """目录模式：并行压缩程序目录中的二进制文件，并记录每个文件的压缩率和耗时"""
+        options = self.options
+        upx = find_upx(options['upx_dir'])
+        if not upx:
+            self.log("⚠️  未找到UPX，跳过压缩（可在高级设置中指定UPX所在目录）")
+            return
+        if options['single_file']:
+            # 单文件模式的二进制文件已经打进归档，由PyInstaller在打包时压缩
+            return
+        
+        self.timeline.mark('UPX')
+        stage = UpxStage(upx, parse_exclude_patterns(options['upx_exclude']))
+        self.log(f"🗜️  UPX并行压缩（{stage.max_workers} 个进程）...")
+        try:
+            report = stage.run(self.artifact_path, get_exe_path(options))
+        except Exception as e:
+            self.log(f"⚠️  UPX压缩失败: {e}")
+            return
+        shared.record('upx', hits=sum(1 for r in report['files'] if r['status'] in ('cached', 'packed')),
+                      misses=sum(1 for r in report['files'] if r['status'] == 'compressed'))
+        
+        status_names = {'compressed': '', 'cached': '（缓存）', 'packed': '（已压缩）', 'failed': '（无法压缩）'}
+        for record in report['files']:
+            ratio = record['compressed'] / max(record['original'], 1)
+            self.log(f"  {record['name']}: {record['original'] / 1024:,.0f} KB -> "
+                     f"{record['compressed'] / 1024:,.0f} KB ({ratio:.0%}) "
+                     f"{record['seconds']:.2f}s{status_names[record['status']]}")
+        for record in report['excluded']:
+            self.log(f"  {record['name']}: 跳过（{record['reason']}）")
+        
+        counts = {status: sum(1 for r in report['files'] if r['status'] == status) for status in status_names}
+        self.log(f"🗜️  UPX压缩完成: {report['original'] / (1024*1024):.2f} MB -> "
+                 f"{report['compressed'] / (1024*1024):.2f} MB，耗时 {report['seconds']:.1f} 秒"
+                 f"（新压缩 {counts['compressed']}，复用 {counts['cached'] + counts['packed']}，"
+                 f"无法压缩 {counts['failed']}，排除 {len(report['excluded'])}）")
+        
+        path = os.path.join(options['output_dir'], f"{options['app_name']}_upx.json")
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            self.log(f"⚠️  保存UPX压缩报告失败: {e}")
+    
+    def analyze_size(self):
+        """分析产物的体积构成，在日志中列出占用最多的部分"""
+        try:
+            report = analyze_bundle(self.artifact_path)
+        except Exception as e:
+            self.log(f"⚠️  体积分析失败: {e}")
+            return None
+        
+        total = max(report['total_size'], 1)
+        parts = [f"{c['name']} {c['size'] / total:.0%}" for c in report['categories']]
+        self.log(f"📦 体积构成: {' | '.join(parts)}")
+        packages = sorted((p for c in report['categories'] for p in c['packages']),
+                          key=lambda p: p['size'], reverse=True)[:5]
+        self.log("📦 占用最多: " + ', '.join(f"{p['name']} {p['size'] / (1024*1024):.2f} MB"
+                                              for p in packages))
+        return report
+    
+    def diff_contents(self, report):
+        """与同一程序、同一打包方式的上次产物比较内容，并保存本次的内容清单"""
+        options = self.options
+        contents_file = os.path.join(options['output_dir'], f"{options['app_name']}_contents.json")
+        try:
+            with open(contents_file, 'r', encoding='utf-8') as f:
+                snapshots = json.load(f)
+        except (OSError, ValueError):
+            snapshots = {}
+        optimize = int(options['optimize'])
+        key = f"{report['mode']}-O{optimize}" if optimize else report['mode']
+        previous = snapshots.get(key)
+        snapshots[key] = current = bundle_snapshot(report)
+        try:
+            with open(contents_file, 'w', encoding='utf-8') as f:
+                json.dump(snapshots, f, ensure_ascii=False)
+        except OSError as e:
+            self.log(f"⚠️  保存产物内容清单失败: {e}")
+        if optimize and snapshots.get(report['mode']):
+            self.compare_optimized_size(snapshots[report['mode']], current)
+        elif optimize:
+            self.log("ℹ️  还没有不优化字节码的构建记录，无法比较优化效果")
+        if not previous:
+            return None
+        
+        diff = diff_bundle_contents(previous, current)
+        mb = 1024 * 1024
+        self.log(f"🔍 与上次产物 ({diff['previous_time']}) 相比: 总大小 {diff['total_delta'] / mb:+.2f} MB")
+        
+        def listing(items):
+            return ', '.join(items[:DIFF_LIST_LIMIT]) + (f" 等 {len(items)} 个" if len(items) > DIFF_LIST_LIMIT else "")
+        
+        if diff['added_modules']:
+            self.log(f"  ➕ 新增模块 {len(diff['added_modules'])} 个: {listing(diff['added_modules'])}")
+        if diff['removed_modules']:
+            self.log(f"  ➖ 移除模块 {len(diff['removed_modules'])} 个: {listing(diff['removed_modules'])}")
+        if diff['added_binaries']:
+            self.log(f"  ⚙️  新增二进制文件: {listing(diff['added_binaries'])}")
+        if diff['removed_binaries']:
+            self.log(f"  ⚙️  移除二进制文件: {listing(diff['removed_binaries'])}")
+        if diff['packages']:
+            self.log("  📦 包体积变化: " + ', '.join(
+                f"{name} {delta / mb:+.2f} MB" if abs(delta) >= mb else f"{name} {delta / 1024:+.1f} KB"
+                for name, delta in diff['packages'][:DIFF_LIST_LIMIT]))
+        return diff
+    
+    def compare_optimized_size(self, normal, current):
+        """与同一程序最近一次不优化字节码的构建比较Python模块和产物的大小"""
+        def python_size(snapshot):
+            return sum(size for category, _, size in snapshot['entries'].values() if category == 'python')
+        
+        mb = 1024 * 1024
+        before, after = python_size(normal), python_size(current)
+        level = OPTIMIZE_LEVELS[int(self.options['optimize'])].split('（')[0]
+        self.log(f"🐍 字节码优化 {level}: Python模块 {after / mb:.2f} MB，"
+                 f"普通构建 ({normal['time']}) {before / mb:.2f} MB（{(after - before) / max(before, 1):+.1%}）；"
+                 f"产物总大小 {(current['total_size'] - normal['total_size']) / mb:+.2f} MB")
+    
+    def check_budgets(self, result):
+        """检查产物大小和启动耗时是否超出预算，返回超出的项目"""
+        options = self.options
+        over = []
+        size_budget = float(options['size_budget_mb'])
+        if size_budget > 0 and result['exe_size'] is not None:
+            # 目录模式的可执行文件只是启动器，按整个程序目录计算
+            contents = result.get('contents')
+            size = contents['total_size'] / (1024*1024) if contents else result['exe_size']
+            if size > size_budget:
+                over.append(f"大小 {size:.2f} MB 超出预算 {size_budget:g} MB")
+            else:
+                self.log(f"💰 大小 {size:.2f} MB，预算 {size_budget:g} MB（剩余 {size_budget - size:.2f} MB）")
+        
+        startup_budget = float(options['startup_budget_ms'])
+        if startup_budget > 0 and options['backend'] != 'zipapp':
+            warm = (result.get('benchmark') or {}).get('warm')
+            if not warm:
+                over.append("无法测得启动耗时")
+            elif warm['p50'] > startup_budget:
+                over.append(f"启动耗时 p50 {warm['p50']:.0f} ms 超出预算 {startup_budget:g} ms")
+            else:
+                self.log(f"💰 启动耗时 p50 {warm['p50']:.0f} ms，预算 {startup_budget:g} ms")
+        
+        for item in over:
+            self.log(f"{'❌' if options['budget_action'] == 'fail' else '⚠️ '} {item}")
+        return over
+    
+    def calibrate_size_estimate(self, report, exe_path):
+        """用实际产物校准体积预测：运行时基础大小（除第三方包以外的部分）和单文件压缩率"""
+        if not report or not self.third_party or self.options['use_upx']:
+            return
+        interpreter, third_party = self.third_party
+        uncompressed = report['total_uncompressed'] if report['mode'] == 'onefile' else report['total_size']
+        ratio = os.path.getsize(exe_path) / uncompressed if report['mode'] == 'onefile' and uncompressed else None
+        try:
+            SizeEstimator(None).calibrate(interpreter, uncompressed - third_party, ratio)
+        except OSError as e:
+            self.log(f"⚠️  保存体积预测校准数据失败: {e}")
+    
+    def run_benchmark(self, exe_path, exe_size):
+        """测试打包产物的启动耗时，并与历史记录比较"""
+        options = self.options
+        runs = int(options['bench_runs'])
+        self.log(f"⏱️ 开始启动基准测试（{runs} 次热启动 + {BENCH_COLD_RUNS} 次冷启动）...")
+        try:
+            bench = benchmark_executable(exe_path, runs=runs, args=options['bench_args'])
+        except Exception as e:
+            self.log(f"⚠️  启动基准测试失败: {e}")
+            return None
+        
+        warm, cold, pre_main = bench['warm'], bench['cold'], bench['pre_main']
+        if not warm:
+            self.log(f"⚠️  程序未能正常启动退出（失败 {bench['failed']} 次），"
+                     f"请检查启动参数或程序是否能自行退出")
+            return bench
+        
+        self.log(f"⏱️ 热启动: p50 {warm['p50']:.0f} ms, p95 {warm['p95']:.0f} ms "
+                 f"(最快 {warm['min']:.0f} ms)")
+        if cold:
+            self.log(f"⏱️ 冷启动: p50 {cold['p50']:.0f} ms, p95 {cold['p95']:.0f} ms")
+        if pre_main:
+            self.log(f"⏱️ 启动到主脚本: p50 {pre_main['p50']:.0f} ms"
+                     f"{'（包含单文件解压）' if options['single_file'] else ''}")
+        
+        record = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'mode': 'onefile' if options['single_file'] else 'onedir',
+            'upx': bool(options['use_upx']),
+            'optimize': int(options['optimize']),
+            'exe_size_mb': exe_size,
+            **bench
+        }
+        
+        # 与同一程序、同一打包方式的上次结果比较
+        history_file = os.path.join(options['output_dir'], f"{options['app_name']}_bench.json")
+        history = load_bench_history(history_file)
+        def same_build(r, optimize):
+            return (r['mode'] == record['mode'] and r['upx'] == record['upx'] and r.get('args') == record['args']
+                    and r.get('optimize', 0) == optimize and r.get('warm'))
+        
+        previous = next((r for r in reversed(history) if same_build(r, record['optimize'])), None)
+        if previous:
+            change = (warm['p50'] - previous['warm']['p50']) / previous['warm']['p50']
+            if change > BENCH_REGRESSION_RATIO:
+                self.log(f"⚠️  启动耗时回退：p50 比上次 ({previous['time']}) 慢 {change:.0%}")
+            else:
+                self.log(f"📈 与上次 ({previous['time']}) 相比 p50 变化 {change:+.0%}")
+        
+        # 字节码优化的效果：与最近一次不优化的构建比较
+        if record['optimize']:
+            normal = next((r for r in reversed(history) if same_build(r, 0)), None)
+            if normal:
+                self.log(f"🐍 字节码优化后热启动 p50 {warm['p50']:.0f} ms，普通构建 ({normal['time']}) "
+                         f"{normal['warm']['p50']:.0f} ms（{warm['p50'] - normal['warm']['p50']:+.0f} ms）")
+        
+        # 单文件模式的解压开销：与最近一次目录模式的结果比较
+        if options['single_file'] and pre_main:
+            onedir = next((r for r in reversed(history)
+                           if r['mode'] == 'onedir' and r.get('pre_main')), None)
+            if onedir:
+                overhead = pre_main['p50'] - onedir['pre_main']['p50']
+                self.log(f"📦 单文件解压开销约 {overhead:.0f} ms（对比 {onedir['time']} 的目录模式结果）")
+        
+        history.append(record)
+        try:
+            with open(history_file, 'w', encoding='utf-8') as f:
+                json.dump(history, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            self.log(f"⚠️  保存基准测试结果失败: {e}")
+        return record
+    
+    def cancel(self):
+        """终止正在运行的打包进程（包括它启动的所有子进程）"""
+        self.cancelled = True
+        for job in self.children:
+            job.cancel()
+        if self.runner:
+            self.runner.cancel()
+
+def load_manifest(manifest_path):
+    """读取批量打包清单
+    
+    清单为JSON文件，可以是任务列表，也可以是 {"defaults": {...}, "jobs": [...]}。
+    相对路径按清单所在目录解析。
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    
+    if isinstance(manifest, list):
+        defaults, jobs = {}, manifest
+    else:
+        defaults, jobs = manifest.get('defaults', {}), manifest.get('jobs', [])
+    
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    job_options = []
+    for job in jobs:
+        options = dict(DEFAULT_OPTIONS, **defaults)
+        options.update(job)
+        for key in ('py_file', 'icon_path', 'output_dir'):
+            if options[key]:
+                options[key] = os.path.join(base_dir, os.path.expanduser(options[key]))
+        if not options['py_file'] or not os.path.exists(options['py_file']):
+            raise ValueError(f"清单中的Python文件不存在: {options['py_file'] or '(未填写)'}")
+        job_options.append(options)
+    
+    # 同一输出目录下的程序名称不能重复，否则并行打包会相互覆盖
+    seen = set()
+    for options in job_options:
+        job = PackJob(options)
+        key = os.path.normcase(job.job_dir)
+        if key in seen:
+            raise ValueError(f"清单中存在重复的程序名称: {job.options['app_name']}")
+        seen.add(key)
+    return job_options
+
+def run_batch(job_options, max_workers=None, log=print):
+    """使用线程池并行执行多个打包任务，返回每个任务的结果"""
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(job_options)))
+    
+    log_lock = threading.Lock()
+    
+    def run_one(options):
+        job = PackJob(options)
+        name = job.options['app_name']
+        
+        def job_log(message):
+            with log_lock:
+                log(f"[{name}] {message}")
+        
+        job.log = job_log
+        
+        # 详细输出写入各任务自己的日志文件，控制台只显示关键信息
+        os.makedirs(job.options['output_dir'], exist_ok=True)
+        log_path = os.path.join(job.options['output_dir'], f"{name}_build.log")
+        # 多变体任务的各个变体在不同线程中写同一个日志文件，每行加锁写入，避免行与行交错
+        file_lock = threading.Lock()
+        with open(log_path, 'w', encoding='utf-8') as log_file:
+            def job_output(line):
+                with file_lock:
+                    log_file.write(line + '\n')
+            
+            job.output = job_output
+            try:
+                result = job.run()
+            except Exception as e:
+                job_log(f"❌ 打包过程中出错: {e}")
+                result = {'name': name, 'returncode': -1, 'exe_path': None,
+                          'exe_size': None, 'seconds': 0.0}
+        result['log_path'] = log_path
+        return result
+    
+    log(f"🚀 批量打包 {len(job_options)} 个程序，并行数: {max_workers}")
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_one, options) for options in job_options]
+        for future in as_completed(futures):
+            results.append(future.result())
+    return results
+
+def format_batch_summary(results, total_seconds):
+    """生成批量打包的汇总表"""
+    lines = ["="*70,
+             f"{'程序':<30}{'返回码':>8}{'耗时(秒)':>12}{'大小(MB)':>12}",
+             "-"*70]
+    for result in sorted(results, key=lambda r: r['seconds'], reverse=True):
+        size = f"{result['exe_size']:.2f}" if result['exe_size'] is not None else "-"
+        lines.append(f"{result['name']:<30}{result['returncode']:>8}"
+                     f"{result['seconds']:>12.1f}{size:>12}")
+        for item in result.get('over_budget') or []:
+            lines.append(f"  ⚠️  {item}")
+        for variant in result.get('variants', []):
+            size = f"{variant['exe_size']:.2f}" if variant['exe_size'] is not None else "-"
+            lines.append(f"  └ {variant['name']:<26}{variant['returncode']:>8}"
+                         f"{variant['seconds']:>12.1f}{size:>12}")
+    failed = sum(1 for r in results if r['returncode'] != 0 or r['exe_size'] is None)
+    lines.append("-"*70)
+    lines.append(f"总耗时: {total_seconds:.1f} 秒，成功 {len(results) - failed} 个，失败 {failed} 个")
+    lines.append("="*70)
+    return "\n".join(lines)
+
+# 打包任务队列：持久化文件、每个打包进程预估占用的内存、每个项目保留的历史耗时条数
+QUEUE_FILE = os.path.join(os.path.expanduser('~'), '.pytoexe_queue.json')
+QUEUE_JOB_MEMORY_MB = 1024
+QUEUE_HISTORY_KEEP = 10
+QUEUE_DEFAULT_SECONDS = 60
+QUEUE_POLL_MS = 1000
+
+def format_duration(seconds):
+    """把秒数格式化为“1分20秒”的形式"""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}秒"
+    return f"{seconds // 60}分{seconds % 60:02d}秒"
+
+def get_available_memory_mb():
+    """获取当前可用内存（MB），无法获取时返回None"""
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            
+            class MemoryStatus(ctypes.Structure):
+                _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                            ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                            ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                            ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                            ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+            
+            status = MemoryStatus()
+            status.dwLength = ctypes.sizeof(MemoryStatus)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+            return status.ullAvailPhys / (1024 * 1024)
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    return None
+
+class JobQueue:
+    """持久化的打包任务队列：可调整顺序和优先级，按CPU数和可用内存限制并发，按历史耗时估算进度
+    
+    任务状态：queued（排队）、running（运行中）、done（成功）、failed（失败）、cancelled（已取消）。
+    """
+    
+    STATUS_NAMES = {
+        'queued': '排队中',
+        'running': '运行中',
+        'done': '成功',
+        'failed': '失败',
+        'cancelled': '已取消',
+    }
+    
+    def __init__(self, path=QUEUE_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self.jobs = []
+        self.history = {}   # 项目键 -> 最近几次成功打包的耗时（秒）
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.jobs = data.get('jobs', [])
+        self.history = data.get('history', {})
+        # 上次退出时还在运行的任务重新排队
+        for job in self.jobs:
+            if job['status'] == 'running':
+                job['status'] = 'queued'
+                job['started'] = None
+    
+    def save(self):
+        with self._lock:
+            data = json.dumps({'jobs': self.jobs, 'history': self.history}, ensure_ascii=False, indent=2)
+        tmp_file = self.path + '.tmp'
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_file, self.path)
+        except OSError:
+            pass
+    
+    @staticmethod
+    def project_key(options):
+        """同一个项目、同一种打包方式的任务共用历史耗时"""
+        return f"{os.path.abspath(options['py_file'])}|{get_build_mode(dict(DEFAULT_OPTIONS, **options))}"
+    
+    @staticmethod
+    def build_targets(options):
+        """任务在输出目录中使用的程序名称：工作目录 build/<名称>、spec文件和产物都按名称区分
+        
+        多变体构建和压缩级别对比还包括各个子构建的名称。
+        """
+        options = PackJob(options).options
+        output_dir = os.path.normcase(os.path.abspath(options['output_dir']))
+        name = options['app_name']
+        names = [name]
+        if options['backend'] != 'zipapp':
+            if options['compress_bench']:
+                names += [f"{name}_z{level}" for level in COMPRESS_BENCH_LEVELS]
+            elif options['variants']:
+                names += [f"{name}_{key}" for key in options['variants']]
+        return {(output_dir, os.path.normcase(n)) for n in names}
+    
+    def get(self, job_id):
+        with self._lock:
+            return next((job for job in self.jobs if job['id'] == job_id), None)
+    
+    def add(self, options, priority=False):
+        """加入队列（priority为True时排在所有排队任务之前），返回任务"""
+        name = options['app_name'] or os.path.splitext(os.path.basename(options['py_file']))[0]
+        job = {'id': f"{time.time_ns():x}", 'name': name, 'options': options, 'status': 'queued',
+               'added': time.time(), 'started': None, 'finished': None, 'seconds': None, 'returncode': None}
+        with self._lock:
+            queued = [i for i, j in enumerate(self.jobs) if j['status'] == 'queued']
+            index = queued[0] if priority and queued else len(self.jobs)
+            self.jobs.insert(index, job)
+        self.save()
+        return job
+    
+    def move(self, job_id, offset):
+        """和前一个（offset=-1）或后一个（offset=1）排队任务交换位置"""
+        with self._lock:
+            queued = [i for i, j in enumerate(self.jobs) if j['status'] == 'queued']
+            positions = [i for i in queued if self.jobs[i]['id'] == job_id]
+            if not positions:
+                return False
+            k = queued.index(positions[0]) + offset
+            if not 0 <= k < len(queued):
+                return False
+            a, b = positions[0], queued[k]
+            self.jobs[a], self.jobs[b] = self.jobs[b], self.jobs[a]
+        self.save()
+        return True
+    
+    def prioritize(self, job_id):
+        """把排队任务移到最前面"""
+        with self._lock:
+            job = self.get(job_id)
+            if not job or job['status'] != 'queued':
+                return False
+            self.jobs.remove(job)
+            queued = [i for i, j in enumerate(self.jobs) if j['status'] == 'queued']
+            self.jobs.insert(queued[0] if queued else len(self.jobs), job)
+        self.save()
+        return True
+    
+    def remove(self, job_id):
+        """移除未在运行的任务"""
+        with self._lock:
+            job = self.get(job_id)
+            if not job or job['status'] == 'running':
+                return False
+            self.jobs.remove(job)
+        self.save()
+        return True
+    
+    def clear_finished(self):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job['status'] in ('queued', 'running')]
+        self.save()
+    
+    def counts(self):
+        with self._lock:
+            counts = dict.fromkeys(self.STATUS_NAMES, 0)
+            for job in self.jobs:
+                counts[job['status']] += 1
+            return counts
+    
+    def slots(self, memory_limit_mb=0):
+        """按CPU数和可用内存计算现在还能启动几个任务（没有任务运行时至少为1）"""
+        running = self.counts()['running']
+        free = (os.cpu_count() or 1) - running
+        available = get_available_memory_mb()
+        if available is not None:
+            free = min(free, int(available // (memory_limit_mb or QUEUE_JOB_MEMORY_MB)))
+        if running == 0:
+            free = max(free, 1)
+        return max(free, 0)
+    
+    def start_next(self, count):
+        """把前count个排队任务标记为运行中并返回
+        
+        与运行中的任务使用同一输出目录和程序名称的任务继续排队（会相互删除和覆盖文件），
+        直到那个任务结束（包括被取消后进程真正退出）。
+        """
+        with self._lock:
+            busy = set()
+            for job in self.jobs:
+                if job['status'] == 'running':
+                    busy |= self.build_targets(job['options'])
+            started = []
+            for job in self.jobs:
+                if len(started) >= count:
+                    break
+                if job['status'] != 'queued':
+                    continue
+                targets = self.build_targets(job['options'])
+                if targets & busy:
+                    continue
+                busy |= targets
+                started.append(job)
+            for job in started:
+                job['status'] = 'running'
+                job['started'] = time.time()
+        if started:
+            self.save()
+        return started
+    
+    def finish(self, job_id, result, cancelled=False):
+        """记录任务结果，成功且真正执行了打包的任务计入历史耗时"""
+        with self._lock:
+            job = self.get(job_id)
+            if not job:
+                return
+            job['finished'] = time.time()
+            job['seconds'] = result['seconds'] if result else None
+            job['returncode'] = result['returncode'] if result else None
+            succeeded = bool(result) and result['returncode'] == 0 and result['exe_size'] is not None
+            job['status'] = 'cancelled' if cancelled else 'done' if succeeded else 'failed'
+            if succeeded and not result.get('reused'):
+                durations = self.history.setdefault(self.project_key(job['options']), [])
+                durations.append(result['seconds'])
+                del durations[:-QUEUE_HISTORY_KEEP]
+        self.save()
+    
+    def estimate(self, options):
+        """按同一项目的历史耗时（中位数）估算打包时间，没有记录时返回None"""
+        durations = self.history.get(self.project_key(options))
+        if not durations:
+            return None
+        return sorted(durations)[len(durations) // 2]
+    
+    def schedule(self, max_running, now=None):
+        """估算每个未完成任务的进度和剩余时间，返回 {任务ID: (进度或None, 剩余秒数或None)}"""
+        now = now or time.time()
+        result = {}
+        slots = []
+        with self._lock:
+            jobs = [job for job in self.jobs if job['status'] in ('queued', 'running')]
+        for job in jobs:
+            if job['status'] != 'running':
+                continue
+            estimate = self.estimate(job['options'])
+            elapsed = now - job['started']
+            if estimate:
+                remaining = max(estimate - elapsed, 0)
+                result[job['id']] = (min(elapsed / estimate, 0.99), remaining)
+            else:
+                remaining = QUEUE_DEFAULT_SECONDS
+                result[job['id']] = (None, None)
+            slots.append(remaining)
+        
+        # 排队任务依次分配给最早空出来的位置
+        slots += [0] * max(0, max(max_running, 1) - len(slots))
+        for job in jobs:
+            if job['status'] != 'queued':
+                continue
+            estimate = self.estimate(job['options'])
+            slots.sort()
+            finish = slots[0] + (estimate or QUEUE_DEFAULT_SECONDS)
+            slots[0] = finish
+            result[job['id']] = (0.0, finish if estimate else None)
+        return result
+
+# 构建历史数据库；判断性能退化时与之前多少次构建的中位数比较；历史页默认显示的构建次数
+HISTORY_DB = os.path.join(os.path.expanduser('~'), '.pytoexe_history.db')
+HISTORY_BASELINE = 5
+HISTORY_DEFAULT_LIMIT = 20
+
+class BuildHistory:
+    """SQLite构建历史：每次构建一行，记录选项、耗时、阶段时间、产物大小、返回码和警告数"""
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS builds (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project TEXT NOT NULL,
+            app_name TEXT NOT NULL,
+            started REAL NOT NULL,
+            seconds REAL NOT NULL,
+            returncode INTEGER,
+            exe_size REAL,
+            warnings INTEGER NOT NULL DEFAULT 0,
+            reused INTEGER NOT NULL DEFAULT 0,
+            phases TEXT NOT NULL DEFAULT '[]',
+            options TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE INDEX IF NOT EXISTS builds_project ON builds (project, started);
+    """
+    
+    # 参与退化判断的指标：字段 -> 显示名称
+    METRICS = {'seconds': '构建时间', 'exe_size': '产物大小'}
+    
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+    
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(self.SCHEMA)
+        return conn
+    
+    def record(self, options, result, timeline):
+        """记录一次构建，返回行ID"""
+        phases = [[phase['name'], round(phase['end'] - phase['start'], 3)] for phase in timeline['phases']]
+        row = (JobQueue.project_key(options), options['app_name'], time.time() - result['seconds'],
+               result['seconds'], result['returncode'], result['exe_size'], timeline['warning_count'],
+               int(bool(result.get('reused'))), json.dumps(phases, ensure_ascii=False),
+               json.dumps(options, ensure_ascii=False, default=str))
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO builds (project, app_name, started, seconds, returncode, exe_size, "
+                    "warnings, reused, phases, options) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+            return cursor.lastrowid
+        finally:
+            conn.close()
+    
+    def projects(self):
+        """返回所有项目：[{'project', 'app_name', 'count', 'last'}]，最近构建的在前"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT project, app_name, COUNT(*) AS count, MAX(started) AS last FROM builds "
+                "GROUP BY project ORDER BY last DESC").fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+    
+    def recent(self, project, limit=HISTORY_DEFAULT_LIMIT):
+        """返回项目最近limit次构建（按时间从旧到新）"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT * FROM builds WHERE project = ? ORDER BY started DESC, id DESC LIMIT ?",
+                (project, limit)).fetchall()
+        finally:
+            conn.close()
+        builds = []
+        for row in reversed(rows):
+            build = dict(row)
+            build['phases'] = json.loads(build['phases'])
+            build['options'] = json.loads(build['options'])
+            builds.append(build)
+        return builds
+    
+    def recent_output_dirs(self, limit):
+        """返回最近构建用过的输出目录（去重，最近的在前）"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT options FROM builds ORDER BY started DESC LIMIT ?",
+                                (limit * 10,)).fetchall()
+        finally:
+            conn.close()
+        dirs = []
+        for row in rows:
+            options = json.loads(row['options'])
+            directory = options.get('output_dir')
+            if directory and directory not in dirs:
+                dirs.append(directory)
+        return dirs[:limit]
+    
+    def clear(self, project=None):
+        """删除一个项目（或全部）的历史"""
+        conn = self._connect()
+        try:
+            with conn:
+                if project is None:
+                    conn.execute("DELETE FROM builds")
+                else:
+                    conn.execute("DELETE FROM builds WHERE project = ?", (project,))
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def is_comparable(build):
+        """只有成功且真正执行了打包的构建才参与趋势和退化判断"""
+        return build['returncode'] == 0 and build['exe_size'] is not None and not build['reused']
+    
+    @classmethod
+    def find_regressions(cls, builds, threshold_percent, baseline=HISTORY_BASELINE):
+        """与之前baseline次构建的中位数比较，给每次构建加上 'regressions': [(指标名, 增长百分比)]"""
+        previous = []
+        for build in builds:
+            build['regressions'] = []
+            if not cls.is_comparable(build):
+                continue
+            if previous:
+                for key, name in cls.METRICS.items():
+                    median = statistics.median(p[key] for p in previous[-baseline:])
+                    if median > 0:
+                        change = (build[key] - median) / median * 100
+                        if change > threshold_percent:
+                            build['regressions'].append((name, change))
+            previous.append(build)
+        return builds
+
+def check_dependencies():
+    """检查依赖"""
+    try:
+        import PyInstaller
+        return True
+    except ImportError:
+        result = messagebox.askyesno("依赖缺失", 
+                                   "未检测到PyInstaller，是否自动安装？\n需要管理员权限。")
+        if result:
+            try:
+                subprocess.check_call([sys.executable, "-m", "pip", "install", "pyinstaller"])
+                messagebox.showinfo("成功", "PyInstaller安装成功！")
+                return True
+            except:
+                messagebox.showerror("错误", "安装失败，请手动运行: pip install pyinstaller")
+                return False
+        return False
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Python程序打包工具")
+    parser.add_argument('--batch', metavar='MANIFEST',
+                        help="不启动界面，按JSON清单批量打包")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="批量打包的并行任务数（默认等于CPU核心数）")
+    parser.add_argument('--stop-daemon', action='store_true',
+                        help="停止常驻构建进程")
+    args = parser.parse_args(argv)
+    
+    if args.stop_daemon:
+        state = BuildDaemon(find_pyinstaller_python()).stop()
+        print(f"🛑 已请求常驻构建进程 (PID {state['pid']}) 退出" if state else "ℹ️  没有正在运行的常驻构建进程")
+        return 0
+    
+    if args.batch:
+        if not shutil.which("pyinstaller"):
+            print("❌ 未找到PyInstaller，请运行: pip install pyinstaller")
+            return 1
+        try:
+            job_options = load_manifest(args.batch)
+        except Exception as e:
+            print(f"❌ 读取清单失败: {e}")
+            return 1
+        
+        start_time = time.time()
+        results = run_batch(job_options, max_workers=args.jobs)
+        print(format_batch_summary(results, time.time() - start_time))
+        trash_bin.wait()
+        return 0 if all(r['returncode'] == 0 and r['exe_size'] is not None for r in results) else 1
+    
+    if check_dependencies():
+        app = UniversalPyToExe()
+        app.run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# 缓存、队列、历史等文件都放在用户目录下，测试时改用临时目录，避免改动真实数据
+_home = tempfile.mkdtemp(prefix='pytoexe_test_home_')
+os.environ['HOME'] = _home
+os.environ['USERPROFILE'] = _home
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
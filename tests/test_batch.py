@@ -0,0 +1,103 @@
+import json
+import os
+
+import pytest
+
+import pack_tool
+
+
+def write_manifest(tmp_path, manifest):
+    path = tmp_path / 'jobs.json'
+    path.write_text(json.dumps(manifest), encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def scripts(tmp_path):
+    for name in ('a', 'b'):
+        (tmp_path / f'{name}.py').write_text("print('hi')\n")
+    return tmp_path
+
+
+def test_list_manifest_resolves_paths_against_manifest_dir(scripts):
+    path = write_manifest(scripts, [{'py_file': 'a.py', 'output_dir': 'out'}])
+    [options] = pack_tool.load_manifest(path)
+    assert options['py_file'] == os.path.join(str(scripts), 'a.py')
+    assert options['output_dir'] == os.path.join(str(scripts), 'out')
+    assert options['backend'] == pack_tool.DEFAULT_OPTIONS['backend']
+
+
+def test_defaults_apply_and_jobs_override_them(scripts):
+    path = write_manifest(scripts, {
+        'defaults': {'single_file': False, 'no_console': True},
+        'jobs': [{'py_file': 'a.py'}, {'py_file': 'b.py', 'single_file': True}],
+    })
+    a, b = pack_tool.load_manifest(path)
+    assert (a['single_file'], a['no_console']) == (False, True)
+    assert (b['single_file'], b['no_console']) == (True, True)
+
+
+def test_missing_script_is_rejected(scripts):
+    path = write_manifest(scripts, [{'py_file': 'missing.py'}])
+    with pytest.raises(ValueError):
+        pack_tool.load_manifest(path)
+
+
+def test_duplicate_names_in_one_output_dir_are_rejected(scripts):
+    path = write_manifest(scripts, [
+        {'py_file': 'a.py', 'app_name': 'same'},
+        {'py_file': 'b.py', 'app_name': 'same'},
+    ])
+    with pytest.raises(ValueError):
+        pack_tool.load_manifest(path)
+
+
+def test_same_name_in_different_output_dirs_is_allowed(scripts):
+    path = write_manifest(scripts, [
+        {'py_file': 'a.py', 'app_name': 'same', 'output_dir': 'out1'},
+        {'py_file': 'b.py', 'app_name': 'same', 'output_dir': 'out2'},
+    ])
+    assert len(pack_tool.load_manifest(path)) == 2
+
+
+def test_parallel_output_of_one_job_keeps_lines_whole(scripts, monkeypatch):
+    # 多变体任务的各个变体在不同线程中写同一个任务日志
+    original_run = pack_tool.PackJob.run
+    
+    def fake_run(job):
+        if job.options['variants']:
+            return original_run(job)
+        for i in range(2000):
+            job.output(f"{job.options['app_name']} line {i} " + "x" * 200)
+        return {'name': job.options['app_name'], 'returncode': 0, 'exe_path': None,
+                'exe_size': 1.0, 'seconds': 0.1, 'reused': False}
+    
+    monkeypatch.setattr(pack_tool.PackJob, 'run', fake_run)
+    options = dict(pack_tool.DEFAULT_OPTIONS, py_file=str(scripts / 'a.py'), app_name='a',
+                   output_dir=str(scripts / 'dist'), preflight=False, clean_build=False,
+                   variants=['onefile_console', 'onedir_console', 'onedir_windowed'])
+    [result] = pack_tool.run_batch([options], log=lambda message: None)
+    
+    with open(result['log_path'], encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 3 * 2000
+    assert all(line.endswith("x" * 200) and line.count(" line ") == 1 for line in lines)
+
+
+def test_batch_summary_sorts_by_time_and_counts_failures():
+    results = [
+        {'name': 'fast', 'returncode': 0, 'seconds': 3.0, 'exe_size': 5.5},
+        {'name': 'slow', 'returncode': 0, 'seconds': 30.0, 'exe_size': 12.25},
+        {'name': 'broken', 'returncode': 1, 'seconds': 10.0, 'exe_size': None},
+    ]
+    summary = pack_tool.format_batch_summary(results, 31.0)
+    lines = summary.splitlines()
+    rows = [line.split()[0] for line in lines[3:6]]
+    assert rows == ['slow', 'broken', 'fast']
+    assert "成功 2 个，失败 1 个" in summary
+    assert "12.25" in summary
+
+
+def test_format_duration():
+    assert pack_tool.format_duration(42.4) == "42秒"
+    assert pack_tool.format_duration(80) == "1分20秒"
@@ -0,0 +1,63 @@
+import stat
+import sys
+
+import pytest
+
+import pack_tool
+
+
+@pytest.mark.parametrize('pct, expected', [(0, 1), (50, 5), (90, 9), (95, 10), (100, 10)])
+def test_percentile_nearest_rank(pct, expected):
+    assert pack_tool.percentile([7, 3, 1, 10, 9, 2, 8, 4, 6, 5], pct) == expected
+
+
+def test_percentile_of_single_value_and_empty_list():
+    assert pack_tool.percentile([42.0], 95) == 42.0
+    assert pack_tool.percentile([], 50) is None
+
+
+def test_summarize_times():
+    assert pack_tool.summarize_times([]) is None
+    assert pack_tool.summarize_times([30, 10, 20]) == {
+        'runs': 3, 'min': 10, 'p50': 20, 'p95': 30, 'max': 30}
+
+
+def make_program(tmp_path, body):
+    path = tmp_path / 'app'
+    path.write_text(f"#!{sys.executable}\nimport os, time\n{body}\n", encoding='utf-8')
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="用脚本模拟可执行文件")
+def test_benchmark_with_startup_hook(tmp_path):
+    exe = make_program(tmp_path, (
+        "if os.environ.get('PYTOEXE_BENCH'):\n"
+        "    open(os.environ['PYTOEXE_BENCH'], 'w').write(repr(time.time()))\n"))
+    result = pack_tool.benchmark_executable(exe, runs=3, cold_runs=0)
+    assert result['failed'] == 0
+    assert result['warm']['runs'] == 3 and result['pre_main']['runs'] == 3
+    assert result['cold'] is None
+    assert result['pre_main']['max'] <= result['warm']['max']
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="用脚本模拟可执行文件")
+def test_benchmark_counts_runs_that_never_reach_the_hook(tmp_path):
+    exe = make_program(tmp_path, "raise SystemExit(1)")
+    result = pack_tool.benchmark_executable(exe, runs=2, cold_runs=0)
+    assert result['failed'] == 2 and result['warm'] is None
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="用脚本模拟可执行文件")
+def test_benchmark_with_arguments_skips_hook(tmp_path):
+    exe = make_program(tmp_path, "")
+    result = pack_tool.benchmark_executable(exe, runs=2, args='--version', cold_runs=0)
+    assert result['warm']['runs'] == 2 and result['pre_main'] is None
+    assert result['args'] == '--version'
+
+
+def test_bench_history_tolerates_missing_or_corrupt_file(tmp_path):
+    path = tmp_path / 'history.json'
+    assert pack_tool.load_bench_history(str(path)) == []
+    path.write_text('{oops', encoding='utf-8')
+    assert pack_tool.load_bench_history(str(path)) == []
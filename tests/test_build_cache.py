@@ -0,0 +1,108 @@
+import os
+import sys
+
+import pytest
+
+import pack_tool
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """一个带本地模块的小项目，PyInstaller版本固定，不依赖是否安装"""
+    monkeypatch.setattr(pack_tool, 'get_pyinstaller_version', lambda: '6.22.0')
+    monkeypatch.setattr(pack_tool, 'find_pyinstaller_python', lambda: sys.executable)
+    (tmp_path / 'main.py').write_text('import helper\nprint(helper.VALUE)\n', encoding='utf-8')
+    (tmp_path / 'helper.py').write_text('VALUE = 1\n', encoding='utf-8')
+    options = dict(pack_tool.DEFAULT_OPTIONS, py_file=str(tmp_path / 'main.py'),
+                   output_dir=str(tmp_path / 'dist'), app_name='main')
+    return tmp_path, options
+
+
+def build_key(options, workpath='work'):
+    cmd = pack_tool.build_pyinstaller_command(options, workpath, workpath)
+    return pack_tool.compute_build_key(options, cmd)
+
+
+def test_key_is_stable(project):
+    _, options = project
+    assert build_key(options) == build_key(options)
+
+
+def test_output_paths_and_clean_do_not_change_key(project):
+    _, options = project
+    cmd = pack_tool.build_pyinstaller_command(options, 'a', 'a', clean=True)
+    other = pack_tool.build_pyinstaller_command(dict(options, output_dir='elsewhere'), 'b', 'b', clean=False)
+    assert pack_tool.compute_build_key(options, cmd) == pack_tool.compute_build_key(options, other)
+
+
+def test_main_script_change_invalidates_key(project):
+    tmp_path, options = project
+    before = build_key(options)
+    (tmp_path / 'main.py').write_text('import helper\nprint(helper.VALUE + 1)\n', encoding='utf-8')
+    assert build_key(options) != before
+
+
+def test_local_module_change_invalidates_key(project):
+    tmp_path, options = project
+    before = build_key(options)
+    (tmp_path / 'helper.py').write_text('VALUE = 2\n', encoding='utf-8')
+    assert build_key(options) != before
+
+
+def test_unrelated_file_does_not_change_key(project):
+    tmp_path, options = project
+    before = build_key(options)
+    (tmp_path / 'notes.py').write_text('x = 1\n', encoding='utf-8')
+    assert build_key(options) == before
+
+
+@pytest.mark.parametrize('change', [
+    {'single_file': False},
+    {'no_console': False},
+    {'hidden_imports': 'json'},
+    {'compress_level': 9},
+    {'optimize': 2},
+])
+def test_option_change_invalidates_key(project, change):
+    _, options = project
+    assert build_key(dict(options, **change)) != build_key(options)
+
+
+def test_interpreter_change_invalidates_key(project, monkeypatch):
+    # 虚拟环境的python是指向同一解释器的链接，安装的包却不同，必须区分
+    tmp_path, options = project
+    if not hasattr(os, 'symlink'):
+        pytest.skip('需要符号链接')
+    venv_python = tmp_path / 'venv-python'
+    os.symlink(sys.executable, venv_python)
+    before = build_key(options)
+    monkeypatch.setattr(pack_tool, 'find_pyinstaller_python', lambda: str(venv_python))
+    assert build_key(options) != before
+
+
+def test_store_and_restore(tmp_path):
+    cache = pack_tool.BuildCache(root=str(tmp_path / 'cache'))
+    artifact = tmp_path / 'app.exe'
+    artifact.write_bytes(b'binary')
+    cache.store('key1', str(artifact), 'app')
+    
+    target = tmp_path / 'out' / 'app.exe'
+    assert cache.restore('key1', str(target))
+    assert target.read_bytes() == b'binary'
+    assert not cache.restore('missing', str(tmp_path / 'out' / 'other.exe'))
+    assert cache.entries()['key1']['name'] == 'app'
+
+
+def test_restore_directory_artifact(tmp_path):
+    cache = pack_tool.BuildCache(root=str(tmp_path / 'cache'))
+    app_dir = tmp_path / 'app'
+    (app_dir / '_internal').mkdir(parents=True)
+    (app_dir / 'app').write_bytes(b'exe')
+    (app_dir / '_internal' / 'lib.so').write_bytes(b'lib')
+    cache.store('key1', str(app_dir))
+    
+    target = tmp_path / 'out' / 'app'
+    target.mkdir(parents=True)
+    (target / 'stale.txt').write_text('old')
+    assert cache.restore('key1', str(target))
+    assert sorted(os.listdir(target)) == ['_internal', 'app']
@@ -0,0 +1,43 @@
+import os
+import stat
+import sys
+
+import pytest
+
+import pack_tool
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='常驻构建进程只支持POSIX系统')
+
+
+def test_private_dir_is_created_with_owner_only_access(tmp_path):
+    path = tmp_path / 'daemon'
+    pack_tool.ensure_private_dir(str(path))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o700
+
+
+def test_private_dir_permissions_are_tightened(tmp_path):
+    path = tmp_path / 'daemon'
+    path.mkdir(mode=0o755)
+    os.chmod(path, 0o755)
+    pack_tool.ensure_private_dir(str(path))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o700
+
+
+def test_private_dir_rejects_symlink(tmp_path):
+    target = tmp_path / 'elsewhere'
+    target.mkdir()
+    link = tmp_path / 'daemon'
+    link.symlink_to(target)
+    with pytest.raises(RuntimeError):
+        pack_tool.ensure_private_dir(str(link))
+
+
+def test_daemon_state_lives_in_private_dir():
+    assert os.path.dirname(pack_tool.DAEMON_STATE_FILE) == pack_tool.DAEMON_DIR
+
+
+def test_status_without_daemon_is_none(tmp_path):
+    daemon = pack_tool.BuildDaemon(sys.executable, state_file=str(tmp_path / 'daemon.json'))
+    assert daemon.status() is None
+    (tmp_path / 'daemon.json').write_text('{"pid": 1, "socket": "%s", "token": "x"}' % (tmp_path / 'gone.sock'))
+    assert daemon.status() is None
@@ -0,0 +1,91 @@
+import pytest
+
+import pack_tool
+
+
+def make_options(tmp_path, name='app', output='dist'):
+    return dict(pack_tool.DEFAULT_OPTIONS, py_file=str(tmp_path / f'{name}.py'),
+                output_dir=str(tmp_path / output), app_name=name)
+
+
+def make_result(seconds=10.0, exe_size=5.0, returncode=0, reused=False):
+    return {'seconds': seconds, 'exe_size': exe_size, 'returncode': returncode, 'reused': reused}
+
+
+TIMELINE = {'phases': [{'name': 'Analysis', 'start': 0.0, 'end': 4.25},
+                       {'name': 'EXE', 'start': 4.25, 'end': 6.0}],
+            'warning_count': 2}
+
+
+@pytest.fixture
+def history(tmp_path):
+    return pack_tool.BuildHistory(str(tmp_path / 'history.db'))
+
+
+def test_record_and_read_back(tmp_path, history):
+    options = make_options(tmp_path)
+    history.record(options, make_result(reused=True), TIMELINE)
+    project = pack_tool.JobQueue.project_key(options)
+    
+    [build] = history.recent(project)
+    assert build['phases'] == [['Analysis', 4.25], ['EXE', 1.75]]
+    assert build['options']['app_name'] == 'app'
+    assert (build['warnings'], build['reused']) == (2, 1)
+    assert history.projects()[0]['count'] == 1
+
+
+def test_recent_is_oldest_first_and_limited(tmp_path, history):
+    options = make_options(tmp_path)
+    for size in (1.0, 2.0, 3.0):
+        history.record(options, make_result(exe_size=size), TIMELINE)
+    project = pack_tool.JobQueue.project_key(options)
+    assert [build['exe_size'] for build in history.recent(project, limit=2)] == [2.0, 3.0]
+
+
+def test_clear_one_project(tmp_path, history):
+    a, b = make_options(tmp_path, 'a'), make_options(tmp_path, 'b')
+    history.record(a, make_result(), TIMELINE)
+    history.record(b, make_result(), TIMELINE)
+    history.clear(pack_tool.JobQueue.project_key(a))
+    assert [project['app_name'] for project in history.projects()] == ['b']
+    history.clear()
+    assert history.projects() == []
+
+
+def test_recent_output_dirs_are_unique_and_newest_first(tmp_path, history):
+    for output in ('one', 'two', 'one', 'three'):
+        history.record(make_options(tmp_path, output=output), make_result(), TIMELINE)
+    assert history.recent_output_dirs(2) == [str(tmp_path / 'three'), str(tmp_path / 'one')]
+
+
+def builds(*rows):
+    return [dict(zip(('seconds', 'exe_size', 'returncode', 'reused'), row)) for row in rows]
+
+
+def test_regression_compared_with_baseline_median():
+    result = pack_tool.BuildHistory.find_regressions(builds(
+        (10.0, 5.0, 0, 0),
+        (12.0, 5.0, 0, 0),
+        (11.0, 5.0, 0, 0),
+        (15.0, 5.2, 0, 0),
+    ), threshold_percent=20)
+    assert [build['regressions'] for build in result[:3]] == [[], [], []]
+    [(name, change)] = result[3]['regressions']
+    assert name == '构建时间' and change == pytest.approx(36.36, abs=0.01)
+
+
+def test_failed_and_reused_builds_are_ignored():
+    result = pack_tool.BuildHistory.find_regressions(builds(
+        (10.0, 5.0, 0, 0),
+        (1.0, 5.0, 0, 1),
+        (99.0, None, 1, 0),
+        (10.5, 8.0, 0, 0),
+    ), threshold_percent=20)
+    assert [len(build['regressions']) for build in result] == [0, 0, 0, 1]
+    assert result[3]['regressions'][0][0] == '产物大小'
+
+
+def test_baseline_only_uses_recent_builds():
+    rows = [(100.0, 5.0, 0, 0)] * 3 + [(10.0, 5.0, 0, 0)] * 2 + [(13.0, 5.0, 0, 0)]
+    result = pack_tool.BuildHistory.find_regressions(builds(*rows), threshold_percent=20, baseline=2)
+    assert result[-1]['regressions'][0][0] == '构建时间'
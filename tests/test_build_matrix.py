@@ -0,0 +1,94 @@
+import os
+import threading
+
+import pytest
+
+import pack_tool
+
+
+@pytest.fixture
+def matrix(tmp_path, monkeypatch):
+    """替换单个变体的打包过程：记录调用，目录模式的变体留下模块分析结果"""
+    (tmp_path / 'main.py').write_text("print('hi')\n", encoding='utf-8')
+    calls = []
+    lock = threading.Lock()
+    original_run = pack_tool.PackJob.run
+    
+    def fake_run(job):
+        if job.options['variants']:
+            return original_run(job)
+        with lock:
+            calls.append((job.options['app_name'], job.seed_dir))
+        if not job.options['single_file']:
+            seed_dir = os.path.join(job.job_dir, job.options['app_name'])
+            os.makedirs(seed_dir, exist_ok=True)
+            open(os.path.join(seed_dir, 'Analysis-00.toc'), 'w').close()
+        return {'name': job.options['app_name'], 'returncode': 0, 'exe_path': pack_tool.get_exe_path(job.options),
+                'exe_size': 1.0 if job.options['single_file'] else 2.0, 'seconds': 0.1, 'reused': False}
+    
+    monkeypatch.setattr(pack_tool.PackJob, 'run', fake_run)
+    options = dict(pack_tool.DEFAULT_OPTIONS, py_file=str(tmp_path / 'main.py'), app_name='app',
+                   output_dir=str(tmp_path / 'dist'), preflight=False, clean_build=False)
+    return options, calls
+
+
+def test_onedir_variant_analyses_first_and_seeds_the_rest(matrix):
+    options, calls = matrix
+    options['variants'] = ['onefile_console', 'onedir_windowed', 'onefile_windowed']
+    result = pack_tool.PackJob(options, log=lambda message: None).run()
+    
+    assert calls[0] == ('app_onedir_windowed', None)
+    seed_dir = os.path.join(options['output_dir'], 'build', 'app_onedir_windowed', 'app_onedir_windowed')
+    assert sorted(calls[1:]) == [('app_onefile_console', seed_dir), ('app_onefile_windowed', seed_dir)]
+    assert result['returncode'] == 0
+    assert [variant['variant'] for variant in result['variants']] == ['单文件+控制台', '目录+无控制台', '单文件+无控制台']
+    assert result['exe_size'] == 2.0
+
+
+def test_variant_options_override_the_base_options(matrix):
+    options, _ = matrix
+    options['variants'] = ['onefile_console', 'onedir_windowed']
+    job = pack_tool.PackJob(options, log=lambda message: None)
+    job.run()
+    console, windowed = (child.options for child in job.children)
+    assert (console['single_file'], console['no_console']) == (True, False)
+    assert (windowed['single_file'], windowed['no_console']) == (False, True)
+    assert not any(child['variants'] or child['clean_build'] or child['preflight'] for child in (console, windowed))
+    assert pack_tool.get_build_mode(options) == 'matrix'
+
+
+def test_variant_output_is_labelled(matrix):
+    options, _ = matrix
+    options['variants'] = ['onefile_console', 'onedir_windowed']
+    lines = []
+    job = pack_tool.PackJob(options, log=lambda message: None, output=lines.append)
+    job.run()
+    for child in job.children:
+        child.output("INFO: checking EXE")
+    assert lines == ["(单文件+控制台) INFO: checking EXE", "(目录+无控制台) INFO: checking EXE"]
+
+
+def test_unknown_variants_are_skipped(matrix):
+    options, calls = matrix
+    options['variants'] = ['onefile_console', 'nonsense']
+    messages = []
+    result = pack_tool.PackJob(options, log=messages.append).run()
+    assert [name for name, _ in calls] == ['app_onefile_console']
+    assert any('nonsense' in message for message in messages)
+    assert result['returncode'] == 0
+
+
+def test_no_valid_variants_fails(matrix):
+    options, calls = matrix
+    options['variants'] = ['nonsense']
+    result = pack_tool.PackJob(options, log=lambda message: None).run()
+    assert calls == [] and result['returncode'] == 1
+
+
+def test_variant_presets_map_to_pyinstaller_flags(tmp_path):
+    options = dict(pack_tool.DEFAULT_OPTIONS, py_file=str(tmp_path / 'main.py'), app_name='app',
+                   output_dir=str(tmp_path / 'dist'))
+    commands = {key: pack_tool.build_pyinstaller_command(dict(options, **overrides), 'w', 'w')
+                for key, (_, overrides) in pack_tool.BUILD_VARIANTS.items()}
+    assert '--onefile' in commands['onefile_console'] and '--console' in commands['onefile_console']
+    assert '--onefile' not in commands['onedir_windowed'] and '--windowed' in commands['onedir_windowed']
@@ -0,0 +1,82 @@
+import sys
+import threading
+import time
+
+import pytest
+
+import pack_tool
+
+
+def python_cmd(code):
+    return [sys.executable, '-u', '-c', code]
+
+
+def run(code, **kwargs):
+    lines = []
+    runner = pack_tool.AsyncBuildRunner(python_cmd(code), lines.append, **kwargs)
+    return runner, runner.run(), lines
+
+
+def test_collects_output_and_exit_code():
+    runner, code, lines = run("import sys\nprint('one')\nprint('')\nprint('two', file=sys.stderr)\nsys.exit(3)")
+    assert code == 3
+    assert lines == ['one', 'two']
+    assert runner.reason is None
+
+
+def test_total_timeout_kills_process():
+    start = time.monotonic()
+    runner, code, _ = run("import time\nwhile True:\n    print('tick')\n    time.sleep(0.1)", timeout=1)
+    assert runner.reason == 'timeout'
+    assert code != 0
+    assert time.monotonic() - start < 1 + runner.KILL_GRACE
+
+
+def test_idle_timeout_kills_silent_process():
+    runner, code, lines = run("import time\nprint('started')\ntime.sleep(60)", idle_timeout=1)
+    assert runner.reason == 'idle'
+    assert lines == ['started']
+    assert code != 0
+
+
+def test_cancel_from_another_thread_kills_child_processes(tmp_path):
+    marker = tmp_path / 'grandchild_alive'
+    code = (
+        "import subprocess, sys, time\n"
+        f"subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(2); open({str(marker)!r}, \"w\")'])\n"
+        "print('running')\n"
+        "time.sleep(60)\n")
+    runner = pack_tool.AsyncBuildRunner(python_cmd(code), lambda line: runner.cancel())
+    result = runner.run()
+    assert runner.reason == 'cancelled' and result != 0
+    time.sleep(2.5)
+    assert not marker.exists()
+
+
+def test_cancel_before_start_does_not_run():
+    runner = pack_tool.AsyncBuildRunner(python_cmd("print('x')"), lambda line: None)
+    runner.cancel()
+    assert runner.run() is None
+    assert runner.process is None
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="内存限制只在Linux/macOS上有效")
+def test_memory_limit_stops_runaway_process():
+    runner, code, _ = run("x = bytearray(512 * 1024 * 1024)\nprint('allocated')", memory_limit_mb=256)
+    assert code != 0
+
+
+def test_runners_in_parallel_threads():
+    results = {}
+    
+    def worker(i):
+        _, results[i], _ = run(f"import time\ntime.sleep(0.5)\nraise SystemExit({i})")
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {0: 0, 1: 1, 2: 2, 3: 3}
+    assert time.monotonic() - start < 2
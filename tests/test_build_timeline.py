@@ -0,0 +1,76 @@
+import pack_tool
+
+FIRST_BUILD = """\
+123 INFO: PyInstaller: 6.0.0
+130 INFO: checking Analysis
+131 INFO: Building Analysis because Analysis-00.toc is non existent
+140 INFO: Initializing module dependency graph...
+900 WARNING: Hidden import "foo.bar" not found!
+1500 INFO: Looking for dynamic libraries
+1600 WARNING: Library not found: could not resolve 'libfoo.so'
+1700 INFO: checking PYZ
+1701 INFO: Building PYZ because PYZ-00.toc is non existent
+1800 INFO: checking PKG
+1801 INFO: Building PKG because PKG-00.toc is non existent
+1900 INFO: checking EXE
+1901 INFO: Building EXE because EXE-00.toc is non existent
+1950 WARNING: something unusual
+"""
+
+REBUILD = """\
+130 INFO: checking Analysis
+1700 INFO: checking PYZ
+1800 INFO: checking PKG
+1801 INFO: Building PKG because PKG-00.toc changed
+1900 INFO: checking EXE
+1901 INFO: Rebuilding EXE-00.toc because app missing
+"""
+
+
+def feed(text):
+    timeline = pack_tool.BuildTimeline()
+    for line in text.splitlines():
+        timeline.feed(line)
+    timeline.finish()
+    return timeline
+
+
+def test_phases_follow_pyinstaller_output():
+    timeline = feed(FIRST_BUILD)
+    names = [phase['name'] for phase in timeline.phases]
+    assert names == ['准备', 'Analysis', '模块图', '二进制依赖', 'PYZ', 'PKG', 'EXE']
+    assert all(phase['end'] is not None for phase in timeline.phases)
+    assert all(a['end'] <= b['start'] for a, b in zip(timeline.phases, timeline.phases[1:]))
+
+
+def test_warnings_are_categorised_with_their_phase():
+    warnings = feed(FIRST_BUILD).warnings
+    assert [item['phase'] for item in warnings['hidden_import']] == ['模块图']
+    assert [item['phase'] for item in warnings['library']] == ['二进制依赖']
+    assert [item['text'] for item in warnings['other']] == ['1950 WARNING: something unusual']
+    assert warnings['hidden_import'][0]['line'] == 5
+
+
+def test_summary_separates_reused_and_rebuilt_checks():
+    timeline = feed(REBUILD)
+    assert timeline.summary() == (['Analysis', 'PYZ'], ['PKG', 'EXE'])
+    reused = {phase['name']: phase['reused'] for phase in timeline.phases}
+    assert reused['Analysis'] is True and reused['PKG'] is False and reused['EXE'] is False
+
+
+def test_extra_steps_can_be_marked_and_repeated_marks_are_ignored():
+    timeline = feed(FIRST_BUILD)
+    timeline.end = None
+    timeline.mark('UPX压缩')
+    timeline.mark('UPX压缩')
+    timeline.finish()
+    assert [phase['name'] for phase in timeline.phases].count('UPX压缩') == 1
+
+
+def test_snapshot_closes_open_phase():
+    timeline = pack_tool.BuildTimeline()
+    timeline.feed("130 INFO: checking Analysis")
+    snapshot = timeline.snapshot()
+    assert snapshot['phases'][-1]['end'] is not None
+    assert snapshot['warning_count'] == 0
+    assert timeline.phases[-1]['end'] is None
@@ -0,0 +1,129 @@
+import marshal
+import os
+import struct
+import zlib
+
+import pytest
+
+import pack_tool
+
+BOOTLOADER = b'\x7fELF' + b'\0' * 996
+
+
+def build_pyz(modules):
+    """按PyInstaller的格式生成PYZ：魔数、pyc魔数、目录偏移、模块数据、marshal的目录"""
+    header_size = 12
+    data = b''
+    toc = {}
+    for name, code in modules.items():
+        blob = zlib.compress(code)
+        toc[name] = (0, header_size + len(data), len(blob))
+        data += blob
+    toc_offset = header_size + len(data)
+    return pack_tool.PYZ_MAGIC + b'\0' * 4 + struct.pack('!i', toc_offset) + data + marshal.dumps(toc)
+
+
+def build_carchive(entries):
+    """生成带CArchive的"可执行文件"：entries为[(名称, 类型码, 数据, 是否压缩)]"""
+    data = b''
+    toc = b''
+    for name, typecode, payload, compressed in entries:
+        stored = zlib.compress(payload) if compressed else payload
+        encoded = name.encode('utf-8') + b'\0'
+        encoded += b'\0' * (-(pack_tool.CARCHIVE_TOC_ENTRY.size + len(encoded)) % 16)
+        toc += pack_tool.CARCHIVE_TOC_ENTRY.pack(
+            pack_tool.CARCHIVE_TOC_ENTRY.size + len(encoded), len(data), len(stored),
+            len(payload), int(compressed), typecode.encode('ascii')) + encoded
+        data += stored
+    archive_size = len(data) + len(toc) + pack_tool.CARCHIVE_COOKIE.size
+    cookie = pack_tool.CARCHIVE_COOKIE.pack(pack_tool.CARCHIVE_MAGIC, archive_size, len(data),
+                                            len(toc), 311, b'libpython3.11.so')
+    return BOOTLOADER + data + toc + cookie
+
+
+ENTRIES = [
+    ('struct', 'm', b'struct module' * 10, True),
+    ('pyiboot01_bootstrap', 's', b'print("boot")' * 20, True),
+    ('PYZ-00.pyz', 'z', build_pyz({'json': b'j' * 300, 'json.decoder': b'd' * 200, 'requests.api': b'r' * 100}), False),
+    ('libssl.so.3', 'b', b'\1' * 400, False),
+    ('numpy/core/_multiarray_umath.cpython-311-x86_64-linux-gnu.so', 'b', b'\2' * 800, True),
+    ('certifi/cacert.pem', 'x', b'-----BEGIN' * 30, True),
+    ('pyi-contents-directory _internal', 'o', b'', False),
+]
+
+
+@pytest.fixture
+def onefile(tmp_path):
+    path = tmp_path / 'app'
+    path.write_bytes(build_carchive(ENTRIES))
+    return str(path)
+
+
+def test_read_carchive_lists_toc(onefile):
+    archive = pack_tool.read_carchive(onefile)
+    names = [entry['name'] for entry in archive['entries']]
+    assert names == [name for name, _, _, _ in ENTRIES]
+    ssl = archive['entries'][3]
+    with open(onefile, 'rb') as f:
+        f.seek(ssl['offset'])
+        assert f.read(ssl['size']) == b'\1' * 400
+    pyz = archive['entries'][2]['pyz']
+    assert sorted(name for name, _, _ in pyz) == ['json', 'json.decoder', 'requests.api']
+
+
+def test_read_carchive_rejects_other_files(tmp_path):
+    path = tmp_path / 'plain'
+    path.write_bytes(BOOTLOADER)
+    with pytest.raises(ValueError):
+        pack_tool.read_carchive(str(path))
+
+
+def test_analyze_onefile_accounts_for_every_byte(onefile):
+    report = pack_tool.analyze_bundle(onefile)
+    assert report['mode'] == 'onefile'
+    assert report['total_size'] == os.path.getsize(onefile)
+    by_name = {entry['name']: entry for entry in report['entries']}
+    assert by_name['json.decoder']['category'] == 'python'
+    assert by_name['requests.api']['package'] == 'requests'
+    assert by_name['libssl.so.3']['category'] == 'library'
+    assert by_name['certifi/cacert.pem']['uncompressed'] == 300
+    assert by_name['pyiboot01_bootstrap']['package'] == 'PyInstaller'
+    
+    categories = {category['category']: category for category in report['categories']}
+    extension = categories['extension']
+    assert extension['count'] == 1 and extension['packages'][0]['name'] == 'numpy'
+    assert report['categories'] == sorted(report['categories'], key=lambda c: c['size'], reverse=True)
+
+
+def test_analyze_onedir_includes_contents_directory(tmp_path):
+    app_dir = tmp_path / 'app'
+    (app_dir / '_internal' / 'PIL').mkdir(parents=True)
+    (app_dir / 'app').write_bytes(build_carchive(ENTRIES))
+    (app_dir / '_internal' / 'PIL' / '_imaging.cpython-311-x86_64-linux-gnu.so').write_bytes(b'\0' * 64)
+    (app_dir / '_internal' / 'base_library.zip').write_bytes(b'\0' * 32)
+    
+    report = pack_tool.analyze_bundle(str(app_dir))
+    by_name = {entry['name']: entry for entry in report['entries']}
+    assert report['mode'] == 'onedir'
+    assert by_name['_internal/PIL/_imaging.cpython-311-x86_64-linux-gnu.so']['package'] == 'PIL'
+    assert by_name['_internal/base_library.zip']['category'] == 'python'
+
+
+def test_measure_decompression_reads_every_compressed_block(onefile):
+    result = pack_tool.measure_decompression(onefile, repeat=1)
+    assert result['blocks'] == 4 + 3
+    assert result['bytes'] == sum(len(payload) for _, _, payload, compressed in ENTRIES if compressed) + 600
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('base_library.zip', ('python', 'base_library.zip')),
+    ('python3.11/lib-dynload/_ssl.cpython-311-x86_64-linux-gnu.so', ('extension', '_ssl')),
+    ('numpy.libs/libopenblas64_p-r0.3.so', ('library', 'numpy')),
+    ('requests-2.31.0.dist-info/METADATA', ('data', 'requests')),
+    ('libcrypto.so.3', ('library', 'libcrypto')),
+    ('foo.pyd', ('extension', 'foo')),
+    ('yaml\\_yaml.cp311-win_amd64.pyd', ('extension', 'yaml')),
+    ('config.ini', ('data', 'config')),
+])
+def test_classify_bundle_file(name, expected):
+    assert pack_tool.classify_bundle_file(name) == expected
@@ -0,0 +1,82 @@
+import pytest
+
+import pack_tool
+
+
+def make_report(entries, mode='onefile', time='2026-01-01T00:00:00'):
+    entries = [{'name': name, 'category': category, 'package': package, 'size': size, 'uncompressed': size}
+               for name, category, package, size in entries]
+    return {'mode': mode, 'time': time, 'total_size': sum(e['size'] for e in entries), 'entries': entries}
+
+
+OLD = make_report([
+    ('app', 'bootloader', '引导程序', 1000),
+    ('json', 'python', 'json', 300),
+    ('requests.api', 'python', 'requests', 200),
+    ('libssl.so.3', 'library', 'libssl', 5000),
+], time='2026-01-01T00:00:00')
+
+NEW = make_report([
+    ('app', 'bootloader', '引导程序', 1000),
+    ('json', 'python', 'json', 300),
+    ('requests.api', 'python', 'requests', 250),
+    ('requests.auth', 'python', 'requests', 100),
+    ('numpy/_core.so', 'extension', 'numpy', 9000),
+], time='2026-01-02T00:00:00')
+
+
+def test_diff_reports_added_and_removed_contents():
+    diff = pack_tool.diff_bundle_contents(pack_tool.bundle_snapshot(OLD), pack_tool.bundle_snapshot(NEW))
+    assert diff['previous_time'] == '2026-01-01T00:00:00'
+    assert diff['total_delta'] == NEW['total_size'] - OLD['total_size']
+    assert diff['added_modules'] == ['requests.auth']
+    assert diff['removed_modules'] == []
+    assert diff['added_binaries'] == ['numpy/_core.so']
+    assert diff['removed_binaries'] == ['libssl.so.3']
+    assert diff['packages'] == [('numpy', 9000), ('libssl', -5000), ('requests', 150)]
+
+
+def test_identical_builds_have_empty_diff():
+    snapshot = pack_tool.bundle_snapshot(OLD)
+    diff = pack_tool.diff_bundle_contents(snapshot, snapshot)
+    assert diff['total_delta'] == 0 and diff['packages'] == []
+    assert not any(diff[key] for key in ('added_modules', 'removed_modules', 'added_binaries', 'removed_binaries'))
+
+
+def make_job(tmp_path, **overrides):
+    options = dict(pack_tool.DEFAULT_OPTIONS, py_file=str(tmp_path / 'main.py'), app_name='app',
+                   output_dir=str(tmp_path / 'dist'))
+    options.update(overrides)
+    messages = []
+    return pack_tool.PackJob(options, log=messages.append), messages
+
+
+def test_diff_contents_compares_with_the_previous_build_of_the_same_mode(tmp_path):
+    (tmp_path / 'dist').mkdir()
+    job, messages = make_job(tmp_path)
+    assert job.diff_contents(OLD) is None
+    assert job.diff_contents(dict(NEW, mode='onedir')) is None
+    
+    diff = job.diff_contents(NEW)
+    assert diff['added_binaries'] == ['numpy/_core.so']
+    assert any('新增模块 1 个: requests.auth' in message for message in messages)
+
+
+@pytest.mark.parametrize('exe_size, budget, over', [(4.0, 5, False), (6.0, 5, True), (6.0, 0, False)])
+def test_size_budget(tmp_path, exe_size, budget, over):
+    job, _ = make_job(tmp_path, size_budget_mb=budget)
+    assert bool(job.check_budgets({'exe_size': exe_size})) == over
+
+
+def test_onedir_size_budget_counts_the_whole_directory(tmp_path):
+    job, _ = make_job(tmp_path, size_budget_mb=5, single_file=False)
+    contents = {'total_size': 8 * 1024 * 1024}
+    assert job.check_budgets({'exe_size': 1.0, 'contents': contents}) == ["大小 8.00 MB 超出预算 5 MB"]
+
+
+def test_startup_budget(tmp_path):
+    job, _ = make_job(tmp_path, startup_budget_ms=200)
+    assert job.check_budgets({'exe_size': 1.0, 'benchmark': {'warm': {'p50': 150}}}) == []
+    assert job.check_budgets({'exe_size': 1.0, 'benchmark': {'warm': {'p50': 250}}}) == [
+        "启动耗时 p50 250 ms 超出预算 200 ms"]
+    assert job.check_budgets({'exe_size': 1.0}) == ["无法测得启动耗时"]
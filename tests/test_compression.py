@@ -0,0 +1,151 @@
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+import pack_tool
+
+
+def make_options(tmp_path, **overrides):
+    (tmp_path / 'main.py').write_text("print('hi')\n", encoding='utf-8')
+    options = dict(pack_tool.DEFAULT_OPTIONS, py_file=str(tmp_path / 'main.py'), app_name='app',
+                   output_dir=str(tmp_path / 'dist'), preflight=False, use_daemon=False)
+    options.update(overrides)
+    return options
+
+
+@pytest.fixture
+def pyinstaller_version(monkeypatch):
+    """固定PATH中PyInstaller的版本，默认为支持设置压缩级别的版本"""
+    def set_version(version):
+        monkeypatch.setattr(pack_tool, 'get_pyinstaller_version', lambda: version)
+    set_version(pack_tool.ZLIB_LEVEL_MIN_PYINSTALLER + '.0')
+    return set_version
+
+
+def run_env_probe(job):
+    lines = []
+    code = job.run_build([sys.executable, '-c',
+                          "import os; print(os.environ.get('PYINSTALLER_ZLIB_COMPRESSION_LEVEL'))"], lines.append)
+    assert code == 0
+    return lines
+
+
+@pytest.mark.parametrize('level, expected', [(-1, 'None'), (0, '0'), (9, '9')])
+def test_level_reaches_pyinstaller_through_environment(tmp_path, pyinstaller_version, level, expected):
+    job = pack_tool.PackJob(make_options(tmp_path, compress_level=level), log=lambda message: None)
+    assert run_env_probe(job) == [expected]
+
+
+def test_archive_options_key(pyinstaller_version):
+    options = dict(pack_tool.DEFAULT_OPTIONS)
+    assert pack_tool.archive_options_key(dict(options, compress_level=-1)) == ''
+    assert pack_tool.archive_options_key(dict(options, compress_level=0)) != \
+        pack_tool.archive_options_key(dict(options, compress_level=9))
+
+
+@pytest.mark.parametrize('version, supported', [
+    ('6.22.0', True), ('6.22', True), ('7.0', True), ('6.21.1', False), ('5.13.2', False), ('未知', False),
+])
+def test_support_follows_pyinstaller_version(pyinstaller_version, version, supported):
+    pyinstaller_version(version)
+    assert pack_tool.compress_level_supported() == supported
+
+
+def test_unsupported_level_is_not_applied_or_keyed(tmp_path, pyinstaller_version):
+    # 旧版本忽略这个环境变量，级别不能让缓存和增量构建失效
+    pyinstaller_version('6.21.0')
+    options = dict(pack_tool.DEFAULT_OPTIONS)
+    assert pack_tool.archive_options_key(dict(options, compress_level=0)) == \
+        pack_tool.archive_options_key(dict(options, compress_level=9)) == ''
+    
+    messages = []
+    job = pack_tool.PackJob(make_options(tmp_path, compress_level=9), log=messages.append)
+    assert run_env_probe(job) == ['None']
+    assert any("不支持设置归档压缩级别" in message for message in messages)
+
+
+@pytest.fixture
+def candidate_sizes():
+    """各级别候选的产物大小，没有设置的级别越高越小"""
+    return {}
+
+
+@pytest.fixture
+def fake_builds(monkeypatch, pyinstaller_version, candidate_sizes):
+    """替换单个候选的打包过程：级别越高启动越慢"""
+    calls = []
+    lock = threading.Lock()
+    original_run = pack_tool.PackJob.run
+    
+    def fake_run(job):
+        if job.options['compress_bench']:
+            return original_run(job)
+        level = job.options['compress_level']
+        with lock:
+            calls.append((level, job.options['app_name'], job.seed_dir, job.options['benchmark']))
+        seed_dir = os.path.join(job.job_dir, job.options['app_name'])
+        os.makedirs(seed_dir, exist_ok=True)
+        open(os.path.join(seed_dir, 'Analysis-00.toc'), 'w').close()
+        warm = {'p50': 100 + level * 10}
+        return {'name': job.options['app_name'], 'returncode': 0, 'exe_path': pack_tool.get_exe_path(job.options),
+                'exe_size': candidate_sizes.get(level, 20.0 - level), 'seconds': 0.1, 'reused': False,
+                'benchmark': {'warm': warm, 'pre_main': None}}
+    
+    monkeypatch.setattr(pack_tool.PackJob, 'run', fake_run)
+    monkeypatch.setattr(pack_tool, 'measure_decompression',
+                        lambda exe_path: {'seconds': 0.01, 'blocks': 1, 'bytes': 1})
+    return calls
+
+
+def test_compress_bench_builds_each_level_and_reports(tmp_path, fake_builds):
+    options = make_options(tmp_path, compress_bench=True)
+    os.makedirs(options['output_dir'])
+    messages = []
+    job = pack_tool.PackJob(options, log=messages.append)
+    result = job.run()
+    
+    levels = list(pack_tool.COMPRESS_BENCH_LEVELS)
+    assert [call[0] for call in fake_builds] == levels
+    assert all(call[3] for call in fake_builds)
+    first_seed = os.path.join(options['output_dir'], 'build', 'app_z0', 'app_z0')
+    assert [call[2] for call in fake_builds] == [None] + [first_seed] * (len(levels) - 1)
+    
+    assert result['returncode'] == 0
+    assert [row['level'] for row in result['compression']] == levels
+    assert any("体积最小: zlib 9" in message for message in messages)
+    assert any("启动最快: zlib 0" in message for message in messages)
+    with open(os.path.join(options['output_dir'], 'app_compress.json'), encoding='utf-8') as f:
+        assert [row['level'] for row in json.load(f)['candidates']] == levels
+    
+    # 候选的工作目录在对比结束后清理
+    assert pack_tool.trash_bin.wait(10)
+    assert not os.path.exists(os.path.join(options['output_dir'], 'build', 'app_z0'))
+    assert pack_tool.get_build_mode(options) == 'compress'
+
+
+def test_compress_bench_reports_no_effect_for_identical_sizes(tmp_path, fake_builds, candidate_sizes):
+    candidate_sizes.update({level: 12.0 for level in pack_tool.COMPRESS_BENCH_LEVELS})
+    options = make_options(tmp_path, compress_bench=True)
+    os.makedirs(options['output_dir'])
+    messages = []
+    result = pack_tool.PackJob(options, log=messages.append).run()
+    
+    assert result['returncode'] == 0
+    assert any("压缩级别没有生效" in message for message in messages)
+    assert not any("体积最小" in message or "启动最快" in message for message in messages)
+    with open(os.path.join(options['output_dir'], 'app_compress.json'), encoding='utf-8') as f:
+        assert json.load(f)['no_effect'] is True
+
+
+def test_compress_bench_refuses_unsupported_pyinstaller(tmp_path, fake_builds, pyinstaller_version):
+    pyinstaller_version('6.21.0')
+    options = make_options(tmp_path, compress_bench=True)
+    messages = []
+    result = pack_tool.PackJob(options, log=messages.append).run()
+    
+    assert result['returncode'] != 0
+    assert fake_builds == []
+    assert any("无法对比压缩级别" in message for message in messages)
@@ -0,0 +1,90 @@
+import textwrap
+
+import pack_tool
+
+
+def write(path, source):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(textwrap.dedent(source), encoding='utf-8')
+
+
+def test_follows_local_modules_and_packages(tmp_path):
+    write(tmp_path / 'main.py', """
+        import helper
+        from pkg import sub
+        from pkg.sub import value
+    """)
+    write(tmp_path / 'helper.py', "import json\n")
+    write(tmp_path / 'pkg' / '__init__.py', "")
+    write(tmp_path / 'pkg' / 'sub.py', "from . import inner\nvalue = 1\n")
+    write(tmp_path / 'pkg' / 'inner.py', "import os\n")
+    write(tmp_path / 'unused.py', "import requests\n")
+    
+    graph = pack_tool.scan_imports(str(tmp_path / 'main.py'))
+    assert set(graph.local) == {'__main__', 'helper', 'pkg', 'pkg.sub', 'pkg.inner'}
+    assert {'json', 'os'} <= graph.stdlib
+    assert 'requests' not in graph.third_party
+    assert 'pkg.sub.value' not in graph.third_party
+
+
+def test_classifies_stdlib_and_third_party(tmp_path):
+    write(tmp_path / 'main.py', """
+        import os.path
+        import numpy as np
+        from yaml import safe_load
+    """)
+    graph = pack_tool.scan_imports(str(tmp_path / 'main.py'))
+    assert 'os.path' in graph.stdlib
+    assert graph.third_party == {'numpy', 'yaml'}
+    assert graph.top_level(graph.stdlib) == {'os': ['os.path']}
+
+
+def test_lazy_optional_and_dynamic_imports(tmp_path):
+    write(tmp_path / 'main.py', """
+        import importlib
+        try:
+            import ujson
+        except ImportError:
+            ujson = None
+        try:
+            import simplejson
+        except ImportError:
+            pass
+        import simplejson
+
+        def plot():
+            import matplotlib
+        plugin = importlib.import_module("plugins_x")
+        legacy = __import__("legacy_y")
+        relative = importlib.import_module(".skip", "pkg")
+    """)
+    graph = pack_tool.scan_imports(str(tmp_path / 'main.py'))
+    assert graph.optional == {'ujson'}
+    assert 'matplotlib' in graph.third_party and 'matplotlib' not in graph.eager
+    assert {'ujson', 'simplejson'} <= graph.eager
+    assert {'plugins_x', 'legacy_y'} <= graph.third_party
+    assert not any(name.endswith('skip') for name in graph.third_party)
+
+
+def test_syntax_errors_are_recorded_not_raised(tmp_path):
+    write(tmp_path / 'main.py', "import broken\n")
+    write(tmp_path / 'broken.py', "def (:\n")
+    graph = pack_tool.scan_imports(str(tmp_path / 'main.py'))
+    assert list(graph.errors) == [str(tmp_path / 'broken.py')]
+    assert 'broken' in graph.local
+
+
+def test_import_cycles_terminate(tmp_path):
+    write(tmp_path / 'main.py', "import a\n")
+    write(tmp_path / 'a.py', "import b\n")
+    write(tmp_path / 'b.py', "import a\n")
+    graph = pack_tool.scan_imports(str(tmp_path / 'main.py'))
+    assert graph.edges['a'] == {'b'} and graph.edges['b'] == {'a'}
+
+
+def test_parse_cache_sees_file_changes(tmp_path):
+    path = tmp_path / 'mod.py'
+    write(path, "import json\n")
+    assert [entry[0] for entry in pack_tool.parse_imports(str(path))] == ['json']
+    write(path, "import json\nimport csv\n")
+    assert [entry[0] for entry in pack_tool.parse_imports(str(path))] == ['json', 'csv']
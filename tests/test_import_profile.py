@@ -0,0 +1,63 @@
+import pack_tool
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       368 |        368 |       _json
+import time:       795 |       1162 |     json.scanner
+import time:       786 |      14027 |   json.decoder
+import time:       790 |        790 |   json.encoder
+import time:       442 |      15258 | json
+import time:      1200 |      30000 | heavy
+some unrelated stderr line
+import time:        50 |         50 | light
+"""
+
+
+def make_graph(tmp_path, source):
+    (tmp_path / 'main.py').write_text(source, encoding='utf-8')
+    return pack_tool.scan_imports(str(tmp_path / 'main.py'))
+
+
+def test_parse_builds_sorted_tree():
+    roots, total_us = pack_tool.parse_import_time(SAMPLE)
+    assert [node['name'] for node in roots] == ['heavy', 'json', 'light']
+    assert total_us == 30000 + 15258 + 50
+    
+    json_node = roots[1]
+    assert [child['name'] for child in json_node['children']] == ['json.decoder', 'json.encoder']
+    decoder = json_node['children'][0]
+    assert decoder['self_us'] == 786 and decoder['cumulative_us'] == 14027
+    assert [child['name'] for child in decoder['children']] == ['json.scanner']
+    assert decoder['children'][0]['children'][0]['name'] == '_json'
+
+
+def test_iter_visits_every_node():
+    roots, _ = pack_tool.parse_import_time(SAMPLE)
+    assert len(list(pack_tool.iter_import_nodes(roots))) == 7
+
+
+def test_parse_empty_output():
+    assert pack_tool.parse_import_time("") == ([], 0)
+
+
+def test_advice_for_slow_imports(tmp_path):
+    graph = make_graph(tmp_path, "import heavy\n\ndef run():\n    import lazy\n")
+    roots = [
+        {'name': 'heavy', 'self_us': 1, 'cumulative_us': 90000, 'children': [
+            {'name': 'bystander', 'self_us': 1, 'cumulative_us': 50000, 'children': []},
+        ]},
+        {'name': 'lazy', 'self_us': 1, 'cumulative_us': 40000, 'children': []},
+        {'name': 'quick', 'self_us': 1, 'cumulative_us': 10, 'children': []},
+    ]
+    pack_tool.annotate_import_advice(roots, graph, 130000)
+    assert "延迟导入" in roots[0]['advice']
+    assert "--exclude-module bystander" in roots[0]['children'][0]['advice']
+    assert roots[1]['advice'] == "已在函数内导入"
+    assert 'advice' not in roots[2]
+
+
+def test_profile_runs_real_imports(tmp_path):
+    graph = make_graph(tmp_path, "import csv\n")
+    roots, total_us = pack_tool.profile_import_time(graph)
+    assert 'csv' in {node['name'] for node in roots}
+    assert total_us > 0
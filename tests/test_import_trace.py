@@ -0,0 +1,76 @@
+import os
+
+import pack_tool
+
+
+def test_trace_finds_dynamic_imports_missed_by_static_scan(tmp_path):
+    (tmp_path / 'main.py').write_text(
+        'import importlib\nmod = importlib.import_module("plug" + "in_mod")\nimport csv\n',
+        encoding='utf-8')
+    (tmp_path / 'plugin_mod.py').write_text('import xml.dom.minidom\n', encoding='utf-8')
+    
+    records, reason = pack_tool.trace_imports(str(tmp_path / 'main.py'), timeout=30)
+    assert reason == "程序已退出"
+    by_name = {record['name']: record for record in records}
+    assert by_name['plugin_mod']['dynamic'] and by_name['plugin_mod']['by'] == '__main__'
+    assert not by_name['csv']['dynamic']
+    
+    graph = pack_tool.scan_imports(str(tmp_path / 'main.py'))
+    assert pack_tool.find_hidden_import_candidates(records, graph) == ['plugin_mod']
+
+
+def test_trace_stops_at_time_limit(tmp_path):
+    (tmp_path / 'main.py').write_text('import time\nwhile True:\n    time.sleep(0.1)\n', encoding='utf-8')
+    _, reason = pack_tool.trace_imports(str(tmp_path / 'main.py'), timeout=1)
+    assert "时间上限" in reason
+
+
+def test_candidates_skip_known_modules_and_parent_packages(tmp_path):
+    (tmp_path / 'main.py').write_text('import json\n', encoding='utf-8')
+    graph = pack_tool.scan_imports(str(tmp_path / 'main.py'))
+    records = [
+        {'name': 'json', 'dynamic': True, 'by': '__main__'},
+        {'name': 'plugins', 'dynamic': True, 'by': '__main__'},
+        {'name': 'plugins.extra', 'dynamic': True, 'by': '__main__'},
+        {'name': '__future__', 'dynamic': True, 'by': '__main__'},
+        {'name': 'static_only', 'dynamic': False, 'by': '__main__'},
+    ]
+    assert pack_tool.find_hidden_import_candidates(records, graph) == ['plugins.extra']
+
+
+def test_merge_hidden_imports_keeps_order_and_dedupes():
+    assert pack_tool.merge_hidden_imports('a, b,', ['b', 'c', ' a ']) == 'a,b,c'
+    assert pack_tool.merge_hidden_imports('', []) == ''
+
+
+def test_trace_runs_in_script_dir_with_redirected_home(tmp_path):
+    # 程序按相对路径读取自己的数据文件；写到用户目录和临时目录的内容不会留下
+    project = tmp_path / 'project'
+    project.mkdir()
+    (project / 'data.txt').write_text('ok', encoding='utf-8')
+    (project / 'main.py').write_text(
+        'import os, tempfile\n'
+        'assert open("data.txt").read() == "ok"\n'
+        'home = os.path.expanduser("~")\n'
+        'assert home == tempfile.gettempdir() == os.environ["USERPROFILE"]\n'
+        'open(os.path.join(home, "written.txt"), "w").close()\n'
+        'import colorsys\n',
+        encoding='utf-8')
+    records, reason = pack_tool.trace_imports(str(project / 'main.py'), timeout=30)
+    assert reason == "程序已退出"
+    assert 'colorsys' in {record['name'] for record in records}
+    assert not (tmp_path / 'written.txt').exists()
+    assert sorted(os.listdir(project)) == ['data.txt', 'main.py']
+
+
+def test_trace_limits_resources(monkeypatch, tmp_path):
+    seen = {}
+    
+    def fake_kwargs(low_priority=False, memory_limit_mb=0):
+        seen.update(low_priority=low_priority, memory_limit_mb=memory_limit_mb)
+        return {}
+    
+    monkeypatch.setattr(pack_tool, 'limited_popen_kwargs', fake_kwargs)
+    (tmp_path / 'main.py').write_text('pass\n', encoding='utf-8')
+    pack_tool.trace_imports(str(tmp_path / 'main.py'), timeout=30, memory_limit_mb=512)
+    assert seen == {'low_priority': True, 'memory_limit_mb': 512}
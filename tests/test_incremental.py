@@ -0,0 +1,113 @@
+import os
+import sys
+
+import pytest
+
+import pack_tool
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setattr(pack_tool, 'get_pyinstaller_version', lambda: '6.0.0')
+    monkeypatch.setattr(pack_tool, 'find_pyinstaller_python', lambda: sys.executable)
+    (tmp_path / 'main.py').write_text('import helper\n', encoding='utf-8')
+    (tmp_path / 'helper.py').write_text('VALUE = 1\n', encoding='utf-8')
+    job_dir = tmp_path / 'job'
+    job_dir.mkdir()
+    options = dict(pack_tool.DEFAULT_OPTIONS, py_file=str(tmp_path / 'main.py'),
+                   output_dir=str(tmp_path / 'dist'), app_name='main')
+    return tmp_path, str(job_dir), options
+
+
+def make_state(job_dir, options):
+    cmd = pack_tool.build_pyinstaller_command(options, job_dir, job_dir, clean=False)
+    return pack_tool.IncrementalState(job_dir, options, cmd)
+
+
+def saved_state(job_dir, options):
+    state = make_state(job_dir, options)
+    state.check()
+    state.save()
+    return make_state(job_dir, options)
+
+
+def test_first_build_reports_options_changed(project):
+    tmp_path, job_dir, options = project
+    options_changed, changed = make_state(job_dir, options).check()
+    assert options_changed
+    assert sorted(changed) == sorted([str(tmp_path / 'main.py'), str(tmp_path / 'helper.py')])
+
+
+def test_unchanged_project_needs_no_rebuild(project):
+    _, job_dir, options = project
+    assert saved_state(job_dir, options).check() == (False, [])
+
+
+def test_touch_without_content_change_is_not_a_change(project):
+    tmp_path, job_dir, options = project
+    state = saved_state(job_dir, options)
+    helper = tmp_path / 'helper.py'
+    stat = helper.stat()
+    os.utime(helper, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    assert state.check() == (False, [])
+
+
+def test_edited_module_is_reported(project):
+    tmp_path, job_dir, options = project
+    state = saved_state(job_dir, options)
+    (tmp_path / 'helper.py').write_text('VALUE = 22\n', encoding='utf-8')
+    assert state.check() == (False, [str(tmp_path / 'helper.py')])
+
+
+def test_removed_import_is_reported(project):
+    tmp_path, job_dir, options = project
+    state = saved_state(job_dir, options)
+    (tmp_path / 'main.py').write_text('print(1)\n', encoding='utf-8')
+    options_changed, changed = state.check()
+    assert not options_changed
+    assert sorted(changed) == sorted([str(tmp_path / 'main.py'), str(tmp_path / 'helper.py')])
+
+
+def test_file_removed_after_scan_counts_as_changed(project, monkeypatch):
+    # 扫描到的模块在读取前被删除（比如编辑器保存时先删除再写入），不能让检查失败
+    tmp_path, job_dir, options = project
+    state = saved_state(job_dir, options)
+    helper = str(tmp_path / 'helper.py')
+    paths = state._source_paths()
+    os.remove(helper)
+    monkeypatch.setattr(state, '_source_paths', lambda: paths)
+    assert state.check() == (False, [helper])
+    assert helper not in state.sources
+
+
+def test_unreadable_file_counts_as_changed(project, monkeypatch):
+    tmp_path, job_dir, options = project
+    state = saved_state(job_dir, options)
+    (tmp_path / 'helper.py').write_text('VALUE = 3\n', encoding='utf-8')
+    
+    def unreadable(path, digest=None):
+        raise PermissionError(path)
+    
+    monkeypatch.setattr(pack_tool, 'hash_file', unreadable)
+    assert state.check() == (False, [str(tmp_path / 'helper.py')])
+
+
+@pytest.mark.parametrize('key, value', [
+    ('single_file', False),
+    ('no_console', False),
+    ('hidden_imports', 'json'),
+])
+def test_option_change_is_reported(project, key, value):
+    _, job_dir, options = project
+    saved_state(job_dir, options)
+    options_changed, _ = make_state(job_dir, dict(options, **{key: value})).check()
+    assert options_changed
+
+
+def test_corrupt_state_file_means_full_rebuild(project):
+    _, job_dir, options = project
+    saved_state(job_dir, options)
+    with open(os.path.join(job_dir, pack_tool.IncrementalState.STATE_NAME), 'w') as f:
+        f.write('{not json')
+    options_changed, changed = make_state(job_dir, options).check()
+    assert options_changed and len(changed) == 2
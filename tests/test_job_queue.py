@@ -0,0 +1,127 @@
+import json
+
+import pytest
+
+import pack_tool
+
+
+def make_options(tmp_path, name, **overrides):
+    options = dict(pack_tool.DEFAULT_OPTIONS, py_file=str(tmp_path / f'{name}.py'),
+                   output_dir=str(tmp_path / 'dist'), app_name=name)
+    options.update(overrides)
+    return options
+
+
+@pytest.fixture
+def job_queue(tmp_path):
+    return pack_tool.JobQueue(path=str(tmp_path / 'queue.json'))
+
+
+def test_add_keeps_order_and_priority_goes_first(tmp_path, job_queue):
+    a = job_queue.add(make_options(tmp_path, 'a'))
+    b = job_queue.add(make_options(tmp_path, 'b'))
+    c = job_queue.add(make_options(tmp_path, 'c'), priority=True)
+    assert [job['id'] for job in job_queue.jobs] == [c['id'], a['id'], b['id']]
+
+
+def test_move_and_prioritize(tmp_path, job_queue):
+    a = job_queue.add(make_options(tmp_path, 'a'))
+    b = job_queue.add(make_options(tmp_path, 'b'))
+    c = job_queue.add(make_options(tmp_path, 'c'))
+    assert job_queue.move(c['id'], -1)
+    assert [job['name'] for job in job_queue.jobs] == ['a', 'c', 'b']
+    assert not job_queue.move(a['id'], -1)
+    assert job_queue.prioritize(b['id'])
+    assert [job['name'] for job in job_queue.jobs] == ['b', 'a', 'c']
+
+
+def test_running_job_cannot_be_removed(tmp_path, job_queue):
+    job = job_queue.add(make_options(tmp_path, 'a'))
+    job_queue.start_next(1)
+    assert not job_queue.remove(job['id'])
+    job_queue.finish(job['id'], None, cancelled=True)
+    assert job_queue.remove(job['id'])
+
+
+def test_start_next_respects_count(tmp_path, job_queue):
+    for name in 'abc':
+        job_queue.add(make_options(tmp_path, name))
+    started = job_queue.start_next(2)
+    assert [job['name'] for job in started] == ['a', 'b']
+    assert job_queue.counts()['running'] == 2
+    assert job_queue.counts()['queued'] == 1
+
+
+def test_same_output_target_does_not_run_concurrently(tmp_path, job_queue):
+    first = job_queue.add(make_options(tmp_path, 'app'))
+    second = job_queue.add(make_options(tmp_path, 'app', single_file=False))
+    other = job_queue.add(make_options(tmp_path, 'other'))
+    
+    started = job_queue.start_next(3)
+    assert [job['id'] for job in started] == [first['id'], other['id']]
+    # 前一个任务还在运行（包括取消后进程尚未退出）时不启动
+    assert job_queue.start_next(3) == []
+    
+    job_queue.finish(first['id'], None, cancelled=True)
+    assert [job['id'] for job in job_queue.start_next(3)] == [second['id']]
+
+
+def test_same_name_in_different_output_dirs_may_run_together(tmp_path, job_queue):
+    job_queue.add(make_options(tmp_path, 'app'))
+    job_queue.add(make_options(tmp_path, 'app', output_dir=str(tmp_path / 'other')))
+    assert len(job_queue.start_next(2)) == 2
+
+
+def test_matrix_variants_conflict_with_variant_builds(tmp_path, job_queue):
+    job_queue.add(make_options(tmp_path, 'app', variants=['onedir_console', 'onefile_console']))
+    job_queue.add(make_options(tmp_path, 'app_onedir_console'))
+    assert len(job_queue.start_next(2)) == 1
+
+
+def test_running_jobs_are_requeued_after_restart(tmp_path, job_queue):
+    path = job_queue.path
+    a = job_queue.add(make_options(tmp_path, 'a'))
+    b = job_queue.add(make_options(tmp_path, 'b'))
+    job_queue.start_next(1)
+    
+    restored = pack_tool.JobQueue(path=path)
+    assert [job['id'] for job in restored.jobs] == [a['id'], b['id']]
+    assert [job['status'] for job in restored.jobs] == ['queued', 'queued']
+    assert restored.jobs[0]['started'] is None
+
+
+def test_corrupt_queue_file_starts_empty(tmp_path):
+    path = tmp_path / 'queue.json'
+    path.write_text('{not json', encoding='utf-8')
+    assert pack_tool.JobQueue(path=str(path)).jobs == []
+
+
+def test_history_feeds_estimate_and_skips_reused_builds(tmp_path, job_queue):
+    options = make_options(tmp_path, 'a')
+    for seconds, reused in ((30, False), (10, False), (20, False), (1, True)):
+        job = job_queue.add(options)
+        job_queue.start_next(1)
+        job_queue.finish(job['id'], {'seconds': seconds, 'returncode': 0, 'exe_size': 1.0, 'reused': reused})
+    assert job_queue.estimate(options) == 20
+    
+    failed = job_queue.add(options)
+    job_queue.start_next(1)
+    job_queue.finish(failed['id'], {'seconds': 99, 'returncode': 1, 'exe_size': None})
+    assert job_queue.get(failed['id'])['status'] == 'failed'
+    assert job_queue.estimate(options) == 20
+    
+    saved = json.loads((tmp_path / 'queue.json').read_text(encoding='utf-8'))
+    assert sorted(saved['history'][pack_tool.JobQueue.project_key(options)]) == [10, 20, 30]
+
+
+def test_schedule_assigns_queued_jobs_to_free_slots(tmp_path, job_queue):
+    options = make_options(tmp_path, 'a')
+    job_queue.history[pack_tool.JobQueue.project_key(options)] = [100]
+    running = job_queue.add(options)
+    queued = job_queue.add(options)
+    job_queue.start_next(1)
+    started = job_queue.get(running['id'])['started']
+    
+    estimates = job_queue.schedule(max_running=1, now=started + 40)
+    assert estimates[running['id']] == (pytest.approx(0.4), pytest.approx(60))
+    assert estimates[queued['id']] == (0.0, pytest.approx(160))
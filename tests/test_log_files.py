@@ -0,0 +1,60 @@
+import os
+import time
+
+import pytest
+
+import pack_tool
+
+
+class LogOwner:
+    """只带日志文件相关方法的对象，不创建界面"""
+    open_log_file = pack_tool.UniversalPyToExe.open_log_file
+    write_log_file = pack_tool.UniversalPyToExe.write_log_file
+    close_log_file = pack_tool.UniversalPyToExe.close_log_file
+    
+    def __init__(self):
+        self.log_file = None
+        self.log_file_path = None
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(pack_tool, 'LOG_DIR', str(tmp_path / 'logs'))
+    monkeypatch.setattr(pack_tool, 'LOG_KEEP_FILES', 3)
+    return tmp_path / 'logs'
+
+
+def test_session_log_receives_every_line(log_dir):
+    owner = LogOwner()
+    owner.open_log_file('app')
+    lines = [f"line {i}" for i in range(pack_tool.LOG_MAX_LINES + 10)]
+    owner.write_log_file(lines[:10])
+    owner.write_log_file(lines[10:])
+    owner.close_log_file()
+    
+    assert os.path.dirname(owner.log_file_path) == str(log_dir)
+    with open(owner.log_file_path, encoding='utf-8') as f:
+        assert f.read().splitlines() == lines
+
+
+def test_only_newest_log_files_are_kept(log_dir):
+    log_dir.mkdir()
+    for i in range(5):
+        path = log_dir / f"old{i}.log"
+        path.write_text("x")
+        os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+    
+    owner = LogOwner()
+    owner.open_log_file('app')
+    owner.close_log_file()
+    assert sorted(os.listdir(log_dir)) == sorted(['old3.log', 'old4.log', os.path.basename(owner.log_file_path)])
+
+
+def test_unwritable_log_dir_disables_file_logging(tmp_path, monkeypatch):
+    blocker = tmp_path / 'not_a_dir'
+    blocker.write_text("")
+    monkeypatch.setattr(pack_tool, 'LOG_DIR', str(blocker / 'logs'))
+    owner = LogOwner()
+    owner.open_log_file('app')
+    assert owner.log_file is None and owner.log_file_path is None
+    owner.write_log_file(["ignored"])
@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+import pack_tool
+
+
+def make_job(tmp_path, **overrides):
+    options = dict(pack_tool.DEFAULT_OPTIONS, py_file=str(tmp_path / 'main.py'), app_name='app',
+                   output_dir=str(tmp_path / 'dist'), bench_runs=3)
+    options.update(overrides)
+    os.makedirs(options['output_dir'], exist_ok=True)
+    messages = []
+    return pack_tool.PackJob(options, log=messages.append), messages
+
+
+def make_report(python_size, time):
+    entries = [{'name': 'app', 'category': 'bootloader', 'package': '引导程序', 'size': 1000, 'uncompressed': 1000},
+               {'name': 'json', 'category': 'python', 'package': 'json', 'size': python_size,
+                'uncompressed': python_size}]
+    return {'mode': 'onefile', 'time': time, 'total_size': 1000 + python_size, 'entries': entries}
+
+
+@pytest.mark.parametrize('level, flag', [(0, None), (1, '--optimize=1'), (2, '--optimize=2')])
+def test_command_passes_optimize_level(tmp_path, level, flag):
+    options = dict(pack_tool.DEFAULT_OPTIONS, py_file='main.py', app_name='app', output_dir='dist', optimize=level)
+    cmd = pack_tool.build_pyinstaller_command(options, 'w', 'w')
+    assert [arg for arg in cmd if arg.startswith('--optimize')] == ([flag] if flag else [])
+
+
+def test_optimized_contents_are_kept_apart_and_compared(tmp_path):
+    normal, _ = make_job(tmp_path)
+    normal.diff_contents(make_report(4000, '2026-01-01T00:00:00'))
+    
+    optimized, messages = make_job(tmp_path, optimize=2)
+    assert optimized.diff_contents(make_report(3000, '2026-01-02T00:00:00')) is None
+    assert any('Python模块' in message and '-25.0%' in message for message in messages)
+    
+    with open(os.path.join(str(tmp_path / 'dist'), 'app_contents.json'), encoding='utf-8') as f:
+        assert sorted(json.load(f)) == ['onefile', 'onefile-O2']
+
+
+def test_optimized_without_normal_build_says_so(tmp_path):
+    job, messages = make_job(tmp_path, optimize=1)
+    job.diff_contents(make_report(3000, '2026-01-02T00:00:00'))
+    assert any('还没有不优化字节码的构建记录' in message for message in messages)
+
+
+def test_benchmark_compares_against_normal_build(tmp_path, monkeypatch):
+    results = iter([100.0, 80.0])
+    
+    def fake_benchmark(exe_path, runs, args):
+        p50 = next(results)
+        times = {'runs': runs, 'min': p50, 'p50': p50, 'p95': p50, 'max': p50}
+        return {'cold': None, 'warm': times, 'pre_main': None, 'failed': 0, 'args': args}
+    
+    monkeypatch.setattr(pack_tool, 'benchmark_executable', fake_benchmark)
+    normal, _ = make_job(tmp_path)
+    normal.run_benchmark('app', 5.0)
+    optimized, messages = make_job(tmp_path, optimize=2)
+    record = optimized.run_benchmark('app', 4.5)
+    
+    assert record['optimize'] == 2
+    assert any('字节码优化后热启动 p50 80 ms' in message and '-20 ms' in message for message in messages)
+    assert not any('启动耗时回退' in message for message in messages)
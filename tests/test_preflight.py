@@ -0,0 +1,93 @@
+import importlib.machinery
+import os
+import sys
+
+import pytest
+
+import pack_tool
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    """在PYTHONPATH中放一个命名空间包、一个只有C扩展的模块和一个普通包"""
+    site = tmp_path / 'site'
+    (site / 'nspkg' / 'part').mkdir(parents=True)
+    (site / 'nspkg' / 'part' / '__init__.py').write_text("raise RuntimeError('must not run')\n")
+    (site / f'fakeext{importlib.machinery.EXTENSION_SUFFIXES[0]}').write_bytes(b'')
+    (site / 'regular').mkdir()
+    (site / 'regular' / '__init__.py').write_text("raise RuntimeError('must not run')\n")
+    (site / 'regular' / 'sub.py').write_text("")
+    monkeypatch.setenv('PYTHONPATH', str(site))
+    monkeypatch.setattr(pack_tool, '_interpreter_info', {})
+    check = pack_tool.PreflightCheck(sys.executable, cache_file=str(tmp_path / 'preflight.json'))
+    return tmp_path, site, check
+
+
+def make_graph(tmp_path, source, files=()):
+    project = tmp_path / 'project'
+    project.mkdir(exist_ok=True)
+    for name in files:
+        (project / name).write_text("")
+    (project / 'main.py').write_text(source, encoding='utf-8')
+    return pack_tool.scan_imports(str(project / 'main.py'))
+
+
+SOURCE = """\
+import os.path
+import json
+import regular.sub
+import nspkg.part
+import fakeext
+import missing_required_mod
+try:
+    import missing_optional_mod
+except ImportError:
+    pass
+"""
+
+
+def test_report_classifies_problems(env):
+    tmp_path, _, check = env
+    report = check.check(make_graph(tmp_path, SOURCE), hidden_imports='missing_hidden_mod')
+    assert report['missing'] == ['missing_hidden_mod', 'missing_required_mod']
+    assert report['optional'] == ['missing_optional_mod']
+    assert report['extensions'] == ['fakeext']
+    assert report['namespace'] == ['nspkg（1 个位置）']
+    assert report['errors'] == []
+    assert report['modules'] == 11
+    
+    blocking, lines = pack_tool.PreflightCheck.format(report)
+    assert blocking
+    assert any('missing_required_mod' in line for line in lines)
+
+
+def test_clean_project_passes(env):
+    tmp_path, _, check = env
+    report = check.check(make_graph(tmp_path, "import json\nimport regular.sub\n"))
+    blocking, lines = pack_tool.PreflightCheck.format(report)
+    assert not blocking
+    assert lines[-1] == "✅ 所有导入都能解析"
+
+
+def test_local_module_shadowing_stdlib_blocks(env):
+    tmp_path, _, check = env
+    report = check.check(make_graph(tmp_path, "import json\nimport random\n", files=['random.py']))
+    assert report['shadowed'] == ['random']
+    assert pack_tool.PreflightCheck.format(report)[0]
+
+
+def test_results_are_cached_until_sys_path_changes(env):
+    tmp_path, site, check = env
+    graph = make_graph(tmp_path, "import json\nimport later_installed\n")
+    first = check.check(graph)
+    assert first['cached'] == 0 and first['missing'] == ['later_installed']
+    
+    second = check.check(graph)
+    assert second['cached'] == second['modules'] == 2
+    
+    # 安装新包会改变目录的修改时间，缓存失效
+    (site / 'later_installed.py').write_text("")
+    stat = os.stat(site)
+    os.utime(site, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    third = check.check(graph)
+    assert third['cached'] == 0 and third['missing'] == []
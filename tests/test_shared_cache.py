@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import pack_tool
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return pack_tool.SharedCache(root=str(tmp_path / 'cache'), max_bytes=10000)
+
+
+def set_last_used(path, when):
+    os.utime(path, (when, when))
+
+
+def fill(cache, tmp_path):
+    """每个区域放一个条目，最近使用时间依次为 builds < upx < pyinstaller < dists"""
+    now = time.time()
+    artifact = tmp_path / 'app'
+    artifact.write_bytes(b'\0' * 4000)
+    builds = pack_tool.BuildCache(os.path.join(cache.root, 'builds'))
+    builds.store('k' * 64, str(artifact), name='app')
+    index = builds.entries()
+    index['k' * 64]['last_used'] = now - 400
+    builds._save_index(index)
+    
+    upx_root = os.path.join(cache.root, 'upx')
+    os.makedirs(upx_root)
+    upx_file = os.path.join(upx_root, 'a' * 64)
+    with open(upx_file, 'wb') as f:
+        f.write(b'\0' * 3000)
+    set_last_used(upx_file, now - 300)
+    
+    pyinstaller_dir = os.path.join(cache.root, 'pyinstaller', 'bincache00')
+    os.makedirs(pyinstaller_dir)
+    with open(os.path.join(pyinstaller_dir, 'lib.so'), 'wb') as f:
+        f.write(b'\0' * 2000)
+    set_last_used(pyinstaller_dir, now - 200)
+    
+    dist_dir = os.path.join(cache.dists_root, 'requests-2.31.0-cp311')
+    os.makedirs(dist_dir)
+    with open(os.path.join(dist_dir, 'entry.json'), 'w', encoding='utf-8') as f:
+        json.dump({'name': 'requests', 'version': '2.31.0', 'interpreter': 'cp311',
+                   'projects': ['a'], 'builds': 1, 'last_used': now - 100, 'padding': 'x' * 1000}, f)
+
+
+def test_entries_cover_every_area(cache, tmp_path):
+    fill(cache, tmp_path)
+    areas = sorted(entry['area'] for entry in cache.entries())
+    assert areas == ['builds', 'dists', 'pyinstaller', 'upx']
+
+
+def test_evict_removes_least_recently_used_first(cache, tmp_path):
+    fill(cache, tmp_path)
+    total = sum(entry['size'] for entry in cache.entries())
+    cache.max_bytes = total - 3500
+    evicted = cache.evict()
+    assert evicted == ["构建产物: app"]
+    assert sorted(entry['area'] for entry in cache.entries()) == ['dists', 'pyinstaller', 'upx']
+    
+    cache.max_bytes = 2500
+    assert [name.split(':')[0] for name in cache.evict()] == ['UPX压缩', 'PyInstaller缓存']
+    assert [entry['area'] for entry in cache.entries()] == ['dists']
+
+
+def test_evict_keeps_everything_under_the_limit(cache, tmp_path):
+    fill(cache, tmp_path)
+    cache.max_bytes = 10 ** 9
+    assert cache.evict() == []
+    assert len(cache.entries()) == 4
+
+
+def test_stats_report_sizes_and_hit_counts(cache, tmp_path):
+    fill(cache, tmp_path)
+    cache.record('builds', hits=2)
+    cache.record('builds', misses=1)
+    stats = cache.stats()
+    builds = next(area for area in stats['areas'] if area['area'] == 'builds')
+    assert (builds['hits'], builds['misses'], builds['count']) == (2, 1, 1)
+    assert stats['total'] == sum(entry['size'] for entry in cache.entries())
+
+
+def test_concurrent_records_are_not_lost(cache):
+    threads = [threading.Thread(target=cache.record, args=('upx',), kwargs={'hits': 1}) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats()['areas'][1]['hits'] == 20
+
+
+def test_clear_empties_the_cache(cache, tmp_path):
+    fill(cache, tmp_path)
+    cache.clear()
+    assert cache.entries() == []
@@ -0,0 +1,102 @@
+import json
+import os
+
+import pytest
+
+import pack_tool
+
+
+def make_dist(site, name, version, files, requires=(), top_level=None):
+    """在site目录中生成一个发行包：files为 {相对路径: 大小}"""
+    info = site / f"{name}-{version}.dist-info"
+    info.mkdir(parents=True)
+    metadata = ["Metadata-Version: 2.1", f"Name: {name}", f"Version: {version}"]
+    metadata += [f"Requires-Dist: {requirement}" for requirement in requires]
+    (info / 'METADATA').write_text("\n".join(metadata) + "\n", encoding='utf-8')
+    records = []
+    for rel, size in files.items():
+        path = site / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'\0' * size)
+        records.append(f"{rel},,{size}")
+    records.append(f"{info.name}/METADATA,,")
+    records.append(f"{info.name}/RECORD,,")
+    (info / 'RECORD').write_text("\n".join(records) + "\n", encoding='utf-8')
+    if top_level:
+        (info / 'top_level.txt').write_text("\n".join(top_level) + "\n", encoding='utf-8')
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    site = tmp_path / 'site-packages'
+    make_dist(site, 'alpha', '1.0', {'alpha/__init__.py': 1000, 'alpha/_core.cpython-311-x86_64-linux-gnu.so': 5000,
+                                     'alpha/data.json': 200, 'alpha/__pycache__/x.cpython-311.pyc': 999},
+              requires=['beta>=1', 'gamma; extra == "fast"'])
+    make_dist(site, 'beta', '2.0', {'beta.py': 300})
+    make_dist(site, 'gamma', '1.0', {'gamma.py': 400})
+    make_dist(site, 'Py_Thing', '3.0', {'thing_impl/__init__.py': 50}, top_level=['thing'])
+    
+    info = {'path': [str(site)], 'version': '3.11', 'libdir': None, 'ldlibrary': None, 'base': str(tmp_path)}
+    monkeypatch.setattr(pack_tool, 'get_interpreter_info', lambda python: info)
+    monkeypatch.setattr(pack_tool, 'CACHE_ROOT', str(tmp_path / 'cache'))
+    return site
+
+
+def make_graph(tmp_path, source):
+    (tmp_path / 'main.py').write_text(source, encoding='utf-8')
+    return pack_tool.scan_imports(str(tmp_path / 'main.py'))
+
+
+def estimator(tmp_path):
+    return pack_tool.SizeEstimator('python', cache_file=str(tmp_path / 'sizes.json'))
+
+
+def test_record_sizes_follow_requirements(tmp_path, site):
+    graph = make_graph(tmp_path, "import alpha\nimport json\nimport not_installed\n")
+    report = estimator(tmp_path).estimate(graph)
+    
+    by_name = {dist['name']: dist for dist in report['dists']}
+    assert sorted(by_name) == ['alpha', 'beta']
+    assert by_name['alpha']['size'] == 6200 and by_name['alpha']['native'] == 5000
+    assert by_name['alpha']['via'] == 'alpha'
+    assert by_name['beta']['via'] == 'alpha 的依赖'
+    assert report['missing'] == ['not_installed']
+    assert report['total'] == report['runtime'] + 6500
+    assert report['onefile'] == pytest.approx(report['total'] * pack_tool.SIZE_ESTIMATE_ONEFILE_RATIO)
+
+
+def test_hidden_imports_and_declared_top_level_names(tmp_path, site):
+    graph = make_graph(tmp_path, "import thing\n")
+    report = estimator(tmp_path).estimate(graph, hidden_imports='gamma, ')
+    assert sorted(dist['name'] for dist in report['dists']) == ['Py_Thing', 'gamma']
+
+
+def test_measured_sizes_and_calibration_take_priority(tmp_path, site):
+    shared = pack_tool.SharedCache()
+    entry_dir = os.path.join(shared.dists_root, 'alpha-1.0')
+    os.makedirs(entry_dir)
+    with open(os.path.join(entry_dir, 'entry.json'), 'w', encoding='utf-8') as f:
+        json.dump({'name': 'alpha', 'version': '1.0', 'interpreter': pack_tool.get_interpreter_tag('3.11'),
+                   'size': 1234, 'projects': [], 'builds': 1}, f)
+    
+    size_estimator = estimator(tmp_path)
+    size_estimator.calibrate(pack_tool.get_interpreter_tag('3.11'), 9000, onefile_ratio=0.5)
+    size_estimator.calibrate(pack_tool.get_interpreter_tag('3.11'), 12000)
+    
+    report = size_estimator.estimate(make_graph(tmp_path, "import alpha\n"))
+    alpha = next(dist for dist in report['dists'] if dist['name'] == 'alpha')
+    assert (alpha['size'], alpha['record_size'], alpha['source']) == (1234, 6200, 'measured')
+    assert report['calibrated'] and report['runtime'] == 9000
+    assert report['onefile'] == pytest.approx(report['total'] * 0.5)
+
+
+def test_distribution_stats_are_cached(tmp_path, site, monkeypatch):
+    size_estimator = estimator(tmp_path)
+    graph = make_graph(tmp_path, "import beta\n")
+    size_estimator.estimate(graph)
+    
+    def fail(dist):
+        raise AssertionError("缓存中已有的包不应重新统计")
+    
+    monkeypatch.setattr(pack_tool.SizeEstimator, 'measure', staticmethod(fail))
+    assert size_estimator.estimate(graph)['dists'][0]['size'] == 300
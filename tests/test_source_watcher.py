@@ -0,0 +1,79 @@
+import os
+import threading
+
+import pack_tool
+
+
+def write(path, text):
+    path.write_text(text, encoding='utf-8')
+
+
+def bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+
+
+def make_project(tmp_path):
+    write(tmp_path / 'main.py', "import helper\n")
+    write(tmp_path / 'helper.py', "VALUE = 1\n")
+    write(tmp_path / 'other.py', "VALUE = 2\n")
+    return pack_tool.SourceWatcher(str(tmp_path / 'main.py'), lambda changed: None)
+
+
+def test_first_poll_only_records_files(tmp_path):
+    watcher = make_project(tmp_path)
+    assert watcher.poll() == []
+    assert sorted(watcher.files) == sorted([str(tmp_path / 'main.py'), str(tmp_path / 'helper.py')])
+
+
+def test_touch_without_content_change_is_ignored(tmp_path):
+    watcher = make_project(tmp_path)
+    watcher.poll()
+    bump_mtime(tmp_path / 'helper.py')
+    assert watcher.poll() == []
+
+
+def test_edit_and_delete_are_reported(tmp_path):
+    watcher = make_project(tmp_path)
+    watcher.poll()
+    write(tmp_path / 'helper.py', "VALUE = 10\n")
+    bump_mtime(tmp_path / 'helper.py')
+    assert watcher.poll() == [str(tmp_path / 'helper.py')]
+    os.remove(tmp_path / 'helper.py')
+    assert watcher.poll() == [str(tmp_path / 'helper.py')]
+
+
+def test_new_import_extends_watched_files(tmp_path):
+    watcher = make_project(tmp_path)
+    watcher.poll()
+    write(tmp_path / 'main.py', "import other\n")
+    bump_mtime(tmp_path / 'main.py')
+    assert watcher.poll() == [str(tmp_path / 'main.py')]
+    assert sorted(watcher.files) == sorted([str(tmp_path / 'main.py'), str(tmp_path / 'other.py')])
+    
+    write(tmp_path / 'other.py', "VALUE = 3\n")
+    bump_mtime(tmp_path / 'other.py')
+    assert watcher.poll() == [str(tmp_path / 'other.py')]
+
+
+def test_changes_within_debounce_window_are_batched(tmp_path):
+    write(tmp_path / 'main.py', "import helper\n")
+    write(tmp_path / 'helper.py', "VALUE = 1\n")
+    calls = []
+    done = threading.Event()
+    
+    def on_change(changed):
+        calls.append(changed)
+        done.set()
+    
+    watcher = pack_tool.SourceWatcher(str(tmp_path / 'main.py'), on_change, interval=0.05, debounce=0.5)
+    watcher.start()
+    try:
+        write(tmp_path / 'helper.py', "VALUE = 2\n")
+        bump_mtime(tmp_path / 'helper.py')
+        write(tmp_path / 'main.py', "import helper\nprint(helper.VALUE)\n")
+        bump_mtime(tmp_path / 'main.py')
+        assert done.wait(10)
+    finally:
+        watcher.stop()
+    assert calls == [sorted([str(tmp_path / 'helper.py'), str(tmp_path / 'main.py')])]
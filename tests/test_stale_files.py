@@ -0,0 +1,92 @@
+"""残留工作目录扫描的测试：只应列出本工具在输出目录中创建的内容"""
+import os
+
+import pack_tool
+
+
+def make_job_dir(output_dir, name):
+    job_dir = os.path.join(output_dir, 'build', name)
+    os.makedirs(job_dir)
+    with open(os.path.join(job_dir, f"{name}.spec"), 'w') as f:
+        f.write("# spec\n")
+    return job_dir
+
+
+def test_finds_job_dirs_and_trash(tmp_path):
+    output = tmp_path / 'dist'
+    job_dir = make_job_dir(str(output), 'app')
+    trash = output / pack_tool.TRASH_DIR_NAME
+    trash.mkdir()
+    
+    found = pack_tool.find_stale_build_files([str(output)])
+    assert sorted(found) == sorted([job_dir, str(trash)])
+
+
+def test_ignores_user_build_dirs_and_loose_specs(tmp_path):
+    source = tmp_path / 'project'
+    (source / 'build' / 'lib').mkdir(parents=True)
+    (source / 'build' / 'lib' / 'module.py').write_text("x = 1\n")
+    (source / 'myapp.spec').write_text("# user spec\n")
+    (source / 'build' / 'other').mkdir()
+    (source / 'build' / 'other' / 'different.spec').write_text("# spec\n")
+    
+    assert pack_tool.find_stale_build_files([str(source)]) == []
+
+
+def test_does_not_descend_into_output_subdirectories(tmp_path):
+    output = tmp_path / 'dist'
+    make_job_dir(str(output / 'nested'), 'app')
+    assert pack_tool.find_stale_build_files([str(output)]) == []
+
+
+def test_skips_running_job_dirs(tmp_path):
+    output = str(tmp_path / 'dist')
+    running = make_job_dir(output, 'running')
+    idle = make_job_dir(output, 'idle')
+    
+    assert pack_tool.find_stale_build_files([output], exclude=[running]) == [idle]
+    assert pack_tool.find_stale_build_files([output], exclude=[os.path.join(running, 'app')]) == [idle]
+
+
+def test_respects_scan_bounds(tmp_path):
+    outputs = []
+    for i in range(3):
+        output = str(tmp_path / f'dist{i}')
+        make_job_dir(output, 'app')
+        outputs.append(output)
+    
+    assert len(pack_tool.find_stale_build_files(outputs + outputs, max_dirs=2)) == 2
+    
+    output = str(tmp_path / 'many')
+    for i in range(5):
+        make_job_dir(output, f'app{i}')
+    assert len(pack_tool.find_stale_build_files([output], max_entries=3)) == 3
+
+
+def test_trash_bin_moves_out_of_the_way_then_deletes(tmp_path):
+    output = str(tmp_path / 'dist')
+    job_dir = make_job_dir(output, 'app')
+    os.makedirs(os.path.join(job_dir, 'app', 'localpycs'))
+    with open(os.path.join(job_dir, 'app', 'localpycs', 'x.pyc'), 'wb') as f:
+        f.write(b'\0')
+    
+    trash = pack_tool.TrashBin()
+    target = trash.discard(job_dir)
+    assert not os.path.exists(job_dir)
+    assert os.path.dirname(target) == os.path.join(output, 'build', pack_tool.TRASH_DIR_NAME)
+    assert trash.wait(10)
+    assert not os.path.exists(os.path.dirname(target))
+    assert trash.progress() == (0, 0, 0)
+    assert trash.discard(job_dir) is None
+
+
+def test_trash_bin_empties_leftover_trash_dir(tmp_path):
+    trash_dir = tmp_path / pack_tool.TRASH_DIR_NAME
+    (trash_dir / 'old-1' / 'sub').mkdir(parents=True)
+    (trash_dir / 'old-1' / 'sub' / 'f').write_text('x')
+    (trash_dir / 'loose').write_text('x')
+    
+    trash = pack_tool.TrashBin()
+    assert trash.discard(str(trash_dir)) == str(trash_dir)
+    assert trash.wait(10)
+    assert not trash_dir.exists()
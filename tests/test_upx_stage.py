@@ -0,0 +1,109 @@
+import os
+import stat
+import sys
+
+import pytest
+
+import pack_tool
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="用脚本模拟upx")
+
+# 模拟upx：把文件截成一半；内容以FAIL开头时报错；每次调用都记录到calls文件
+FAKE_UPX = """#!{python}
+import sys
+if sys.argv[1] == '--version':
+    print('upx 4.2.1')
+    sys.exit(0)
+path = sys.argv[-1]
+with open({calls!r}, 'a') as f:
+    f.write(path + '\\n')
+data = open(path, 'rb').read()
+if data.startswith(b'FAIL'):
+    print('upx: CantPackException', file=sys.stderr)
+    sys.exit(2)
+open(path, 'wb').write(data[:len(data) // 2])
+"""
+
+
+@pytest.fixture
+def upx(tmp_path):
+    tool_dir = tmp_path / 'bin'
+    tool_dir.mkdir()
+    path = tool_dir / 'upx'
+    calls = tmp_path / 'calls.txt'
+    path.write_text(FAKE_UPX.format(python=sys.executable, calls=str(calls)), encoding='utf-8')
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path), calls
+
+
+@pytest.fixture
+def app_dir(tmp_path):
+    app = tmp_path / 'dist' / 'app'
+    (app / '_internal' / 'PyQt5' / 'Qt5' / 'plugins').mkdir(parents=True)
+    (app / 'app').write_bytes(b'\1' * 1000)
+    (app / '_internal' / 'libfoo.so.1').write_bytes(b'\2' * 1000)
+    (app / '_internal' / '_bar.cpython-311-x86_64-linux-gnu.so').write_bytes(b'\3' * 600)
+    (app / '_internal' / 'libbroken.so').write_bytes(b'FAIL' + b'\4' * 100)
+    (app / '_internal' / 'libskip.so').write_bytes(b'\5' * 100)
+    (app / '_internal' / 'PyQt5' / 'Qt5' / 'plugins' / 'libqxcb.so').write_bytes(b'\6' * 100)
+    (app / '_internal' / 'libsigned.so').write_bytes(b'\7' * 100)
+    (app / '_internal' / '.libsigned.so.hmac').write_bytes(b'')
+    (app / '_internal' / 'data.txt').write_bytes(b'text' * 100)
+    return app
+
+
+def call_count(calls):
+    return len(calls.read_text().splitlines()) if calls.exists() else 0
+
+
+def run_stage(upx, app_dir, tmp_path):
+    stage = pack_tool.UpxStage(upx, exclude=['libskip*'], root=str(tmp_path / 'cache'))
+    return stage.run(str(app_dir), str(app_dir / 'app'))
+
+
+def test_compresses_binaries_and_reports_exclusions(upx, app_dir, tmp_path):
+    path, _ = upx
+    report = run_stage(path, app_dir, tmp_path)
+    
+    status = {record['name']: record['status'] for record in report['files']}
+    assert status == {'_internal/libfoo.so.1': 'compressed',
+                      '_internal/_bar.cpython-311-x86_64-linux-gnu.so': 'compressed',
+                      '_internal/libbroken.so': 'failed'}
+    reasons = {item['name']: item['reason'] for item in report['excluded']}
+    assert reasons['_internal/libskip.so'] == "排除规则 libskip*"
+    assert reasons['_internal/PyQt5/Qt5/plugins/libqxcb.so'] == "Qt插件"
+    assert reasons['_internal/libsigned.so'] == "带完整性校验文件"
+    
+    assert report['upx'] == 'upx 4.2.1'
+    assert (report['original'], report['compressed']) == (1000 + 600 + 104, 500 + 300 + 104)
+    assert os.path.getsize(app_dir / 'app') == 1000
+    assert os.path.getsize(app_dir / '_internal' / 'data.txt') == 400
+
+
+def test_unchanged_files_come_from_cache(upx, app_dir, tmp_path):
+    path, calls = upx
+    run_stage(path, app_dir, tmp_path)
+    first_calls = call_count(calls)
+    
+    # 重新打包后文件恢复为未压缩的内容：直接复制缓存结果，不再调用upx
+    (app_dir / '_internal' / 'libfoo.so.1').write_bytes(b'\2' * 1000)
+    report = run_stage(path, app_dir, tmp_path)
+    status = {record['name']: record['status'] for record in report['files']}
+    assert status['_internal/libfoo.so.1'] == 'cached'
+    assert status['_internal/_bar.cpython-311-x86_64-linux-gnu.so'] == 'packed'
+    assert status['_internal/libbroken.so'] == 'failed'
+    assert call_count(calls) == first_calls
+    assert os.path.getsize(app_dir / '_internal' / 'libfoo.so.1') == 500
+
+
+def test_cached_files_lists_only_compressed_results(upx, app_dir, tmp_path):
+    path, _ = upx
+    run_stage(path, app_dir, tmp_path)
+    cached = pack_tool.UpxStage.cached_files(str(tmp_path / 'cache'))
+    assert sorted(size for _, size, _ in cached) == [300, 500]
+    assert pack_tool.UpxStage.cached_files(str(tmp_path / 'missing')) == []
+
+
+def test_find_upx_prefers_given_directory(upx):
+    path, _ = upx
+    assert pack_tool.find_upx(os.path.dirname(path)) == path
@@ -0,0 +1,55 @@
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+import pack_tool
+
+
+@pytest.fixture
+def project(tmp_path):
+    src = tmp_path / 'src'
+    (src / 'pkg').mkdir(parents=True)
+    (src / 'main.py').write_text(
+        "import sys\nimport helper\nfrom pkg import tool\n"
+        "try:\n    import yaml\nexcept ImportError:\n    yaml = None\n"
+        "print(helper.greet(), tool.NAME, __name__)\nsys.exit(3)\n", encoding='utf-8')
+    (src / 'helper.py').write_text("def greet():\n    return 'hello'\n", encoding='utf-8')
+    (src / 'pkg' / '__init__.py').write_text("", encoding='utf-8')
+    (src / 'pkg' / 'tool.py').write_text("NAME = 'tool'\n", encoding='utf-8')
+    (src / 'plugin.py').write_text("", encoding='utf-8')
+    (src / 'unrelated.py').write_text("raise SystemExit('should not be packed')\n", encoding='utf-8')
+    options = dict(pack_tool.DEFAULT_OPTIONS, py_file=str(src / 'main.py'), backend='zipapp',
+                   output_dir=str(tmp_path / 'dist'), app_name='demo', hidden_imports='plugin, requests')
+    return options
+
+
+def test_zipapp_runs_with_local_modules(project):
+    marks = []
+    result = pack_tool.build_zipapp(project, log=lambda message: None, mark=marks.append)
+    assert marks == ['写入归档']
+    assert result['path'] == pack_tool.get_exe_path(project)
+    assert result['external'] == ['yaml', 'requests']
+    
+    with zipfile.ZipFile(result['path']) as archive:
+        names = sorted(archive.namelist())
+    assert names == ['__main__.py', 'helper.py', 'main.py', 'pkg/__init__.py', 'pkg/tool.py', 'plugin.py']
+    assert result['files'] == 5
+    
+    process = subprocess.run([sys.executable, result['path']], capture_output=True, text=True, timeout=60)
+    assert process.stdout.strip() == 'hello tool __main__'
+    assert process.returncode == 3
+
+
+def test_main_script_clashing_with_a_module_name(tmp_path):
+    src = tmp_path / 'src'
+    src.mkdir()
+    (src / 'app-entry.py').write_text("print('entry', __name__)\n", encoding='utf-8')
+    options = dict(pack_tool.DEFAULT_OPTIONS, py_file=str(src / 'app-entry.py'), backend='zipapp',
+                   output_dir=str(tmp_path / 'dist'), app_name='entry')
+    result = pack_tool.build_zipapp(options, log=lambda message: None)
+    with zipfile.ZipFile(result['path']) as archive:
+        assert '__pytoexe_main__.py' in archive.namelist()
+    process = subprocess.run([sys.executable, result['path']], capture_output=True, text=True, timeout=60)
+    assert process.stdout.strip() == 'entry __main__'